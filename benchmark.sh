@@ -2,4 +2,4 @@
 
 set -e
 
-pipenv run python scrambled_word_matcher/run_benchmarks.py
+pipenv run python scrambled_word_matcher/run_benchmarks.py "$@"
@@ -1,25 +1,116 @@
-"Generates sample files and benchmarks the system."
+"""
+Generates sample workloads and benchmarks the system.
 
+Every scenario of the benchmark matrix describes a workload: dictionary size, word length distribution,
+number of distinct word lengths, text length and match density. The matrix varies one parameter at a time
+around a base scenario, so that each sweep shows how a single workload property affects each engine.
+For every scenario and engine, add_words, import_dictionary, scan, scan_lines and scan_file are timed
+separately, and their peak memory is measured with tracemalloc in a separate, untimed run.
+
+With --complexity, the adversarial workloads of workloads.py are scanned instead, at growing text lengths
+with a fixed dictionary size and at growing dictionary sizes with a fixed text length. The exponent of the
+growth of scan time with each is fitted as the slope of a least squares line in log-log space: about 1 for
+linear growth, 2 for quadratic, 0 for none. An asymptotic regression changes a slope, where a constant factor
+only shifts the line, so slopes are compared with a baseline instead of times.
+
+Results are printed as a table and can be written as JSON with --output. With --baseline, the results
+are compared with a previous JSON output, and the exit status is 1 if an operation got slower, or used more
+memory, by more than --threshold, or with --complexity, if a slope grew by more than --slope-threshold.
+"""
+
+import argparse
+import json
+import math
 import os
+import platform
 import random
 import statistics
 import string
+import sys
 import tempfile
 import timeit
+import tracemalloc
 from contextlib import closing
+from functools import partial
+from dataclasses import dataclass, asdict, replace
 
-from typing import List, Tuple, Set
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 from scrambled_word_matcher import ScrambledWordMatcher
+from scrambled_word_matcher.matcher import ENGINES
 from scrambled_word_matcher.logger import init_logger
-from scrambled_word_matcher.constraints import MAX_DICTIONARY_SIZE
-from scrambled_word_matcher.constraints import MIN_INPUT_LENGTH
+from scrambled_word_matcher.constraints import MIN_DICTIONARY_LENGTH
+from scrambled_word_matcher.constraints import MAX_DICTIONARY_LENGTH
 from scrambled_word_matcher.constraints import MAX_INPUT_LENGTH
-from scrambled_word_matcher.constraints import MAX_INPUT_SIZE
+from workloads import WORKLOADS, scramble
 
-BENCHMARK_REPEAT_COUNT = 100
+BENCHMARK_REPEAT_COUNT = 5
+BENCHMARK_LINE_COUNT = 20  # Lines of text per scenario, at most MAX_INPUT_SIZE so that scan_file accepts them
+DEFAULT_REGRESSION_THRESHOLD = 0.2  # Relative slowdown, or memory growth, reported as a regression
+RESULTS_FORMAT_VERSION = 1
+OPERATIONS = ('add_words', 'import_dictionary', 'scan', 'scan_lines', 'scan_file')
+LENGTH_DISTRIBUTIONS = ('uniform', 'short')
 BENCHMARK_LOGGER = init_logger('benchmark')
 
+COMPLEXITY_TEXT_LENGTHS = (500, 1_000, 2_000, 4_000)  # Swept with COMPLEXITY_DICTIONARY_SIZE words
+COMPLEXITY_DICTIONARY_SIZES = (50, 100, 200, 400)  # Swept with COMPLEXITY_TEXT_LENGTH characters
+COMPLEXITY_TEXT_LENGTH = 1_000
+COMPLEXITY_DICTIONARY_SIZE = 100
+COMPLEXITY_SEED = 0
+COMPLEXITY_MIN_SECONDS = 0.05  # Timed runs repeat short scans for at least this long, so timer noise does not bend slopes
+DEFAULT_SLOPE_THRESHOLD = 0.5  # Growth of a fitted exponent reported as a regression, from linear to quadratic is 1
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    A benchmark workload.
+
+    Properties:
+    - name: The unique name of the scenario, used to match results with a baseline.
+    - dictionary_size: The number of distinct dictionary words.
+    - distinct_lengths: The number of distinct word lengths, spread evenly between the length limits.
+    - length_distribution: How word lengths are drawn among the distinct lengths, one of LENGTH_DISTRIBUTIONS:
+                           'uniform' draws every length equally often, 'short' halves the weight
+                           of every length compared to the previous one, like natural language.
+    - text_length: The number of characters of every line of text.
+    - match_density: The fraction of the text covered by scrambled dictionary words, the rest is random.
+    - seed: The seed of the random generator, so that a scenario always generates the same workload.
+    """
+
+    name: str
+    dictionary_size: int = 100
+    distinct_lengths: int = 19
+    length_distribution: str = 'uniform'
+    text_length: int = 500
+    match_density: float = 0.1
+    seed: int = 0
+
+
+BASE_SCENARIO = Scenario('base')
+
+
+def sweep(parameter: str, values: Sequence[Any]) -> List[Scenario]:
+    """
+    Return variations of the base scenario with one parameter changed.
+
+    >>> [scenario.name for scenario in sweep('text_length', [100, 500])]
+    ['text_length=100', 'text_length=500']
+    """
+
+    return [replace(BASE_SCENARIO, name=f'{parameter}={value}', **{parameter: value}) for value in values]
+
+
+BENCHMARK_MATRIX: List[Scenario] = [
+    BASE_SCENARIO,
+    *sweep('dictionary_size', [10, 1_000, 10_000]),
+    *sweep('length_distribution', ['short']),
+    *sweep('distinct_lengths', [1, 5]),
+    *sweep('text_length', [50, 2_000]),
+    *sweep('match_density', [0.0, 0.5]),
+]
+QUICK_MATRIX: List[Scenario] = [BASE_SCENARIO, *sweep('dictionary_size', [1_000])]
+
 
 def calculate_percentile(data: List[float], percentile: float) -> float:
     """
@@ -35,9 +126,9 @@ def calculate_percentile(data: List[float], percentile: float) -> float:
     >>> calculate_percentile([1, 2, 3, 4, 5], 50)
     3.0
     >>> calculate_percentile([1, 3, 5, 7, 9], 80)
-    7.2
+    7.4
     >>> calculate_percentile([1.5, 3.5, 4.5, 6.5], 75)
-    5.25
+    5.0
     """
 
     if not data:
@@ -51,7 +142,7 @@ def calculate_percentile(data: List[float], percentile: float) -> float:
         return data[0]
 
     # When the percentile does not fall exactly on an index, interpolate between the two surrounding data points.
-    index = (size * percentile / 100)
+    index = (size - 1) * percentile / 100
     prev_index = int(index)
     next_index = min(prev_index + 1, size - 1)
     interpolation = index - prev_index
@@ -60,67 +151,364 @@ def calculate_percentile(data: List[float], percentile: float) -> float:
     return sorted_data[prev_index] * (1 - interpolation) + sorted_data[next_index] * interpolation
 
 
-def generate_dictionary_file() -> str:
+def word_lengths(scenario: Scenario) -> List[int]:
+    """
+    Return the distinct word lengths of a scenario, spread evenly between the dictionary length limits.
+
+    >>> word_lengths(replace(BASE_SCENARIO, distinct_lengths=1)), word_lengths(replace(BASE_SCENARIO, distinct_lengths=4))
+    ([2], [2, 8, 14, 20])
+    """
+
+    count = min(scenario.distinct_lengths, MAX_DICTIONARY_LENGTH - MIN_DICTIONARY_LENGTH + 1)
+    if count == 1:
+        return [MIN_DICTIONARY_LENGTH]
+
+    step = (MAX_DICTIONARY_LENGTH - MIN_DICTIONARY_LENGTH) / (count - 1)
+    return [MIN_DICTIONARY_LENGTH + round(index * step) for index in range(count)]
+
+
+def generate_words(scenario: Scenario, rng: random.Random) -> List[str]:
+    """
+    Generate the distinct dictionary words of a scenario.
+    """
+
+    lengths = word_lengths(scenario)
+    if scenario.dictionary_size > sum(len(string.ascii_lowercase) ** word_length for word_length in lengths):
+        raise ValueError(f'Scenario {scenario.name} asks for more words than its lengths allow')
+
+    if scenario.length_distribution == 'short':
+        weights = [0.5 ** index for index in range(len(lengths))]
+    else:
+        weights = [1.0] * len(lengths)
+
     words: Set[str] = set()
+    while len(words) < scenario.dictionary_size:
+        word_length = rng.choices(lengths, weights)[0]
+        words.add(''.join(rng.choices(string.ascii_lowercase, k=word_length)))
 
-    while len(words) < MAX_DICTIONARY_SIZE:
-        word_length = random.randint(MIN_INPUT_LENGTH, MAX_INPUT_LENGTH)
-        word = ''.join(random.choices(string.ascii_lowercase, k=word_length))
-        words.add(word)
+    return sorted(words)
 
-    with closing(tempfile.NamedTemporaryFile(mode='w', delete=False)) as temp_file:
-        for word in words:
-            temp_file.write(word)
 
-    return temp_file.name
+def generate_lines(scenario: Scenario, words: List[str], rng: random.Random) -> List[str]:
+    """
+    Generate the lines of text of a scenario: random letters, with scrambled dictionary words covering
+    about match_density of every line.
+    """
+
+    lines = []
+    for _ in range(BENCHMARK_LINE_COUNT):
+        chars = rng.choices(string.ascii_lowercase, k=scenario.text_length)
+        planted = 0
+        while words and planted < scenario.match_density * scenario.text_length:
+            word = scramble(rng.choice(words), rng)
+            if len(word) > scenario.text_length:
+                break
+            position = rng.randrange(scenario.text_length - len(word) + 1)
+            chars[position:position + len(word)] = word
+            planted += len(word)
+        lines.append(''.join(chars))
 
+    return lines
 
-def generate_input_file() -> str:
-    lines = random.randint(1, MAX_INPUT_SIZE)
 
+def write_lines(lines: List[str]) -> str:
     with closing(tempfile.NamedTemporaryFile(mode='w', delete=False)) as temp_file:
-        for _ in range(lines):
-            line_length = random.randint(MIN_INPUT_LENGTH, MAX_INPUT_LENGTH)
-            line = ''.join(random.choices(string.ascii_lowercase, k=line_length))
-            temp_file.write(line)
+        for line in lines:
+            temp_file.write(line + '\n')
 
     return temp_file.name
 
 
-def setup_matcher(dictionary_file: str) -> ScrambledWordMatcher:
-    matcher = ScrambledWordMatcher(BENCHMARK_LOGGER)
-    with open(dictionary_file) as f:
-        for word in f:
-            matcher.add_word(word.strip())
+def new_matcher(engine: str, words: Optional[List[str]] = None) -> ScrambledWordMatcher:
+    matcher = ScrambledWordMatcher(BENCHMARK_LOGGER, engine=engine)
+    if words is not None:
+        matcher.add_words(words)
     return matcher
 
 
-def run_benchmark(dictionary_file: str, input_file: str) -> Tuple[float, float, float, float, float]:
-    matcher = setup_matcher(dictionary_file)
-    with open(input_file, 'r') as f:
-        text = f.read()
+def operations(engine: str, words: List[str], lines: List[str], dictionary_file: str,
+               input_file: Optional[str]) -> Dict[str, Callable[[], Any]]:
+    """
+    Return the benchmarked operations of a scenario for an engine, as callables.
 
-    times: List[float] = timeit.repeat(lambda: matcher.scan(text), number=1, repeat=BENCHMARK_REPEAT_COUNT)
-    min_time: float = min(times)
-    median_time: float = statistics.median(times)
-    percentile_25: float = calculate_percentile(times, 25)
-    percentile_75: float = calculate_percentile(times, 75)
-    percentile_90: float = calculate_percentile(times, 90)
-    return min_time, median_time, percentile_25, percentile_75, percentile_90
+    Dictionary operations start from an empty matcher; scan operations use a matcher whose lazy
+    structures are already built, so that only scanning is measured.
+    """
 
+    matcher = new_matcher(engine, words)
+    matcher.scan('ab')  # Build the lazy structures the engine scans with
+
+    benchmarks: Dict[str, Callable[[], Any]] = {
+        'add_words': lambda: new_matcher(engine, words),
+        'import_dictionary': lambda: new_matcher(engine).import_dictionary(dictionary_file, max_size=len(words)),
+        'scan': lambda: [matcher.scan(line) for line in lines],
+        'scan_lines': lambda: matcher.scan_lines(lines),
+    }
+    if input_file is not None:
+        benchmarks['scan_file'] = lambda: matcher.scan_file(input_file)
+
+    return benchmarks
 
-if __name__ == '__main__':
-    dictionary_file = generate_dictionary_file()
-    input_file = generate_input_file()
 
+def peak_memory(operation: Callable[[], Any]) -> int:
+    """
+    Return the peak number of bytes allocated while the operation runs, including its result.
+    """
+
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def run_scenario(scenario: Scenario, engines: Sequence[str], repeat: int,
+                 selected_operations: Sequence[str] = OPERATIONS) -> List[Dict[str, Any]]:
+    """
+    Benchmark the selected operations of a scenario with every engine.
+
+    :return: One result per engine and operation, see result_key for the keys identifying them.
+    """
+
+    rng = random.Random(scenario.seed)
+    words = generate_words(scenario, rng)
+    lines = generate_lines(scenario, words, rng)
+    dictionary_file = write_lines(words)
+    input_file = write_lines(lines) if scenario.text_length <= MAX_INPUT_LENGTH else None  # scan_file limits
+
+    results = []
     try:
-        min_time, median_time, perc_25, perc_75, perc_90 = run_benchmark(dictionary_file, input_file)
-        print(f"Minimum execution time over {BENCHMARK_REPEAT_COUNT} runs: {min_time:.4f} seconds")
-        print(f"Median execution time over {BENCHMARK_REPEAT_COUNT} runs: {median_time:.4f} seconds")
-        print(f"25th percentile execution time: {perc_25:.4f} seconds")
-        print(f"75th percentile execution time: {perc_75:.4f} seconds")
-        print(f"90th percentile execution time: {perc_90:.4f} seconds")
+        for engine in engines:
+            for operation, benchmark in operations(engine, words, lines, dictionary_file, input_file).items():
+                if operation not in selected_operations:
+                    continue
+
+                times = timeit.repeat(benchmark, number=1, repeat=repeat)
+                results.append({
+                    'scenario': scenario.name,
+                    'engine': engine,
+                    'operation': operation,
+                    'min': min(times),
+                    'median': statistics.median(times),
+                    'p90': calculate_percentile(times, 90),
+                    'peak_memory': peak_memory(benchmark),
+                })
     finally:
-        # Remove the temporary files after the benchmark
         os.remove(dictionary_file)
-        os.remove(input_file)
+        if input_file is not None:
+            os.remove(input_file)
+
+    return results
+
+
+def fit_slope(sizes: Sequence[float], times: Sequence[float]) -> Tuple[float, float]:
+    """
+    Fit times as a power of sizes, by a least squares line through their logarithms.
+
+    :return: The slope of the line, the exponent of the growth, and its coefficient of determination (R²).
+
+    >>> [round(value, 3) for value in fit_slope([1, 2, 4, 8], [3, 12, 48, 192])]
+    [2.0, 1.0]
+    """
+
+    log_sizes = [math.log(size) for size in sizes]
+    log_times = [math.log(time) for time in times]
+    slope, _ = statistics.linear_regression(log_sizes, log_times)
+    return slope, statistics.correlation(log_sizes, log_times) ** 2
+
+
+def run_complexity(workload: str, engines: Sequence[str], repeat: int, quick: bool = False) -> List[Dict[str, Any]]:
+    """
+    Measure how the scan time of an adversarial workload grows with text length and with dictionary size.
+
+    Every point is the fastest of `repeat` timed runs, each scanning a line as many times as needed
+    to last COMPLEXITY_MIN_SECONDS, so that noise does not bend the fitted line.
+
+    :return: One result per engine and swept parameter, with the sizes, the times and the fitted slope.
+    """
+
+    generate = WORKLOADS[workload]
+    sweeps = {
+        'text_length': [(COMPLEXITY_DICTIONARY_SIZE, text_length) for text_length in COMPLEXITY_TEXT_LENGTHS],
+        'dictionary_size': [(dictionary_size, COMPLEXITY_TEXT_LENGTH) for dictionary_size in COMPLEXITY_DICTIONARY_SIZES],
+    }
+
+    results = []
+    for engine in engines:
+        for parameter, points in sweeps.items():
+            if quick:
+                points = points[:3]
+
+            sizes, times = [], []
+            for dictionary_size, text_length in points:
+                words, text = generate(dictionary_size, text_length, random.Random(COMPLEXITY_SEED))
+                matcher = new_matcher(engine, words)
+                scan = partial(matcher.scan, text)
+                scan()  # Build the lazy structures the engine scans with
+                number = max(1, math.ceil(COMPLEXITY_MIN_SECONDS / timeit.timeit(scan, number=1)))
+                sizes.append(text_length if parameter == 'text_length' else dictionary_size)
+                times.append(min(timeit.repeat(scan, number=number, repeat=repeat)) / number)
+
+            slope, r_squared = fit_slope(sizes, times)
+            results.append({'workload': workload, 'engine': engine, 'parameter': parameter,
+                            'sizes': sizes, 'times': times, 'slope': slope, 'r_squared': r_squared})
+
+    return results
+
+
+def complexity_key(result: Dict[str, Any]) -> Tuple[str, str, str]:
+    return result['workload'], result['engine'], result['parameter']
+
+
+def find_slope_regressions(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                           threshold: float) -> List[str]:
+    """
+    Compare fitted slopes with a baseline, and describe those that grew by more than the threshold.
+    Results missing from the baseline are ignored.
+
+    >>> baseline = [{'workload': 'near_misses', 'engine': 'naive', 'parameter': 'text_length', 'slope': 1.0}]
+    >>> find_slope_regressions([dict(baseline[0], slope=1.2)], baseline, threshold=0.5)
+    []
+    >>> find_slope_regressions([dict(baseline[0], slope=1.9)], baseline, threshold=0.5)
+    ['near_misses/naive/text_length: slope 1.90 vs 1.00']
+    """
+
+    baseline_results = {complexity_key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        previous = baseline_results.get(complexity_key(result))
+        if previous is not None and result['slope'] > previous['slope'] + threshold:
+            regressions.append(f"{'/'.join(complexity_key(result))}: "
+                               f"slope {result['slope']:.2f} vs {previous['slope']:.2f}")
+
+    return regressions
+
+
+def result_key(result: Dict[str, Any]) -> Tuple[str, str, str]:
+    return result['scenario'], result['engine'], result['operation']
+
+
+def find_regressions(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                     threshold: float) -> List[str]:
+    """
+    Compare results with a baseline, and describe the operations that got slower (by median time)
+    or used more peak memory by more than the threshold. Results missing from the baseline are ignored.
+
+    :param results: The results of this run.
+    :param baseline: The results of a previous run.
+    :param threshold: The tolerated relative increase, e.g. 0.2 for 20%.
+    :return: One description per regression.
+
+    >>> baseline = [{'scenario': 'base', 'engine': 'naive', 'operation': 'scan', 'median': 1.0, 'peak_memory': 100}]
+    >>> find_regressions([dict(baseline[0], median=1.1)], baseline, threshold=0.2)
+    []
+    >>> find_regressions([dict(baseline[0], median=1.5, peak_memory=200)], baseline, threshold=0.2)
+    ['base/naive/scan: median time 1.5000s vs 1.0000s (+50%)', 'base/naive/scan: peak memory 200 vs 100 bytes (+100%)']
+    """
+
+    baseline_results = {result_key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        previous = baseline_results.get(result_key(result))
+        if previous is None:
+            continue
+
+        name = '/'.join(result_key(result))
+        if result['median'] > previous['median'] * (1 + threshold):
+            regressions.append(f"{name}: median time {result['median']:.4f}s vs {previous['median']:.4f}s "
+                               f"(+{result['median'] / previous['median'] - 1:.0%})")
+        if result['peak_memory'] > previous['peak_memory'] * (1 + threshold):
+            regressions.append(f"{name}: peak memory {result['peak_memory']} vs {previous['peak_memory']} bytes "
+                               f"(+{result['peak_memory'] / previous['peak_memory'] - 1:.0%})")
+
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES),
+                        help='the scan engines to benchmark (default: all)')
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=list(OPERATIONS),
+                        help='the operations to benchmark (default: all)')
+    parser.add_argument('--repeat', type=int, default=BENCHMARK_REPEAT_COUNT,
+                        help=f'the number of timed runs per operation (default: {BENCHMARK_REPEAT_COUNT})')
+    parser.add_argument('--quick', action='store_true', help='benchmark a reduced matrix')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='compare the results with the JSON output of a previous run')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='the relative increase of median time or peak memory reported as a regression '
+                             f'(default: {DEFAULT_REGRESSION_THRESHOLD})')
+    parser.add_argument('--complexity', action='store_true',
+                        help='fit the growth of scan time with text length and dictionary size on adversarial workloads')
+    parser.add_argument('--workloads', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS),
+                        help='the adversarial workloads of --complexity (default: all)')
+    parser.add_argument('--slope-threshold', type=float, default=DEFAULT_SLOPE_THRESHOLD,
+                        help='the increase of a fitted slope reported as a regression '
+                             f'(default: {DEFAULT_SLOPE_THRESHOLD})')
+    return parser.parse_args()
+
+
+def main_complexity(args: argparse.Namespace) -> None:
+    results = []
+    print(f"{'workload':<16} {'engine':<17} {'parameter':<16} {'slope':>6} {'R²':>6} {'fastest (s)':>12} {'slowest (s)':>12}")
+    for workload in args.workloads:
+        for result in run_complexity(workload, args.engines, args.repeat, args.quick):
+            results.append(result)
+            print(f"{result['workload']:<16} {result['engine']:<17} {result['parameter']:<16} "
+                  f"{result['slope']:>6.2f} {result['r_squared']:>6.3f} "
+                  f"{result['times'][0]:>12.5f} {result['times'][-1]:>12.5f}", flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'version': RESULTS_FORMAT_VERSION, 'python': platform.python_version(),
+                       'complexity': results}, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file).get('complexity', [])
+
+        regressions = find_slope_regressions(results, baseline, args.slope_threshold)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No slope increase over {args.slope_threshold} against {args.baseline}')
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.complexity:
+        main_complexity(args)
+        sys.exit(0)
+
+    matrix = QUICK_MATRIX if args.quick else BENCHMARK_MATRIX
+
+    results = []
+    print(f"{'scenario':<24} {'engine':<17} {'operation':<18} {'median (s)':>11} {'min (s)':>10} {'peak memory':>12}")
+    for scenario in matrix:
+        for result in run_scenario(scenario, args.engines, args.repeat, args.operations):
+            results.append(result)
+            print(f"{result['scenario']:<24} {result['engine']:<17} {result['operation']:<18} "
+                  f"{result['median']:>11.5f} {result['min']:>10.5f} {result['peak_memory']:>12}", flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'version': RESULTS_FORMAT_VERSION, 'python': platform.python_version(),
+                       'scenarios': [asdict(scenario) for scenario in matrix], 'results': results},
+                      output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regression over {args.threshold:.0%} against {args.baseline}')
@@ -1,3 +1,4 @@
-from scrambled_word_matcher.matcher import ScrambledWordMatcher
+from scrambled_word_matcher.matcher import ScrambledWordMatcher, ScanResult
+from scrambled_word_matcher.registry import MatcherRegistry
 
-__all__ = ['ScrambledWordMatcher']
+__all__ = ['ScrambledWordMatcher', 'ScanResult', 'MatcherRegistry']
@@ -1,40 +1,297 @@
 import sys
+import asyncio
+import logging
 import argparse
 
+from time import perf_counter
+from functools import partial
+
+from typing import Iterator, List, Optional
+
 from scrambled_word_matcher.logger import init_logger
 from scrambled_word_matcher.constraints import DictionaryValidationError
 from scrambled_word_matcher.constraints import InputValidationError
+from scrambled_word_matcher.constraints import MAX_DICTIONARY_SIZE, LARGE_MAX_DICTIONARY_SIZE
+from scrambled_word_matcher.constraints import validate_input_length
 from scrambled_word_matcher import ScrambledWordMatcher
+from scrambled_word_matcher.matcher import ENGINES, EXECUTORS, top_counts
+from scrambled_word_matcher.mapped_input import MappedInput
+from scrambled_word_matcher.index_file import IndexFileError
+from scrambled_word_matcher.index_file import dictionary_checksum, read_index, write_index
+from scrambled_word_matcher.server import DEFAULT_HOST, ERROR_PREFIX, RELOAD_COMMAND, MatcherServer, request_lines
 
 
-def main(dictionary_path: str, input_path: str) -> None:
-    logger = init_logger('main')
+def load_matcher(logger: logging.Logger, dictionary_path: Optional[str], index_path: Optional[str] = None,
+                 engine: str = 'naive', max_dictionary_size: Optional[int] = None,
+                 cache_size: int = 0, stats: bool = False) -> ScrambledWordMatcher:
+    """
+    Build a matcher from a compiled index if index_path is given, from the dictionary otherwise.
+    With stats, reading the compiled index is timed as the dictionary build phase.
+
+    :raises OSError: If the compiled index cannot be read.
+    :raises IndexFileError: If the compiled index is invalid, or was not built from the dictionary.
+    :raises DictionaryValidationError: If the dictionary is invalid.
+    """
+
+    if index_path is not None:
+        started = perf_counter()
+        snapshot, checksum = read_index(index_path)
+
+        if dictionary_path is not None and checksum != dictionary_checksum(dictionary_path):
+            raise IndexFileError(f'Compiled index {index_path} was not built from {dictionary_path}, recompile it')
+
+        matcher = ScrambledWordMatcher.from_snapshot(snapshot, logger, engine=engine, cache_size=cache_size,
+                                                     stats=stats)
+        if matcher.stats is not None:
+            matcher.stats.add_time('dictionary_build', perf_counter() - started)
+        return matcher
+
+    assert dictionary_path is not None, 'Either a dictionary or a compiled index is required'
+    matcher = ScrambledWordMatcher(logger, engine=engine, cache_size=cache_size, stats=stats)
+    matcher.import_dictionary(dictionary_path, max_size=max_dictionary_size)
+    return matcher
 
-    matcher = ScrambledWordMatcher(logger)
+
+MODES = ('cases', 'frequency')
+
+
+def corpus_lines(mapped_input: MappedInput) -> Iterator[memoryview]:
+    """
+    Yield the lines of a mapped corpus, validating their lengths as they are found but not their number.
+    """
+
+    for line_number, start, end in mapped_input.lines():
+        line = mapped_input.view[start:end]
+        validate_input_length(line_number, bytes(line) if mapped_input.is_ascii else bytes(line).decode('utf-8'))
+        yield line
+
+
+def dictionary_words(matcher: ScrambledWordMatcher, dictionary_path: Optional[str],
+                     index_path: Optional[str] = None) -> List[Optional[str]]:
+    """
+    Return the words of the matcher by word id.
+    """
 
     try:
-        matcher.import_dictionary(dictionary_path)
+        return matcher.words_by_id()
+    except ValueError:  # The compact engine only keeps ids
+        pass
+
+    if index_path is not None:  # Compiled indexes keep the words with their ids
+        snapshot, _ = read_index(index_path)
+        return ScrambledWordMatcher.from_snapshot(snapshot, matcher.logger).words_by_id()
+
+    assert dictionary_path is not None, 'Either a dictionary or a compiled index is required'
+    with open(dictionary_path, 'rb') as dictionary_file:  # Ids are the line numbers of the dictionary words
+        return [line.strip().decode('ascii') for line in dictionary_file]
+
+
+def print_frequencies(matcher: ScrambledWordMatcher, dictionary_path: Optional[str], index_path: Optional[str],
+                      input_path: str, executor: str, workers: Optional[int], top: Optional[int]) -> None:
+    """
+    Print how many lines of the input every dictionary word appears in, most frequent first.
+    """
+
+    with MappedInput(input_path) as mapped_input:
+        counts = matcher.count_corpus(corpus_lines(mapped_input), executor=executor, workers=workers)
+
+    with matcher.timed('output'):
+        words = dictionary_words(matcher, dictionary_path, index_path)
+        for word_id, lines in top_counts(counts, top):
+            print(f'{words[word_id]}: {lines}', flush=True)
+
+
+def main(dictionary_path: Optional[str], input_path: str,
+         engine: str = 'naive', executor: str = 'thread', workers: Optional[int] = None,
+         index_path: Optional[str] = None, max_dictionary_size: Optional[int] = None,
+         cache_size: int = 0, stats: bool = False, mode: str = 'cases', top: Optional[int] = None) -> None:
+    logger = init_logger('main')
+
+    try:
+        matcher = load_matcher(logger, dictionary_path, index_path, engine=engine,
+                               max_dictionary_size=max_dictionary_size, cache_size=cache_size, stats=stats)
+    except IndexFileError as exc:
+        logger.error('Compiled index loading failed:')
+        logger.error(str(exc))
+        sys.exit(1)
+    except OSError as exc:
+        failed_input = 'Compiled index' if index_path is not None and exc.filename == index_path else 'Dictionary'
+        logger.error(f'{failed_input} loading failed:')
+        logger.error(str(exc))
+        sys.exit(1)
     except DictionaryValidationError as exc:
         logger.error('Dictionary validation failed:')
         logger.error(str(exc))
         sys.exit(1)
 
     try:
-        result = matcher.scan_file(input_path)
+        with matcher:  # Shuts down the worker pool
+            if mode == 'frequency':
+                print_frequencies(matcher, dictionary_path, index_path, input_path, executor, workers, top)
+            else:
+                for case_number, matches in matcher.iter_scan_file(input_path, executor=executor, workers=workers):
+                    with matcher.timed('output'):
+                        print(f'Case #{case_number}: {matches}', flush=True)
     except InputValidationError as exc:
         logger.error('Input validation failed:')
         logger.error(str(exc))
         sys.exit(1)
 
-    for case_number, matches in enumerate(result, start=1):
-        print(f'Case #{case_number}: {matches}')
+    if matcher.result_cache is not None:
+        cache = matcher.result_cache
+        logger.info(f'Line cache: {cache.hits} hits, {cache.misses} misses, {cache.evictions} evictions')
+
+    if matcher.stats is not None:
+        if executor == 'process':
+            logger.info('Scan counters are not collected from worker processes')
+        for line in matcher.stats.report():
+            logger.info(line)
+
+
+def serve(dictionary_path: Optional[str], socket_path: Optional[str], host: str, port: int,
+          engine: str = 'naive', executor: str = 'thread', workers: Optional[int] = None,
+          index_path: Optional[str] = None, max_dictionary_size: Optional[int] = None,
+          cache_size: int = 0) -> None:
+    logger = init_logger('serve')
+
+    try:
+        server = MatcherServer(partial(load_matcher, logger, dictionary_path, index_path, engine=engine,
+                                       max_dictionary_size=max_dictionary_size, cache_size=cache_size),
+                               logger, executor=executor, workers=workers)
+    except (OSError, IndexFileError, DictionaryValidationError) as exc:
+        logger.error('Dictionary loading failed:')
+        logger.error(str(exc))
+        sys.exit(1)
+
+    try:
+        asyncio.run(server.serve(socket_path, host, port))
+    except KeyboardInterrupt:
+        logger.info('Server stopped')
+
+
+def client(input_path: str, socket_path: Optional[str], host: str, port: int, reload: bool = False) -> None:
+    logger = init_logger('client')
+
+    async def run() -> bool:
+        with open(input_path, 'rb') as input_file:
+            lines = [line.strip() for line in input_file]
+        if reload:
+            lines.insert(0, RELOAD_COMMAND)
+
+        succeeded = True
+        async for request_number, response in request_lines(lines, socket_path, host, port):
+            if response.startswith(ERROR_PREFIX):
+                logger.error(f'Request {request_number} failed: {response[len(ERROR_PREFIX):]}')
+                succeeded = False
+            elif reload and request_number == 1:
+                logger.info(f'Dictionary reloaded: {response}')
+            else:
+                print(f'Case #{request_number - reload}: {response}', flush=True)
+        return succeeded
+
+    try:
+        succeeded = asyncio.run(run())
+    except (OSError, ConnectionError) as exc:
+        logger.error(f'Server request failed: {exc}')
+        sys.exit(1)
+
+    if not succeeded:
+        sys.exit(1)
+
+
+def compile_index(dictionary_path: str, index_path: str, max_dictionary_size: int = MAX_DICTIONARY_SIZE) -> None:
+    logger = init_logger('compile')
+
+    matcher = ScrambledWordMatcher(logger)
+
+    try:
+        matcher.import_dictionary(dictionary_path, max_size=max_dictionary_size)
+        write_index(index_path, matcher.snapshot(), dictionary_checksum(dictionary_path))
+    except (DictionaryValidationError, IndexFileError) as exc:
+        logger.error('Dictionary compilation failed:')
+        logger.error(str(exc))
+        sys.exit(1)
+    except OSError as exc:
+        failed_step = 'Compiled index writing' if exc.filename == index_path else 'Dictionary loading'
+        logger.error(f'{failed_step} failed:')
+        logger.error(str(exc))
+        sys.exit(1)
+
+    logger.info(f'Compiled {matcher.word_count} words from {dictionary_path} into {index_path}')
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Scrambled String Matcher CLI')
-    parser.add_argument('--dictionary', type=str, required=True, help='Path to the dictionary file')
-    parser.add_argument('--input', type=str, required=True, help='Path to the input file')
+    parser.add_argument('--dictionary', type=str, help='Path to the dictionary file')
+    parser.add_argument('--index', type=str, help='Path to a compiled index file, used instead of the dictionary')
+    parser.add_argument('--input', type=str, help='Path to the input file')
+    parser.add_argument('--engine', type=str, choices=ENGINES, default='naive', help='Scan engine')
+    parser.add_argument('--executor', type=str, choices=EXECUTORS, default='thread', help='Worker pool used to scan lines')
+    parser.add_argument('--workers', type=int, default=None, help='Number of workers (default: executor default)')
+    parser.add_argument('--max-dictionary-size', type=int, default=None,
+                        help=f'Maximum number of dictionary words (default: {MAX_DICTIONARY_SIZE}, '
+                             f'or {LARGE_MAX_DICTIONARY_SIZE} with the compact engine)')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='Number of line results to cache for repeated lines (default: 0, disabled)')
+    parser.add_argument('--stats', action='store_true',
+                        help='Count the work done by scans, time each phase, and log a summary at the end')
+    parser.add_argument('--mode', type=str, choices=MODES, default='cases',
+                        help='Print the number of words matched by every line (cases, default), '
+                             'or the number of lines every word appears in (frequency)')
+    parser.add_argument('--top', type=int, default=None,
+                        help='With --mode frequency, only print the most frequent words (default: all)')
+
+    subparsers = parser.add_subparsers(dest='command')
+    compile_parser = subparsers.add_parser('compile', help='Compile a dictionary into an index file')
+    compile_parser.add_argument('--dictionary', type=str, required=True, help='Path to the dictionary file')
+    compile_parser.add_argument('--output', type=str, required=True, help='Path to the compiled index file')
+    compile_parser.add_argument('--max-dictionary-size', type=int, default=MAX_DICTIONARY_SIZE,
+                                help=f'Maximum number of dictionary words (default: {MAX_DICTIONARY_SIZE})')
+
+    serve_parser = subparsers.add_parser('serve', help='Load the dictionary once and serve scan requests on a socket')
+    serve_parser.add_argument('--dictionary', type=str, help='Path to the dictionary file')
+    serve_parser.add_argument('--index', type=str, help='Path to a compiled index file, used instead of the dictionary')
+    serve_parser.add_argument('--engine', type=str, choices=ENGINES, default='naive', help='Scan engine')
+    serve_parser.add_argument('--executor', type=str, choices=EXECUTORS, default='thread', help='Worker pool used to scan lines')
+    serve_parser.add_argument('--workers', type=int, default=None, help='Number of workers (default: executor default)')
+    serve_parser.add_argument('--max-dictionary-size', type=int, default=None,
+                              help=f'Maximum number of dictionary words (default: {MAX_DICTIONARY_SIZE}, '
+                                   f'or {LARGE_MAX_DICTIONARY_SIZE} with the compact engine)')
+    serve_parser.add_argument('--cache-size', type=int, default=0,
+                              help='Number of line results to cache for repeated lines (default: 0, disabled)')
+
+    client_parser = subparsers.add_parser('client', help='Scan an input file with a running server')
+    client_parser.add_argument('--input', type=str, required=True, help='Path to the input file')
+    client_parser.add_argument('--reload', action='store_true', help='Reload the dictionary of the server first')
+
+    for subparser in (serve_parser, client_parser):
+        subparser.add_argument('--socket', type=str, help='Path to the Unix socket, used instead of TCP')
+        subparser.add_argument('--host', type=str, default=DEFAULT_HOST, help=f'TCP host (default: {DEFAULT_HOST})')
+        subparser.add_argument('--port', type=int, default=None, help='TCP port')
 
     args = parser.parse_args()
 
-    main(args.dictionary, args.input)
+    if args.command == 'compile':
+        compile_index(args.dictionary, args.output, max_dictionary_size=args.max_dictionary_size)
+    elif args.command in ('serve', 'client'):
+        if args.socket is None and args.port is None:
+            parser.error('one of the arguments --socket --port is required')
+
+        if args.command == 'serve':
+            if args.dictionary is None and args.index is None:
+                parser.error('one of the arguments --dictionary --index is required')
+
+            serve(args.dictionary, args.socket, args.host, args.port or 0, engine=args.engine, executor=args.executor,
+                  workers=args.workers, index_path=args.index, max_dictionary_size=args.max_dictionary_size,
+                  cache_size=args.cache_size)
+        else:
+            client(args.input, args.socket, args.host, args.port or 0, reload=args.reload)
+    else:
+        if args.input is None:
+            parser.error('the following arguments are required: --input')
+        if args.dictionary is None and args.index is None:
+            parser.error('one of the arguments --dictionary --index is required')
+
+        main(args.dictionary, args.input, engine=args.engine, executor=args.executor, workers=args.workers,
+             index_path=args.index, max_dictionary_size=args.max_dictionary_size, cache_size=args.cache_size,
+             stats=args.stats, mode=args.mode, top=args.top)
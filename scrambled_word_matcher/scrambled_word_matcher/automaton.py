@@ -0,0 +1,209 @@
+"""
+Permuted pattern matching automaton.
+
+A text window matches a dictionary word when its first and last letters are the word's, and its inner letters
+are a permutation of the word's inner letters. The automaton reads a window from its first letter onwards:
+its root for a first letter stands for the empty multiset, and reading an inner letter moves to the node of
+the multiset with that letter added, as long as the multiset is contained in the inner letters of a word
+with that first letter. A window matches when the letter after the multiset read so far is the last letter
+of a word whose inner letters are exactly that multiset. A scan walks the automaton once from every position,
+and a walk ends as soon as its multiset is not contained in any word, so the cost of a scan depends on the text
+length and on how far walks go, not on the number of distinct word lengths.
+
+Nodes are compacted: all the orders in which the letters of a multiset can be read lead to the same node,
+so the automaton is a graph of multisets rather than a trie of permutations. Since a word has up to
+2 ** (length - 2) inner sub-multisets, nodes are built lazily, when a scan first reaches them, and the whole
+graph is dropped and rebuilt from the roots when it grows beyond max_nodes, so memory stays bounded.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from scrambled_word_matcher.constraints import ALPHABET_SIZE
+from scrambled_word_matcher.signatures import CharCountTable, WordIds
+
+MAX_AUTOMATON_NODES = 1 << 15  # Nodes kept before the automaton is reset, about 400 bytes each
+UNBUILT: Any = object()  # Transition that has not been computed yet
+
+LengthIndex = Dict[int, Dict[int, Dict[CharCountTable, WordIds]]]  # length -> endpoint code -> signature -> word ids
+
+
+class AutomatonNode:
+    """
+    A node of the automaton: the multiset of inner letters read after a first letter.
+
+    Properties:
+    - first_code: The first letter code of the walks reaching the node.
+    - counts: The letter counts of the multiset, one byte per letter code.
+    - candidates: The bitset of the patterns (with the node's first letter) whose inner letters contain the multiset.
+    - accepts: The ids of the words whose inner letters are exactly the multiset, by the code of their last letter,
+               None if there are none.
+    - children: The node reached by reading each letter code, None if no word contains the resulting multiset,
+                UNBUILT until computed.
+    """
+
+    __slots__ = ('first_code', 'counts', 'candidates', 'accepts', 'children')
+
+    def __init__(self, first_code: int, counts: bytes, candidates: int,
+                 accepts: Optional[Dict[int, WordIds]]) -> None:
+        self.first_code = first_code
+        self.counts = counts
+        self.candidates = candidates
+        self.accepts = accepts
+        self.children: List[Optional[AutomatonNode]] = [UNBUILT] * ALPHABET_SIZE
+
+
+class PatternGroup:
+    """
+    The patterns sharing a first letter, with the bitsets used to compute the transitions of their nodes.
+
+    A pattern is a (last letter, inner letters) pair of the dictionary; pattern i is bit i of the bitsets.
+
+    Properties:
+    - last_codes: The last letter code of every pattern.
+    - word_ids: The ids of the words of every pattern.
+    - at_least: For every letter code c and count k, the bitset of the patterns with at least k letters c
+                in their inner letters (index 0 holds every pattern), for counts up to the longest inner length.
+    - by_inner_length: For every inner length up to the longest, the bitset of the patterns with that many
+                       inner letters. Words added with add_word may be longer than MAX_DICTIONARY_LENGTH.
+    """
+
+    def __init__(self, patterns: List[Tuple[int, CharCountTable, WordIds]]) -> None:
+        self.last_codes = [last_code for last_code, _, _ in patterns]
+        self.word_ids = [word_ids for _, _, word_ids in patterns]
+        max_inner_length = max(sum(inner_counts) for _, inner_counts, _ in patterns)
+        self.at_least = [[0] * (max_inner_length + 1) for _ in range(ALPHABET_SIZE)]
+        self.by_inner_length = [0] * (max_inner_length + 1)
+
+        for pattern, (_, inner_counts, _) in enumerate(patterns):
+            bit = 1 << pattern
+            for code, letter_count in enumerate(inner_counts):
+                for at_least in range(letter_count + 1):
+                    self.at_least[code][at_least] |= bit
+            self.by_inner_length[sum(inner_counts)] |= bit
+
+    def accepts(self, candidates: int, inner_length: int) -> Optional[Dict[int, WordIds]]:
+        """
+        Return the words of the candidates with exactly inner_length inner letters, by last letter code.
+        """
+
+        exact = candidates & self.by_inner_length[inner_length]
+        if not exact:
+            return None
+
+        accepts = {}
+        while exact:
+            pattern = (exact & -exact).bit_length() - 1
+            accepts[self.last_codes[pattern]] = self.word_ids[pattern]
+            exact &= exact - 1
+        return accepts
+
+
+class PermutedPatternAutomaton:
+    """
+    A lazily built automaton matching the permutations of the inner letters of dictionary words,
+    anchored on their first and last letters.
+
+    Properties:
+    - groups: The PatternGroup of every first letter code, None for letters starting no word.
+    - roots: The root node of every first letter code, None for letters starting no word.
+    - max_word_length: The length of the longest word; walks never read more letters.
+    - max_nodes: The number of nodes beyond which the automaton is reset.
+    - nodes: The nodes built so far, by first letter code and letter counts, so that nodes are shared.
+    - resets: The number of times the automaton was reset.
+
+    >>> from scrambled_word_matcher.signatures import counting_sort_chars
+    >>> automaton = PermutedPatternAutomaton({5: {0 * 26 + 4: {counting_sort_chars('apple'): (0,)}}})
+    >>> root = automaton.roots[0]
+    >>> node = automaton.step(automaton.step(automaton.step(root, 11), 15), 15)  # 'a', then 'l', 'p', 'p'
+    >>> node.accepts
+    {4: (0,)}
+    >>> automaton.step(root, 25) is None  # No word starting with 'a' contains a 'z'
+    True
+    >>> automaton.step(automaton.step(root, 15), 11) is automaton.step(automaton.step(root, 11), 15)
+    True
+    """
+
+    def __init__(self, length_index: LengthIndex, max_nodes: int = MAX_AUTOMATON_NODES) -> None:
+        """
+        Build the pattern groups and the roots of the automaton.
+
+        :param length_index: The dictionary index by word length and endpoint code, see get_length_index.
+        :param max_nodes: The maximum number of nodes kept, at least ALPHABET_SIZE.
+        """
+
+        patterns: List[List[Tuple[int, CharCountTable, WordIds]]] = [[] for _ in range(ALPHABET_SIZE)]
+        for endpoints in length_index.values():
+            for key, signatures in endpoints.items():
+                first_code, last_code = divmod(key, ALPHABET_SIZE)
+                for signature, word_ids in signatures.items():
+                    inner_counts = list(signature)
+                    inner_counts[first_code] -= 1
+                    inner_counts[last_code] -= 1
+                    patterns[first_code].append((last_code, tuple(inner_counts), word_ids))
+
+        self.groups = [PatternGroup(group) if group else None for group in patterns]
+        self.max_word_length = max(length_index, default=0)
+        self.max_nodes = max(max_nodes, ALPHABET_SIZE)
+        self.resets = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drop every node but the roots. Scans walking the previous nodes can keep using them.
+        """
+
+        self.nodes: List[Dict[bytes, AutomatonNode]] = [{} for _ in range(ALPHABET_SIZE)]
+        self.node_count = 0
+        self.roots: List[Optional[AutomatonNode]] = [
+            self.build_node(first_code, bytes(ALPHABET_SIZE), (1 << len(group.last_codes)) - 1)
+            if group is not None else None
+            for first_code, group in enumerate(self.groups)
+        ]
+
+    def build_node(self, first_code: int, counts: bytes, candidates: int) -> AutomatonNode:
+        """
+        Return the node of a multiset, building it if needed.
+        """
+
+        nodes = self.nodes[first_code]
+        node = nodes.get(counts)
+        if node is None:
+            group = self.groups[first_code]
+            assert group is not None, 'No word starts with this letter'
+            accepts = group.accepts(candidates, sum(counts))
+            node = nodes.setdefault(counts, AutomatonNode(first_code, counts, candidates, accepts))
+            self.node_count += 1
+        return node
+
+    def step(self, node: AutomatonNode, code: int) -> Optional[AutomatonNode]:
+        """
+        Return the node reached from a node by reading an inner letter, computing the transition if needed.
+
+        :param node: The current node.
+        :param code: The code of the letter read.
+        :return: The next node, or None if no word contains the resulting multiset.
+        """
+
+        child = node.children[code]
+        if child is not UNBUILT:
+            return child
+
+        first_code = node.first_code
+        group = self.groups[first_code]
+        assert group is not None, 'No word starts with this letter'
+
+        letter_count = node.counts[code] + 1
+        at_least = group.at_least[code]
+        candidates = node.candidates & at_least[letter_count] if letter_count < len(at_least) else 0
+        if not candidates:
+            node.children[code] = None
+            return None
+
+        if self.node_count >= self.max_nodes:
+            self.resets += 1
+            self.reset()
+
+        counts = node.counts[:code] + bytes((letter_count,)) + node.counts[code + 1:]
+        next_node = self.build_node(first_code, counts, candidates)
+        node.children[code] = next_node
+        return next_node
@@ -0,0 +1,307 @@
+"""
+Compact dictionary index for large dictionaries.
+
+Words are grouped into buckets by (first letter, last letter, length). Within a bucket every word is stored
+as the fixed-width record of its sorted inner letters (length - 2 bytes, or a single zero byte for two-letter
+words), and records are kept sorted in a single bytearray, so the record of a word costs its inner length in bytes
+plus the amortized bucket overhead.
+The multiplicity of a signature is the number of equal records, found with two binary searches.
+The ids of the words are kept in a parallel array per bucket, aligned with the sorted records, and so are
+their spellings, the inner letters in word order, so that a word can be told apart from its anagrams on removal.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from scrambled_word_matcher.constraints import ALPHABET_SIZE
+
+MAX_BUCKET_LENGTH = 1 << 8  # Word lengths are packed into the low byte of bucket keys
+EMPTY_RECORD = b'\x00'  # Record of the (empty) inner letters of two-letter words
+WORD_ID_TYPECODE = 'I'  # Word ids are stored as unsigned ints
+
+
+def record_width(word_length: int) -> int:
+    """
+    Return the width of the records of a bucket of words of the given length.
+
+    >>> record_width(5), record_width(2)
+    (3, 1)
+    """
+
+    return max(word_length - 2, 1)
+
+
+def bucket_key(first_code: int, last_code: int, word_length: int) -> int:
+    """
+    Pack the letter codes of the endpoints and the word length into a bucket key.
+
+    >>> bucket_key(0, 25, 5)
+    6405
+    """
+
+    return (first_code * ALPHABET_SIZE + last_code) * MAX_BUCKET_LENGTH + word_length
+
+
+class CompactIndex:
+    """
+    A dictionary index storing sorted, fixed-width packed signatures per (first, last, length) bucket.
+
+    Words can be added at any time: they are appended to their bucket, which is sorted again lazily
+    on the next lookup. Matchers do not mutate a published index: they derive a new one with updated,
+    which shares the buckets it does not change.
+
+    >>> index = CompactIndex()
+    >>> for word_id, word in enumerate(('axpaj', 'apxaj', 'abd')):
+    ...     index.add(word, word_id)
+    >>> index.lookup(0, 9, 5, b'apx')
+    2
+    >>> index.find(0, 9, 5, b'apx').tolist()
+    [0, 1]
+    >>> index.lookup(0, 3, 3, b'c')
+    0
+    >>> index.add('ab', 3)
+    >>> index.lookup(0, 1, 2, b'')
+    1
+    >>> index.word_count, sorted(index.word_lengths)
+    (4, [2, 3, 5])
+    """
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, bytearray] = {}
+        self.word_ids: Dict[int, array] = {}
+        self.spellings: Dict[int, bytearray] = {}
+        self.unsorted: Set[int] = set()
+        self.word_lengths: Set[int] = set()
+        self.word_count = 0
+
+    def add(self, word: str, word_id: int) -> None:
+        """
+        Add a word to the index. The word is assumed to be validated.
+
+        :param word: The word to add, between 2 and MAX_BUCKET_LENGTH - 1 lowercase letters long.
+        :param word_id: The id of the word, see ScrambledWordMatcher.add_word.
+        """
+
+        a_ord = ord('a')
+        key = bucket_key(ord(word[0]) - a_ord, ord(word[-1]) - a_ord, len(word))
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = bytearray()
+            self.word_ids[key] = array(WORD_ID_TYPECODE)
+            self.spellings[key] = bytearray()
+
+        bucket += ''.join(sorted(word[1:-1])).encode('ascii') or EMPTY_RECORD
+        self.word_ids[key].append(word_id)
+        self.spellings[key] += word[1:-1].encode('ascii') or EMPTY_RECORD
+        self.unsorted.add(key)
+        self.word_lengths.add(len(word))
+        self.word_count += 1
+
+    def sort_buckets(self) -> None:
+        """
+        Sort the records of the buckets that received words since the last sort, together with their word ids
+        and spellings.
+        """
+
+        for key in self.unsorted:
+            width = record_width(key % MAX_BUCKET_LENGTH)
+            bucket, spellings = self.buckets[key], self.spellings[key]
+            offsets = range(0, len(bucket), width)
+            records = sorted(zip((bytes(bucket[offset:offset + width]) for offset in offsets), self.word_ids[key],
+                                 (bytes(spellings[offset:offset + width]) for offset in offsets)))
+            self.buckets[key] = bytearray(b''.join(record for record, _, _ in records))
+            self.word_ids[key] = array(WORD_ID_TYPECODE, (word_id for _, word_id, _ in records))
+            self.spellings[key] = bytearray(b''.join(spelling for _, _, spelling in records))
+
+        self.unsorted.clear()
+
+    def lookup(self, first_code: int, last_code: int, word_length: int, inner: bytes) -> int:
+        """
+        Count the words with the given endpoints and sorted inner letters.
+
+        :param first_code: The alphabet code of the first letter.
+        :param last_code: The alphabet code of the last letter.
+        :param word_length: The length of the word.
+        :param inner: The sorted inner letters of the word, as ASCII bytes.
+        :return: The number of dictionary words with this signature.
+        """
+
+        return len(self.find(first_code, last_code, word_length, inner))
+
+    def find(self, first_code: int, last_code: int, word_length: int, inner: bytes) -> array:
+        """
+        Find the ids of the words with the given endpoints and sorted inner letters.
+
+        :param first_code: The alphabet code of the first letter.
+        :param last_code: The alphabet code of the last letter.
+        :param word_length: The length of the word.
+        :param inner: The sorted inner letters of the word, as ASCII bytes.
+        :return: The ids of the dictionary words with this signature, in ascending order; empty if there are none.
+        """
+
+        if self.unsorted:
+            self.sort_buckets()
+
+        key = bucket_key(first_code, last_code, word_length)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return array(WORD_ID_TYPECODE)
+
+        record = inner or EMPTY_RECORD
+        width = record_width(word_length)
+        records = len(bucket) // width
+        lower = self.bisect(bucket, width, record, 0, records, right=False)
+        upper = self.bisect(bucket, width, record, lower, records, right=True)
+        return self.word_ids[key][lower:upper]
+
+    @staticmethod
+    def bisect(bucket: bytearray, width: int, record: bytes, lower: int, upper: int, right: bool) -> int:
+        """
+        Binary search for a record among the fixed-width sorted records of a bucket.
+
+        :return: The index of the first record greater than (right=True) or not less than (right=False) record.
+        """
+
+        while lower < upper:
+            middle = (lower + upper) // 2
+            current = bucket[middle * width:(middle + 1) * width]
+            if current < record or (right and current == record):
+                lower = middle + 1
+            else:
+                upper = middle
+        return lower
+
+    def copy(self) -> 'CompactIndex':
+        """
+        Return a copy of the index that does not share buckets with it.
+        """
+
+        copy = CompactIndex()
+        copy.buckets = {key: bytearray(bucket) for key, bucket in self.buckets.items()}
+        copy.word_ids = {key: word_ids[:] for key, word_ids in self.word_ids.items()}
+        copy.spellings = {key: bytearray(spellings) for key, spellings in self.spellings.items()}
+        copy.unsorted = set(self.unsorted)
+        copy.word_lengths = set(self.word_lengths)
+        copy.word_count = self.word_count
+        return copy
+
+    def updated(self, add: Iterable[Tuple[str, int]] = (), remove: Iterable[str] = ()) -> 'CompactIndex':
+        """
+        Return a sorted copy of the index with words removed, then added, without modifying this index.
+
+        Only the buckets receiving or losing words are copied; the others are shared with this index.
+        Words are removed by spelling, so removing a word does not remove its anagrams with the same endpoints.
+        If the same word was added several times, removing it removes the copy with the lowest id, like matchers do.
+
+        :param add: The (word, word id) pairs to add, see add. Consumed lazily.
+        :param remove: The words to remove.
+        :return: The updated index.
+        :raises ValueError: If a word to remove is not in the index.
+
+        >>> index = CompactIndex()
+        >>> updated = index.updated(add=[('axpaj', 0), ('apxaj', 1), ('abd', 2)])
+        >>> updated.updated(remove=['abd']).word_count, updated.word_count, index.word_count
+        (2, 3, 0)
+        >>> updated.updated(remove=['apxaj']).find(0, 9, 5, b'apx').tolist()
+        [0]
+        >>> updated.updated(remove=['apxaj']).updated(remove=['apxaj'])
+        Traceback (most recent call last):
+        ...
+        ValueError: Word not in dictionary: apxaj
+        """
+
+        if self.unsorted:
+            self.sort_buckets()
+
+        updated = CompactIndex()
+        updated.buckets = dict(self.buckets)
+        updated.word_ids = dict(self.word_ids)
+        updated.spellings = dict(self.spellings)
+        updated.word_count = self.word_count
+        copied: Set[int] = set()
+
+        def copy_bucket(key: int) -> None:
+            if key not in copied and key in updated.buckets:
+                updated.buckets[key] = bytearray(updated.buckets[key])
+                updated.word_ids[key] = updated.word_ids[key][:]
+                updated.spellings[key] = bytearray(updated.spellings[key])
+            copied.add(key)
+
+        a_ord = ord('a')
+        for word in remove:
+            first_code, last_code = ord(word[0]) - a_ord, ord(word[-1]) - a_ord
+            key = bucket_key(first_code, last_code, len(word))
+            position = updated.position(key, word)
+            if position is None:
+                raise ValueError(f'Word not in dictionary: {word}')
+
+            copy_bucket(key)
+            width = record_width(len(word))
+            del updated.buckets[key][position * width:(position + 1) * width]
+            del updated.word_ids[key][position]
+            del updated.spellings[key][position * width:(position + 1) * width]
+            updated.word_count -= 1
+
+            if not updated.buckets[key]:
+                del updated.buckets[key], updated.word_ids[key], updated.spellings[key]
+
+        for word, word_id in add:
+            copy_bucket(bucket_key(ord(word[0]) - a_ord, ord(word[-1]) - a_ord, len(word)))
+            updated.add(word, word_id)
+
+        updated.sort_buckets()
+        updated.word_lengths = {key % MAX_BUCKET_LENGTH for key in updated.buckets}
+        return updated
+
+    def position(self, key: int, word: str) -> Optional[int]:
+        """
+        Find a word in its bucket by spelling. The buckets are assumed to be sorted.
+
+        :param key: The bucket key of the word.
+        :param word: The word to find.
+        :return: The position of the record of the word in its bucket, of the copy with the lowest id
+                 if the word was added several times; None if the word is not in the index.
+        """
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return None
+
+        width = record_width(len(word))
+        record = ''.join(sorted(word[1:-1])).encode('ascii') or EMPTY_RECORD
+        spelling = word[1:-1].encode('ascii') or EMPTY_RECORD
+        records = len(bucket) // width
+        lower = self.bisect(bucket, width, record, 0, records, right=False)
+        upper = self.bisect(bucket, width, record, lower, records, right=True)
+        spellings = self.spellings[key]
+        for position in range(lower, upper):  # Ids ascend within equal records
+            if spellings[position * width:(position + 1) * width] == spelling:
+                return position
+        return None
+
+    def memory_bytes(self) -> int:
+        """
+        Return the number of bytes used by the packed records, word ids and spellings of all buckets.
+        """
+
+        return (sum(len(bucket) for bucket in self.buckets.values())
+                + sum(len(word_ids) * word_ids.itemsize for word_ids in self.word_ids.values())
+                + sum(len(spellings) for spellings in self.spellings.values()))
+
+    def endpoint_masks(self) -> List[List[Tuple[int, int]]]:
+        """
+        Return the bitmasks of the last letter codes per word length and first letter code, see EndpointIndex.
+
+        :return: A list of ALPHABET_SIZE lists of (word length, last letter bitmask) pairs sorted by length.
+        """
+
+        masks: Dict[int, List[int]] = {}
+        for key in self.buckets:
+            endpoints, word_length = divmod(key, MAX_BUCKET_LENGTH)
+            first_code, last_code = divmod(endpoints, ALPHABET_SIZE)
+            masks.setdefault(word_length, [0] * ALPHABET_SIZE)[first_code] |= 1 << last_code
+
+        return [[(word_length, masks[word_length][first_code])
+                 for word_length in sorted(masks) if masks[word_length][first_code]]
+                for first_code in range(ALPHABET_SIZE)]
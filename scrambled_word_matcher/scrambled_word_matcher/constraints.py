@@ -1,8 +1,12 @@
+import re
+
 from functools import cache
+from typing import Optional, Sequence, Union
 
 ALPHABET_SIZE = 26
 
 MAX_DICTIONARY_SIZE = 100
+LARGE_MAX_DICTIONARY_SIZE = 10_000_000  # Default limit of the compact engine, meant for large dictionaries
 MIN_DICTIONARY_LENGTH = 2
 MAX_DICTIONARY_LENGTH = 20
 
@@ -12,11 +16,21 @@ MAX_INPUT_LENGTH = 500
 
 
 class DictionaryValidationError(ValueError):
-    ...
+    def __init__(self, message: str, errors: Sequence[str] = ()) -> None:
+        super().__init__(message)
+        self.errors = list(errors) or [message]  # Every problem found, when the whole dictionary was checked
 
 
 class InputValidationError(ValueError):
-    ...
+    def __init__(self, message: str, position: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.position = position  # Offset of the first offending symbol, when known
+
+
+Text = Union[str, bytes, bytearray, memoryview]  # Input text, as a string or as ASCII bytes
+
+INVALID_SYMBOL = re.compile(r'[^a-z]')
+INVALID_BYTE = re.compile(rb'[^a-z]')
 
 
 @cache
@@ -58,6 +72,55 @@ def validate_char(char: str) -> None:
         raise InputValidationError('Unexpected symbol: %s' % char)
 
 
+def validate_text(text: Text) -> None:
+    """
+    Validate that the given text only contains lowercase letters from the English alphabet, in one bulk pass.
+
+    Raises the same error as validate_char would for the first offending symbol, and records
+    its offset (in characters for strings, in bytes otherwise) in the error's position.
+    Bytes are decoded as UTF-8 to report the offending symbol.
+
+    :param text: The text to validate, as a string or as bytes.
+    :raises InputValidationError: If text contains a symbol that is not a lowercase English letter.
+
+    >>> validate_text('hello')
+
+    >>> validate_text(b'hello')
+
+    >>> validate_text(memoryview(b'hel-lo'))
+    Traceback (most recent call last):
+       ...
+    scrambled_word_matcher.constraints.InputValidationError: Unexpected symbol: -
+
+    >>> validate_text('helLo')
+    Traceback (most recent call last):
+       ...
+    scrambled_word_matcher.constraints.InputValidationError: Unexpected symbol: L
+
+    >>> validate_text('héllo'.encode('utf-8'))
+    Traceback (most recent call last):
+       ...
+    scrambled_word_matcher.constraints.InputValidationError: Unexpected symbol: é
+
+    >>> try:
+    ...     validate_text('hel!o')
+    ... except InputValidationError as exc:
+    ...     exc.position
+    3
+    """
+
+    if isinstance(text, str):
+        match = INVALID_SYMBOL.search(text)
+        if match is not None:
+            raise InputValidationError('Unexpected symbol: %s' % match.group(), position=match.start())
+        return
+
+    byte_match = INVALID_BYTE.search(text)
+    if byte_match is not None:
+        decoded = bytes(text[byte_match.start():]).decode('utf-8', errors='replace')
+        raise InputValidationError('Unexpected symbol: %s' % decoded[0], position=byte_match.start())
+
+
 def validate_dictionary_word(word: str) -> None:
     """
     Validate a single word for dictionary constraints.
@@ -84,7 +147,7 @@ def validate_dictionary_word(word: str) -> None:
         raise DictionaryValidationError(f"Word '{word}' does not meet length requirements ({MIN_DICTIONARY_LENGTH}-{MAX_DICTIONARY_LENGTH})")
 
 
-def validate_input_string(line_number: int, input_string: str) -> None:
+def validate_input_string(line_number: int, input_string: Union[str, bytes]) -> None:
     """
     Validate an input string based on the line number and length constraints.
 
@@ -114,16 +177,59 @@ def validate_input_string(line_number: int, input_string: str) -> None:
     scrambled_word_matcher.constraints.InputValidationError: Line 5 does not meet length requirements (2-500)
     """
 
+    validate_input_line(line_number, len(input_string.strip()))
+
+
+def validate_input_line(line_number: int, length: int) -> None:
+    """
+    Validate the line number and the length of an input line whose whitespace is already stripped.
+
+    :param line_number: The line number in the input file.
+    :param length: The length of the line in characters, without surrounding whitespace.
+    :raises InputValidationError: If the line number exceeds the input size limit or
+                                  if the length does not meet length requirements.
+
+    >>> validate_input_line(100, 500)
+
+    >>> validate_input_line(3, 1)
+    Traceback (most recent call last):
+    ...
+    scrambled_word_matcher.constraints.InputValidationError: Line 3 does not meet length requirements (2-500)
+    """
+
     if not (1 <= line_number <= MAX_INPUT_SIZE):
         raise InputValidationError(f"Input file exceeds {MAX_INPUT_SIZE} lines limit")
 
+    if not (MIN_INPUT_LENGTH <= length <= MAX_INPUT_LENGTH):
+        raise InputValidationError(f"Line {line_number} does not meet length requirements ({MIN_INPUT_LENGTH}-{MAX_INPUT_LENGTH})")
+
+
+def validate_input_length(line_number: int, input_string: Union[str, bytes]) -> None:
+    """
+    Validate the length of an input string (after stripping whitespace), without limiting the number of lines.
+
+    :param line_number: The line number of the input string, reported in the error message.
+    :param input_string: The input string to validate.
+    :raises InputValidationError: If the input string does not meet length requirements.
+
+    >>> validate_input_length(1000, "Example input")
+
+    >>> validate_input_length(1000, b"a")
+    Traceback (most recent call last):
+    ...
+    scrambled_word_matcher.constraints.InputValidationError: Line 1000 does not meet length requirements (2-500)
+    """
+
     if not (MIN_INPUT_LENGTH <= len(input_string.strip()) <= MAX_INPUT_LENGTH):
         raise InputValidationError(f"Line {line_number} does not meet length requirements ({MIN_INPUT_LENGTH}-{MAX_INPUT_LENGTH})")
 
 
-def validate_dictionary(dictionary_path: str) -> None:
+def validate_dictionary(dictionary_path: str, max_size: int = MAX_DICTIONARY_SIZE) -> None:
     """
     Validate the contents of a dictionary file.
+
+    :param dictionary_path: The file system path to the dictionary file.
+    :param max_size: The maximum number of words in the dictionary.
     """
 
     with open(dictionary_path, 'r', encoding='utf-8') as dictionary_file:
@@ -137,8 +243,8 @@ def validate_dictionary(dictionary_path: str) -> None:
             validate_dictionary_word(word)
             dictionary_words.add(word)
 
-        if len(dictionary_words) > MAX_DICTIONARY_SIZE:
-            raise ValueError("Dictionary exceeds 100 words limit")
+        if len(dictionary_words) > max_size:
+            raise ValueError(f"Dictionary exceeds {max_size} words limit")
 
 
 def validate_input_file(input_path: str) -> None:
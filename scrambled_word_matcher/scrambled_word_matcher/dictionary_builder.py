@@ -0,0 +1,207 @@
+"""
+One-pass dictionary loading.
+
+A DictionaryBuilder reads a dictionary file once, validating every word as it is read (length, letters,
+duplicates, dictionary size) and collecting every problem instead of stopping at the first one.
+Once the whole file is valid, the character count signatures of all words are computed in one batch and
+the index is assembled in plain dictionaries, so that the matcher can publish it in a single step.
+"""
+
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from scrambled_word_matcher.constraints import DictionaryValidationError
+from scrambled_word_matcher.constraints import INVALID_BYTE
+from scrambled_word_matcher.constraints import MIN_DICTIONARY_LENGTH, MAX_DICTIONARY_LENGTH, MAX_DICTIONARY_SIZE
+from scrambled_word_matcher.signatures import CharCountTable, WordIds
+from scrambled_word_matcher.signatures import word_signatures
+from scrambled_word_matcher.compact_index import CompactIndex
+
+MAX_REPORTED_ERRORS = 20  # Errors kept and reported, the others are only counted
+READ_CHUNK_SIZE = 1 << 20  # Bytes of lines read from the dictionary file at once
+
+GroupKey = Tuple[str, str]  # first letter, last letter
+
+
+class DictionaryBuilder:
+    """
+    Validates the words of a dictionary in one pass and builds its index in batch.
+
+    Properties:
+    - max_size: The maximum number of words in the dictionary.
+    - words: The valid words read so far, as ASCII bytes, in the order of the lines.
+    - errors: The first MAX_REPORTED_ERRORS problems found so far, one message per invalid line.
+    - error_count: The number of problems found so far.
+
+    >>> builder = DictionaryBuilder(max_size=3)
+    >>> builder.add_lines([b'spam\\n', b'eggs\\n', b'ham\\n'])
+    >>> builder.check()
+    >>> index, word_ids, words = builder.build_index()
+    >>> [(key, list(signatures.values())) for key, signatures in words.items()]
+    [(('s', 'm'), [('spam',)]), (('e', 's'), [('eggs',)]), (('h', 'm'), [('ham',)])]
+    >>> [list(signatures.values()) for signatures in word_ids.values()]
+    [[(0,)], [(1,)], [(2,)]]
+
+    >>> builder = DictionaryBuilder()
+    >>> builder.add_lines([b'spam', b'Eggs', b'x', b'spam'])
+    >>> builder.check()
+    Traceback (most recent call last):
+    ...
+    scrambled_word_matcher.constraints.DictionaryValidationError: Line 2: Unexpected symbol: E in word 'Eggs' (and 2 more errors)
+    >>> builder.errors[1:]
+    ["Line 3: Word 'x' does not meet length requirements (2-20)", 'Line 4: Duplicate word found in dictionary: spam']
+    """
+
+    def __init__(self, max_size: int = MAX_DICTIONARY_SIZE) -> None:
+        self.max_size = max_size
+        self.words: List[bytes] = []
+        self.errors: List[str] = []
+        self.error_count = 0
+        self.unique_words: Set[bytes] = set()
+        self.line_count = 0
+
+    def read(self, dictionary_path: str) -> None:
+        """
+        Read and validate a dictionary file, one word per line, in chunks of lines.
+
+        :param dictionary_path: The file system path to the dictionary file.
+        :raises OSError: If the file cannot be read.
+        """
+
+        with open(dictionary_path, 'rb') as dictionary_file:
+            while self.line_count <= self.max_size:
+                lines = dictionary_file.readlines(READ_CHUNK_SIZE)
+                if not lines:
+                    break
+                self.add_lines(lines)
+
+    def add_lines(self, lines: List[bytes]) -> None:
+        """
+        Validate a batch of dictionary lines and keep their words.
+
+        The batch is checked with a few bulk operations; lines are only inspected one by one
+        when the batch contains a problem. Lines beyond max_size are not read.
+
+        :param lines: The lines, as bytes, with or without their line endings.
+        """
+
+        if self.line_count > self.max_size:
+            return
+
+        first_line_number = self.line_count + 1
+        words = [line.strip() for line in lines[:self.max_size + 1 - self.line_count]]
+        self.line_count += len(words)
+
+        batch = set(words)
+        if (len(batch) == len(words) and self.unique_words.isdisjoint(batch)
+                and all(MIN_DICTIONARY_LENGTH <= len(word) <= MAX_DICTIONARY_LENGTH for word in words)
+                and INVALID_BYTE.search(b''.join(words)) is None):
+            self.unique_words |= batch
+            self.words += words
+        else:
+            for line_number, word in enumerate(words, start=first_line_number):
+                self.add_word(line_number, word)
+
+        if self.line_count > self.max_size:
+            self.add_error(f'Dictionary exceeds {self.max_size} words limit')
+
+    def add_word(self, line_number: int, word: bytes) -> None:
+        """
+        Validate a single word and keep it, or record why it is invalid.
+        """
+
+        error = None
+        invalid_byte = INVALID_BYTE.search(word)
+        if invalid_byte is not None:
+            symbol = word[invalid_byte.start():].decode('utf-8', errors='replace')[0]
+            error = f"Unexpected symbol: {symbol} in word '{word.decode('utf-8', errors='replace')}'"
+        elif not MIN_DICTIONARY_LENGTH <= len(word) <= MAX_DICTIONARY_LENGTH:
+            error = (f"Word '{word.decode('ascii')}' does not meet length requirements "
+                     f"({MIN_DICTIONARY_LENGTH}-{MAX_DICTIONARY_LENGTH})")
+        elif word in self.unique_words:
+            error = f"Duplicate word found in dictionary: {word.decode('ascii')}"
+
+        if error is not None:
+            self.add_error(f'Line {line_number}: {error}')
+        else:
+            self.unique_words.add(word)
+            self.words.append(word)
+
+    def add_error(self, error: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+
+    def check(self) -> None:
+        """
+        Raise the problems found in the dictionary, if any.
+
+        :raises DictionaryValidationError: With the first problem in its message, and all of them in its errors.
+        """
+
+        if not self.error_count:
+            return
+
+        message = self.errors[0]
+        if self.error_count > 1:
+            message += f' (and {self.error_count - 1} more errors)'
+        raise DictionaryValidationError(message, errors=self.errors)
+
+    def build_index(self, first_word_id: int = 0, signature_table: Optional[Dict[CharCountTable, CharCountTable]] = None
+                    ) -> Tuple[Dict[GroupKey, Dict[CharCountTable, int]],
+                               Dict[GroupKey, Dict[CharCountTable, WordIds]],
+                               Dict[GroupKey, Dict[CharCountTable, Tuple[str, ...]]]]:
+        """
+        Build the index of the words, see IndexSnapshot: the signatures of all words are computed in one batch.
+
+        :param first_word_id: The id of the first word; words are numbered in the order of the lines.
+        :param signature_table: Signatures already held by other indexes, by value: the index keeps these
+                                instances instead of equal copies, and new signatures are added to the table.
+        :return: A tuple of the occurrence counts, the word ids and the words, by endpoints and signature.
+        """
+
+        index: Dict[GroupKey, Dict[CharCountTable, int]] = {}
+        word_ids: Dict[GroupKey, Dict[CharCountTable, WordIds]] = {}
+        words: Dict[GroupKey, Dict[CharCountTable, Tuple[str, ...]]] = {}
+
+        signatures = word_signatures(self.words)
+        if signature_table is not None:
+            signatures = [signature_table.setdefault(signature, signature) for signature in signatures]
+        for word_id, (word, signature) in enumerate(zip(self.words, signatures), start=first_word_id):
+            key = (chr(word[0]), chr(word[-1]))
+            group = index.get(key)
+            if group is None:
+                group = index[key] = {}
+                word_ids[key], words[key] = {}, {}
+
+            multiplicity = group.get(signature)
+            if multiplicity is None:
+                group[signature] = 1
+                word_ids[key][signature] = (word_id,)
+                words[key][signature] = (word.decode('ascii'),)
+            else:  # Anagrams with the same endpoints
+                group[signature] = multiplicity + 1
+                word_ids[key][signature] += (word_id,)
+                words[key][signature] += (word.decode('ascii'),)
+
+        return index, word_ids, words
+
+    def build_compact_index(self, first_word_id: int = 0) -> CompactIndex:
+        """
+        Build a sorted CompactIndex of the words.
+
+        :param first_word_id: The id of the first word; words are numbered in the order of the lines.
+        :return: The compact index.
+        """
+
+        compact_index = CompactIndex()
+        for word_id, word in enumerate(self.words, start=first_word_id):
+            compact_index.add(word.decode('ascii'), word_id)
+        compact_index.sort_buckets()
+        return compact_index
+
+    def word_lengths(self) -> FrozenSet[int]:
+        """
+        Return the distinct lengths of the words.
+        """
+
+        return frozenset(map(len, self.words))
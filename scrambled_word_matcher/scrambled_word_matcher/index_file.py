@@ -0,0 +1,169 @@
+"""
+Compiled dictionary index files.
+
+A compiled index stores everything a matcher needs to scan, so that it can be loaded
+without validating, reading and indexing the dictionary again. All integers are little-endian.
+
+Header:
+- magic (4 bytes), format version (uint16),
+- SHA-256 checksum of the dictionary file (32 bytes),
+- word count (uint32), number of word lengths (uint16), number of entries (uint32).
+
+Followed by the word lengths (one uint8 each) and the entries, one per distinct (endpoints, signature) pair:
+- first letter code (uint8), last letter code (uint8), multiplicity (uint32),
+- signature: ALPHABET_SIZE character counts (one uint8 each).
+
+Followed by the word ids (uint32 each) of all entries, in the order of the entries: as many ids per entry
+as its multiplicity, word count ids in total.
+
+Followed by the words themselves, in the same order as their ids: length (uint8) and ASCII letters of each word.
+They are only needed to remove words from a loaded index.
+"""
+
+import hashlib
+import mmap
+import struct
+
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from scrambled_word_matcher.constraints import ALPHABET_SIZE
+from scrambled_word_matcher.signatures import CharCountTable, WordIds
+from scrambled_word_matcher.matcher import IndexSnapshot
+
+INDEX_MAGIC = b'SWMI'
+INDEX_VERSION = 3
+
+HEADER_FORMAT = struct.Struct('<4sH32sIHI')
+LENGTH_FORMAT = struct.Struct('<B')
+ENTRY_FORMAT = struct.Struct(f'<BBI{ALPHABET_SIZE}B')
+WORD_ID_FORMAT = struct.Struct('<I')
+WORD_LENGTH_FORMAT = struct.Struct('<B')
+
+
+class IndexFileError(ValueError):
+    ...
+
+
+def dictionary_checksum(dictionary_path: str) -> bytes:
+    """
+    Compute the SHA-256 checksum of a dictionary file.
+
+    :param dictionary_path: The file system path to the dictionary file.
+    :return: The 32 bytes of the checksum.
+    """
+
+    digest = hashlib.sha256()
+    with open(dictionary_path, 'rb') as dictionary_file:
+        for block in iter(lambda: dictionary_file.read(1 << 16), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def write_index(index_path: str, snapshot: IndexSnapshot, checksum: bytes) -> None:
+    """
+    Write an index snapshot to a compiled index file.
+
+    :param index_path: The file system path of the compiled index file.
+    :param snapshot: The index snapshot to write.
+    :param checksum: The checksum of the dictionary the snapshot was built from, see dictionary_checksum.
+    :raises IndexFileError: If a word length or a character count does not fit the format,
+                            or if the snapshot is of a compact index.
+    """
+
+    if snapshot.compact_index is not None:
+        raise IndexFileError('Compact indexes cannot be compiled')
+
+    a_ord = ord('a')
+    entries = [(ord(first) - a_ord, ord(last) - a_ord, signature, snapshot.word_ids[(first, last)][signature])
+               for (first, last), signatures in sorted(snapshot.index.items())
+               for signature in sorted(signatures)]
+    words = [word
+             for (first, last), signatures in sorted(snapshot.index.items())
+             for signature in sorted(signatures)
+             for word in snapshot.words[(first, last)][signature]]
+    lengths = sorted(snapshot.word_lengths)
+
+    try:
+        with open(index_path, 'wb') as index_file:
+            index_file.write(HEADER_FORMAT.pack(INDEX_MAGIC, INDEX_VERSION, checksum,
+                                                snapshot.word_count, len(lengths), len(entries)))
+            for word_length in lengths:
+                index_file.write(LENGTH_FORMAT.pack(word_length))
+            for first_code, last_code, signature, word_ids in entries:
+                index_file.write(ENTRY_FORMAT.pack(first_code, last_code, len(word_ids), *signature))
+            for _, _, _, word_ids in entries:
+                index_file.write(struct.pack(f'<{len(word_ids)}I', *word_ids))
+            for word in words:
+                index_file.write(WORD_LENGTH_FORMAT.pack(len(word)) + word.encode('ascii'))
+    except struct.error as exc:
+        raise IndexFileError(f'Dictionary does not fit the index format: {exc}') from exc
+
+
+def read_index(index_path: str) -> Tuple[IndexSnapshot, bytes]:
+    """
+    Read a compiled index file by memory-mapping it.
+
+    :param index_path: The file system path of the compiled index file.
+    :return: A tuple of the index snapshot and the checksum of the dictionary it was built from.
+    :raises IndexFileError: If the file is not a compiled index or is truncated.
+    """
+
+    with open(index_path, 'rb') as index_file:
+        try:
+            buffer = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:  # Empty file
+            raise IndexFileError(f'Not a compiled index file: {index_path}') from exc
+
+    with buffer:
+        if len(buffer) < HEADER_FORMAT.size:
+            raise IndexFileError(f'Not a compiled index file: {index_path}')
+
+        magic, version, checksum, word_count, length_count, entry_count = HEADER_FORMAT.unpack_from(buffer)
+        if magic != INDEX_MAGIC:
+            raise IndexFileError(f'Not a compiled index file: {index_path}')
+        if version != INDEX_VERSION:
+            raise IndexFileError(f'Unsupported index format version {version}, expected {INDEX_VERSION}')
+
+        lengths_offset = HEADER_FORMAT.size
+        entries_offset = lengths_offset + length_count * LENGTH_FORMAT.size
+        word_ids_offset = entries_offset + entry_count * ENTRY_FORMAT.size
+        words_offset = word_ids_offset + word_count * WORD_ID_FORMAT.size
+        if len(buffer) < words_offset:
+            raise IndexFileError(f'Compiled index file is truncated or corrupted: {index_path}')
+
+        view = memoryview(buffer)
+        try:
+            word_lengths = frozenset(view[lengths_offset:entries_offset])
+
+            all_word_ids = struct.unpack_from(f'<{word_count}I', view, word_ids_offset)
+
+            all_words = []
+            offset = words_offset
+            for _ in range(word_count):
+                end = offset + WORD_LENGTH_FORMAT.size + view[offset]
+                all_words.append(bytes(view[offset + WORD_LENGTH_FORMAT.size:end]).decode('ascii'))
+                offset = end
+
+            index: Dict[Tuple[str, str], Dict[CharCountTable, int]] = defaultdict(dict)
+            word_ids: Dict[Tuple[str, str], Dict[CharCountTable, WordIds]] = defaultdict(dict)
+            words: Dict[Tuple[str, str], Dict[CharCountTable, Tuple[str, ...]]] = defaultdict(dict)
+            a_ord = ord('a')
+            position = 0
+            for first_code, last_code, count, *signature in ENTRY_FORMAT.iter_unpack(view[entries_offset:word_ids_offset]):
+                key = (chr(a_ord + first_code), chr(a_ord + last_code))
+                index[key][tuple(signature)] = count
+                word_ids[key][tuple(signature)] = all_word_ids[position:position + count]
+                words[key][tuple(signature)] = tuple(all_words[position:position + count])
+                position += count
+
+            if position != word_count or offset != len(view):
+                raise IndexFileError(f'Compiled index file is truncated or corrupted: {index_path}')
+        except (IndexError, UnicodeDecodeError) as exc:
+            raise IndexFileError(f'Compiled index file is truncated or corrupted: {index_path}') from exc
+        finally:
+            view.release()
+
+    return IndexSnapshot(index=dict(index), word_lengths=word_lengths, word_count=word_count,
+                         word_ids=dict(word_ids), words=dict(words),
+                         next_word_id=max(all_word_ids, default=-1) + 1), checksum
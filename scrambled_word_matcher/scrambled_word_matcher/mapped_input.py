@@ -0,0 +1,166 @@
+"""
+Zero-copy input files.
+
+Input files are memory-mapped instead of read: lines are located as (start, end) offsets into the mapping,
+and scans receive memoryview slices of it, so a file is never held twice in memory and lines are not decoded.
+Worker processes map the file themselves and receive offsets, see ScrambledWordMatcher.submit_scan.
+"""
+
+import os
+import re
+import mmap
+
+from typing import Dict, Iterator, Tuple, Union
+
+WHITESPACE = b' \t\n\r\x0b\x0c'  # Stripped from both ends of lines, like bytes.strip()
+NON_ASCII_BYTE = re.compile(rb'[\x80-\xff]')
+
+Buffer = Union[bytes, mmap.mmap]
+InputKey = Tuple[str, int, int]  # Path, size and modification time of an input file, see file_key
+
+
+def line_spans(buffer: Buffer) -> Iterator[Tuple[int, int]]:
+    """
+    Find the lines of a buffer, as the offsets of their first and past-the-end bytes, without whitespace.
+
+    Like iterating over a file, a final line without a newline is a line, and a final newline does not start one.
+
+    :param buffer: The contents of the file.
+    :return: An iterator of (start, end) offsets, one per line.
+
+    >>> list(line_spans(b'spam\\r\\n  eggs \\n\\nham'))
+    [(0, 4), (8, 12), (14, 14), (15, 18)]
+    >>> list(line_spans(b'spam\\n')), list(line_spans(b''))
+    ([(0, 4)], [])
+    """
+
+    size = len(buffer)
+    start = 0
+    while start < size:
+        end = buffer.find(b'\n', start)
+        next_start = end + 1
+        if end < 0:
+            end = next_start = size
+
+        while start < end and buffer[start] in WHITESPACE:
+            start += 1
+        while end > start and buffer[end - 1] in WHITESPACE:
+            end -= 1
+
+        yield start, end
+        start = next_start
+
+
+def file_key(path: str) -> InputKey:
+    """
+    Identify the current contents of a file by its path, size and modification time, so that long-lived worker
+    processes do not scan a stale mapping of a file that was rewritten since they mapped it.
+
+    :param path: The file system path to the file.
+    :raises OSError: If the file cannot be read.
+    """
+
+    status = os.stat(path)
+    return path, status.st_size, status.st_mtime_ns
+
+
+def map_file(path: str) -> Buffer:
+    """
+    Map a file into memory, read-only. Empty files, which cannot be mapped, are returned as empty bytes.
+
+    :param path: The file system path to the file.
+    :return: The mapping of the file.
+    :raises OSError: If the file cannot be read.
+    """
+
+    with open(path, 'rb') as input_file:
+        try:
+            return mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            return b''
+
+
+class MappedInput:
+    """
+    A memory-mapped input file, handing out its lines as memoryview slices.
+
+    Properties:
+    - buffer: The mapping of the file.
+    - view: A memoryview of the whole mapping; lines are slices of it.
+    - is_ascii: Whether the file only holds ASCII bytes, so that line lengths in characters are lengths in bytes.
+    - key: The file_key of the file, sent to worker processes along with line offsets.
+
+    >>> import os, tempfile
+    >>> with tempfile.NamedTemporaryFile(delete=False) as input_file:
+    ...     _ = input_file.write(b'spam\\neggs\\n')
+    >>> with MappedInput(input_file.name) as mapped_input:
+    ...     [(line_number, bytes(mapped_input.view[start:end])) for line_number, start, end in mapped_input.lines()]
+    [(1, b'spam'), (2, b'eggs')]
+    >>> os.remove(input_file.name)
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: The file system path to the input file.
+        :raises OSError: If the file cannot be read.
+        """
+
+        self.key = file_key(path)
+        self.buffer = map_file(path)
+        self.view = memoryview(self.buffer)
+        self.is_ascii = NON_ASCII_BYTE.search(self.buffer) is None
+
+    def lines(self) -> Iterator[Tuple[int, int, int]]:
+        """
+        Return an iterator of (line number, start, end) tuples, see line_spans; line numbers start at 1.
+        """
+
+        for line_number, (start, end) in enumerate(line_spans(self.buffer), start=1):
+            yield line_number, start, end
+
+    def line_length(self, start: int, end: int) -> int:
+        """
+        Return the length of a line in characters, decoding it only if the file is not ASCII.
+
+        :raises UnicodeDecodeError: If the line is not valid UTF-8.
+        """
+
+        return end - start if self.is_ascii else len(bytes(self.view[start:end]).decode('utf-8'))
+
+    def close(self) -> None:
+        """
+        Unmap the file. If slices of it are still referenced, e.g. by a traceback, it is unmapped once they are released.
+        """
+
+        self.view.release()
+        if isinstance(self.buffer, mmap.mmap):
+            try:
+                self.buffer.close()
+            except BufferError:
+                pass
+
+    def __enter__(self) -> 'MappedInput':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+_worker_inputs: Dict[InputKey, Buffer] = {}  # Only the latest file, as worker processes outlive scans
+
+
+def worker_line(key: InputKey, start: int, end: int) -> memoryview:
+    """
+    Return a line of an input file mapped once per process, for worker processes receiving offsets.
+
+    :param key: The file_key of the input file.
+    :param start: The offset of the first byte of the line.
+    :param end: The offset past the last byte of the line.
+    :return: A memoryview slice of the mapping.
+    """
+
+    buffer = _worker_inputs.get(key)
+    if buffer is None:
+        _worker_inputs.clear()  # Mappings still referenced by slices are unmapped once they are released
+        buffer = _worker_inputs[key] = map_file(key[0])
+    return memoryview(buffer)[start:end]
@@ -1,64 +1,239 @@
+import os
+import re
 import sys
+import heapq
 import logging
 
-from operator import itemgetter
-from contextlib import closing
-from functools import cache
-from collections import defaultdict, Counter
-from typing import Tuple, Dict, Set, List
+from time import monotonic, perf_counter
+from operator import add
+from functools import partial
+from itertools import chain, count, islice, repeat
+from contextlib import nullcontext
+from collections import defaultdict, deque
+from typing import Tuple, Dict, Set, List, Optional, FrozenSet, Iterable, Iterator, Deque, Sequence, Hashable, ContextManager
+from typing import Callable, Pattern
+from dataclasses import dataclass, field
 
 import threading
+from concurrent.futures import Executor
+from concurrent.futures import Future
 from concurrent.futures import ThreadPoolExecutor
-from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
 
-from scrambled_word_matcher.constraints import validate_dictionary
-from scrambled_word_matcher.constraints import validate_input_file
+from scrambled_word_matcher.constraints import validate_input_line
 from scrambled_word_matcher.constraints import validate_char
+from scrambled_word_matcher.constraints import Text
 
 from scrambled_word_matcher.constraints import ALPHABET_SIZE
+from scrambled_word_matcher.constraints import MAX_DICTIONARY_SIZE, LARGE_MAX_DICTIONARY_SIZE
+
+from scrambled_word_matcher.signatures import CharCountTable, WordIds, HashEntry, HashIndex
+from scrambled_word_matcher.signatures import HASH_MASK, FIRST_LETTER_HASHES, LAST_LETTER_HASHES
+from scrambled_word_matcher.signatures import counting_sort_chars, encode_chars, multiset_hash, window_probe_tables
+from scrambled_word_matcher.signatures import ascii_bytes, mark_seen, LETTER_CODES
+
+from scrambled_word_matcher import numpy_backend
+from scrambled_word_matcher.compact_index import CompactIndex
+from scrambled_word_matcher.automaton import PermutedPatternAutomaton, UNBUILT
+from scrambled_word_matcher.dictionary_builder import DictionaryBuilder
+from scrambled_word_matcher.result_cache import CacheKey, ResultCache, line_key
+from scrambled_word_matcher.scan_stats import ScanStats
+from scrambled_word_matcher.mapped_input import InputKey, MappedInput, worker_line
+
+LengthIndex = Dict[int, Dict[int, Dict[CharCountTable, WordIds]]]  # length -> endpoint code -> signature -> word ids
+EndpointIndex = List[List[Tuple[int, int]]]  # first letter code -> (length, bitmask of last letter codes)
+LetterCaps = Dict[int, Tuple[List[int], Pattern[bytes]]]  # length -> (maximum count per letter code, run pattern)
+
+ENGINES = ('naive', 'length_major', 'rolling_hash', 'endpoint_pruning', 'numpy', 'compact', 'automaton')
+EXECUTORS = ('thread', 'process')
+PROCESS_CHUNKS_PER_WORKER = 4  # Lines, or the chunks of a long text, are sent to worker processes in this many chunks per worker
+CORPUS_CHUNK_SIZE = 1 << 10  # Lines per task of count_corpus
+MIN_CHUNK_LENGTH = 1 << 16  # Minimum number of characters of the chunks of a text scanned in parallel
+DEFAULT_LOOKAHEAD = 64  # Maximum number of lines in flight when streaming a file
+DEADLINE_CHECK_INTERVAL = 1 << 10  # Positions and window probes between two reads of the clock by scans with a deadline
+
+
+class DerivedIndexes:
+    """
+    The indexes derived from an IndexSnapshot by the engines that need them, built lazily.
+
+    Snapshots never change, so their derived indexes never need to be invalidated. They are not pickled:
+    worker processes build their own.
+
+    Properties:
+    - length_index: The index regrouped by word length and integer endpoint code (first * ALPHABET_SIZE + last),
+                    built for the length-major engine.
+    - hash_index: The index regrouped by word length and probe hash (multiset hash plus endpoint hashes),
+                  built for the hash-based engines.
+    - endpoint_index: For every first letter, the (word length, last letter bitmask) pairs present in the
+                      dictionary, built for the endpoint pruning engine.
+    - numpy_index: The hash index arranged into arrays, built for the NumPy engine.
+    - automaton: The permuted pattern automaton of the dictionary, built for the automaton engine.
+    - letter_caps: For every word length, the maximum count of every letter in the words of that length,
+                   and a pattern matching the runs of text without barrier letters, built for the length-major engine.
+    """
+
+    def __init__(self) -> None:
+        self.length_index: Optional[LengthIndex] = None
+        self.hash_index: Optional[HashIndex] = None
+        self.endpoint_index: Optional[EndpointIndex] = None
+        self.numpy_index: Optional[numpy_backend.NumpyIndex] = None
+        self.automaton: Optional[PermutedPatternAutomaton] = None
+        self.letter_caps: Optional[LetterCaps] = None
+
+    def __reduce__(self) -> Tuple[type, Tuple]:
+        return DerivedIndexes, ()
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """
+    An immutable, picklable snapshot of the dictionary of a ScrambledWordMatcher.
+
+    A matcher publishes a new snapshot for every change of its dictionary, and scans read the snapshot
+    that was current when they started, without locking. Snapshots are never modified once published:
+    they share the parts that did not change with the previous snapshot.
+    Unlike the matcher, a snapshot holds no logger and no lock, so it can be sent to worker processes.
+    Matchers with the compact engine store their words in compact_index instead of index, word_ids and words.
+    """
+
+    index: Dict[Tuple[str, str], Dict[CharCountTable, int]]
+    word_lengths: FrozenSet[int]
+    word_count: int
+    compact_index: Optional[CompactIndex] = None
+    word_ids: Dict[Tuple[str, str], Dict[CharCountTable, WordIds]] = field(default_factory=dict)
+    words: Dict[Tuple[str, str], Dict[CharCountTable, Tuple[str, ...]]] = field(default_factory=dict)
+    next_word_id: int = 0
+    derived: DerivedIndexes = field(default_factory=DerivedIndexes, compare=False, repr=False)
 
-CharCountTable = Tuple[int, ...]  # Tuple of ALPHABET_SIZE items
 
+@dataclass(frozen=True)
+class ScanResult:
+    """
+    The count of matches of a scan with a deadline, see scan_within.
 
-@cache
-def counting_sort_chars(chars: str) -> CharCountTable:
+    A partial scan stopped at its deadline before reading the whole text, so its count only includes the words
+    matched in the part it read: it is a lower bound of the count of a complete scan. Lines whose scan never
+    started before the deadline of their batch have a partial count of 0.
     """
-    Counts the occurrences of each character in a string and returns a tuple with these counts.
 
-    Assumes that input string only contains lowercase English letters (a-z): see the constraints.py for the details.
+    matches: int
+    partial: bool = False
 
-    :param chars: The string of characters to count.
-    :return: A tuple of length ALPHABET_SIZE with the count of each character.
 
-    >>> counting_sort_chars('a')
-    (1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+_process_worker_matcher: Optional['ScrambledWordMatcher'] = None
 
-    >>> counting_sort_chars('abc')
-    (1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
 
-    >>> counting_sort_chars('zab')
-    (1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1)
+def _init_process_worker(snapshot: IndexSnapshot, engine: str) -> None:
+    """
+    Process pool initializer: build the worker's matcher once from the index snapshot.
+    """
 
-    >>> counting_sort_chars('mississippi')
-    (0, 0, 0, 0, 0, 0, 0, 0, 4, 0, 0, 0, 1, 0, 0, 2, 0, 0, 4, 0, 0, 0, 0, 0, 0, 0)
+    global _process_worker_matcher
+    logger = logging.getLogger('scrambled_word_matcher.worker')
+    _process_worker_matcher = ScrambledWordMatcher.from_snapshot(snapshot, logger, engine=engine)
 
-    >>> counting_sort_chars('')  # Empty string should return a tuple of zero counts
-    (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
 
-    >>> counting_sort_chars('!')  # Non-alphabet character should raise a ValueError
-    Traceback (most recent call last):
-    ...
-    scrambled_word_matcher.constraints.InputValidationError: Unexpected symbol: !
+def _scan_in_process_worker(text: Text) -> int:
+    """
+    Process pool task: scan a single line with the worker's matcher.
     """
 
-    count = [0] * ALPHABET_SIZE  # Array of zeros for each letter in the alphabet
-    a_ord = ord('a')
+    assert _process_worker_matcher is not None, 'Process worker is not initialized'
+    return _process_worker_matcher.scan(text)
 
-    for char in chars:
-        validate_char(char)
-        count[ord(char) - a_ord] += 1
 
-    return tuple(count)
+def _scan_chunk_in_process_worker(lines: Sequence[Text]) -> List[int]:
+    """
+    Process pool task: scan a chunk of lines with the worker's matcher, returning their counts in order.
+    """
+
+    assert _process_worker_matcher is not None, 'Process worker is not initialized'
+    return _process_worker_matcher.scan_chunk(lines)
+
+
+def _scan_chunk_within_in_process_worker(lines: Sequence[Text], line_timeout: Optional[float],
+                                         deadline: Optional[float]) -> List[ScanResult]:
+    """
+    Process pool task: scan a chunk of lines with deadlines with the worker's matcher, see scan_chunk_within.
+    """
+
+    assert _process_worker_matcher is not None, 'Process worker is not initialized'
+    return _process_worker_matcher.scan_chunk_within(lines, line_timeout, deadline)
+
+
+def _count_chunk_in_process_worker(lines: Sequence[Text]) -> List[int]:
+    """
+    Process pool task: count the lines of a chunk every word of the worker's matcher appears in.
+    """
+
+    assert _process_worker_matcher is not None, 'Process worker is not initialized'
+    return _process_worker_matcher.count_chunk(lines)
+
+
+def _scan_span_in_process_worker(input_key: InputKey, start: int, end: int) -> int:
+    """
+    Process pool task: scan a line of an input file, given by its offsets, with the worker's matcher.
+
+    The worker maps the file once, so lines are not pickled.
+    """
+
+    assert _process_worker_matcher is not None, 'Process worker is not initialized'
+    return _process_worker_matcher.scan(worker_line(input_key, start, end))
+
+
+def default_workers(executor: str) -> int:
+    """
+    Return the default number of workers of a pool: the number of CPUs for processes, and like
+    ThreadPoolExecutor, a few more for threads.
+
+    >>> default_workers('thread') == min(32, (os.cpu_count() or 1) + 4)
+    True
+    """
+
+    cpu_count = os.cpu_count() or 1
+    return cpu_count if executor == 'process' else min(32, cpu_count + 4)
+
+
+def merge_counts(totals: List[int], counts: List[int]) -> List[int]:
+    """
+    Add up two flat lists of counts indexed by word id; the shorter one is padded with zeros.
+
+    >>> merge_counts([1, 0, 2], [1, 1]), merge_counts([], [3])
+    ([2, 1, 2], [3])
+    """
+
+    if len(counts) > len(totals):
+        totals, counts = counts, totals
+    return list(map(add, totals, chain(counts, repeat(0, len(totals) - len(counts)))))
+
+
+def top_counts(counts: Sequence[int], k: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Return the k largest counts of a flat list indexed by word id, with their ids, in descending order of counts
+    and ascending order of ids among equal counts.
+
+    :param counts: The counts, indexed by word id, see count_corpus.
+    :param k: The number of counts to return, defaults to all of them.
+    :return: A list of (word id, count) tuples.
+
+    >>> top_counts([3, 0, 5, 3], k=3)
+    [(2, 5), (0, 3), (3, 3)]
+    """
+
+    if k is None:
+        k = len(counts)
+    return [(word_id, counts[word_id]) for word_id in heapq.nlargest(k, range(len(counts)), key=counts.__getitem__)]
+
+
+def _match_in_process_worker(text: Text) -> List[int]:
+    """
+    Process pool task: return the ids of the words matched in a chunk of a long text, see scan_in_chunks.
+    """
+
+    assert _process_worker_matcher is not None, 'Process worker is not initialized'
+    return list(_process_worker_matcher.scan_matches(text))
 
 
 class ScrambledWordMatcher:
@@ -74,7 +249,8 @@ class ScrambledWordMatcher:
     1
     """
 
-    def __init__(self, logger: logging.Logger) -> None:
+    def __init__(self, logger: logging.Logger, engine: str = 'naive', cache_size: int = 0, stats: bool = False,
+                 executor: str = 'thread', workers: Optional[int] = None) -> None:
         """
         Initialize the ScrambledWordMatcher with a logger.
 
@@ -82,9 +258,31 @@ class ScrambledWordMatcher:
         and a count of words added to the dictionary. The logger is used for debugging and information output.
 
         :param logger: A logging.Logger instance for logging messages.
+        :param engine: The scan engine to use, one of ENGINES:
+                       - 'naive' visits every position and slides a window for every word length.
+                       - 'length_major' sweeps word lengths in ascending order, one window at a time,
+                         over pre-encoded text, and skips lengths longer than the text, as well as windows
+                         holding letters more often than the words of their length, see get_letter_caps.
+                       - 'rolling_hash' sweeps word lengths like 'length_major', but identifies windows by
+                         a rolling multiset hash and only compares full counts on a hash hit.
+                       - 'endpoint_pruning' visits every position, but only the lengths of dictionary words
+                         with the same first and last letters as the window, probing them by hash.
+                       - 'numpy' processes all windows of a length in batch with NumPy arrays.
+                         Falls back to 'naive' with a warning when NumPy is not installed.
+                       - 'compact' stores words in a CompactIndex instead of index, for large dictionaries,
+                         and scans like 'endpoint_pruning', looking up sorted inner letters by binary search.
+                       - 'automaton' walks a permuted pattern automaton from every position, reading letters
+                         until no word contains them, see PermutedPatternAutomaton.
+        :param cache_size: The maximum number of line results kept in a ResultCache, 0 (default) disables it.
+        :param stats: Whether to count the work done by scans and time the phases of a run in a ScanStats.
+        :param executor: The default kind of worker pool of scan_lines and iter_scan_file, one of EXECUTORS.
+        :param workers: The default number of workers of the pool, see default_workers.
+        :raises ValueError: If the engine or the executor is unknown.
 
         Properties:
-        - index: A default dictionary to store the occurrence count of words with the same first and last letter.
+        - state: The current IndexSnapshot of the dictionary. It is replaced, never modified, when the dictionary
+                 changes, so scans read it once and need no lock. The following properties read it:
+        - index: A dictionary to store the occurrence count of words with the same first and last letter.
                  The keys are tuples of the form (first_letter, last_letter), and the values are dictionaries
                  where keys are tuples representing the sorted character counts of the word,
                  and values are the counts of how many times these character counts occur.
@@ -92,33 +290,238 @@ class ScrambledWordMatcher:
                         This is used to optimize the scanning process.
         - word_count: An integer count of the total number of unique words added to the matcher.
                       This is used for early exit.
+        - word_ids: The ids of the words counted in index, with the same keys and signatures.
+                    Every word gets an integer id when it is added, see add_word.
+        - next_word_id: The id of the next word to be added; seen sets of scans are bytearrays of this size.
+        - compact_index: The CompactIndex holding the words of the compact engine, None for other engines.
+
         - logger: The logging.Logger instance passed during initialization for logging.
+        - lock: Serializes the changes of the dictionary; scans do not take it.
+        - dictionary_version: A stamp incremented whenever the dictionary changes, part of the result cache keys.
+        - result_cache: The ResultCache of line match counts, None if disabled. It is cleared whenever
+                        the dictionary changes, and exposes hits, misses and evictions counters.
+        - stats: The ScanStats of the matcher, None unless enabled.
+        - pools: The long-lived worker pools of the matcher by kind and number of workers, created on first use,
+                 see get_pool. They are shut down by close, or when leaving a `with` block.
 
         Usage:
         >>> import logging
         >>> logger = logging.getLogger('test_logger')
         >>> matcher = ScrambledWordMatcher(logger)
+        >>> ScrambledWordMatcher(logger, engine='unknown')
+        Traceback (most recent call last):
+        ...
+        ValueError: Unknown scan engine: unknown
         """
 
-        self.index: Dict[Tuple[str, str], Dict[Tuple, int]] = defaultdict(Counter)
-        self.word_lengths: Set[int] = set()
-        self.word_count: int = 0
+        if engine not in ENGINES:
+            raise ValueError(f'Unknown scan engine: {engine}')
+
+        if executor not in EXECUTORS:
+            raise ValueError(f'Unknown executor: {executor}')
+
+        if engine == 'numpy' and not numpy_backend.is_available():
+            logger.warning('NumPy is not installed, falling back to the naive scan engine')
+            engine = 'naive'
+
+        self.engine = engine
+        self.state = IndexSnapshot(index={}, word_lengths=frozenset(), word_count=0,
+                                   compact_index=CompactIndex() if engine == 'compact' else None)
+        self.dictionary_version: int = 0
+        self.result_cache: Optional[ResultCache] = ResultCache(cache_size) if cache_size else None
+        self.stats: Optional[ScanStats] = ScanStats() if stats else None
+        self.executor = executor
+        self.workers = workers
+        self.pools: Dict[Tuple[str, int], Tuple[Executor, int]] = {}  # -> pool, dictionary version of its snapshot
+        self.pools_lock = threading.RLock()  # Held while submitting to a pool, so that it is not replaced meanwhile
         self.logger = logger
         self.lock = threading.Lock()
 
-    def import_dictionary(self, dictionary_path: str) -> None:
-        validate_dictionary(dictionary_path)
+    def __enter__(self) -> 'ScrambledWordMatcher':
+        return self
 
-        dictionary: List[str] = []
-        with open(dictionary_path, 'r', encoding='utf-8') as dictionary_file:
-            for line in dictionary_file:
-                dictionary.append(line.strip())
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
-        self.add_words(dictionary)
+    def close(self) -> None:
+        """
+        Shut down the worker pools of the matcher, waiting for the scans they are running.
 
-    def add_words(self, words: List[str]) -> None:
-        with ThreadPoolExecutor() as executor:
-            executor.map(self.add_word, words)
+        The matcher can still be used: pools are created again when needed.
+
+        Usage:
+        >>> with ScrambledWordMatcher(logging.getLogger('test')) as matcher:
+        ...     matcher.add_word('spam')
+        ...     matcher.scan_lines(['sapm', 'maps'])
+        [1, 0]
+        >>> matcher.pools
+        {}
+        """
+
+        with self.pools_lock:
+            pools, self.pools = self.pools, {}
+
+        for pool, _ in pools.values():
+            pool.shutdown()
+
+    @property
+    def index(self) -> Dict[Tuple[str, str], Dict[CharCountTable, int]]:
+        return self.state.index
+
+    @property
+    def word_lengths(self) -> FrozenSet[int]:
+        return self.state.word_lengths
+
+    @property
+    def word_count(self) -> int:
+        return self.state.word_count
+
+    @property
+    def word_ids(self) -> Dict[Tuple[str, str], Dict[CharCountTable, WordIds]]:
+        return self.state.word_ids
+
+    @property
+    def next_word_id(self) -> int:
+        return self.state.next_word_id
+
+    @property
+    def compact_index(self) -> Optional[CompactIndex]:
+        return self.state.compact_index
+
+    @classmethod
+    def from_snapshot(cls, snapshot: IndexSnapshot, logger: logging.Logger,
+                      engine: str = 'naive', cache_size: int = 0, stats: bool = False) -> 'ScrambledWordMatcher':
+        """
+        Create a matcher with the dictionary of an index snapshot.
+
+        Snapshots are immutable, so the matcher shares it rather than copying it. With the compact engine,
+        a snapshot without a compact index, such as one read from a compiled index file, is converted:
+        a compact index is built from its words, which keep their ids.
+
+        :param snapshot: The index snapshot with the dictionary.
+        :param logger: A logging.Logger instance for logging messages.
+        :param engine: The scan engine to use, see __init__.
+        :param cache_size: The size of the result cache, see __init__.
+        :param stats: Whether to collect scan statistics, see __init__.
+        :return: A new ScrambledWordMatcher.
+        :raises ValueError: If the snapshot has a compact index and the engine is not the compact engine,
+                            as compact snapshots do not keep the words.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('spam')
+        >>> copy = ScrambledWordMatcher.from_snapshot(matcher.snapshot(), logging.getLogger('test'))
+        >>> copy.word_count, copy.scan('sapm')
+        (1, 1)
+        >>> compact = ScrambledWordMatcher.from_snapshot(matcher.snapshot(), logging.getLogger('test'), engine='compact')
+        >>> compact.word_count, compact.scan('sapm')
+        (1, 1)
+        """
+
+        matcher = cls(logger, engine=engine, cache_size=cache_size, stats=stats)
+        if matcher.engine == 'compact' and snapshot.compact_index is None:
+            compact_index = CompactIndex()
+            for key, signatures in snapshot.word_ids.items():
+                for signature, word_ids in signatures.items():
+                    for word_id, word in zip(word_ids, snapshot.words[key][signature]):
+                        compact_index.add(word, word_id)
+            compact_index.sort_buckets()
+            snapshot = IndexSnapshot(index={}, word_lengths=snapshot.word_lengths, word_count=compact_index.word_count,
+                                     compact_index=compact_index, next_word_id=snapshot.next_word_id)
+        elif matcher.engine != 'compact' and snapshot.compact_index is not None:
+            raise ValueError(f'A compact index snapshot cannot be scanned with the {matcher.engine} engine')
+
+        matcher.state = snapshot
+        return matcher
+
+    def snapshot(self) -> IndexSnapshot:
+        """
+        Return the current immutable, picklable snapshot of the dictionary.
+
+        :return: The IndexSnapshot that scans starting now read.
+
+        Usage:
+        >>> import pickle
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('spam')
+        >>> snapshot = pickle.loads(pickle.dumps(matcher.snapshot()))
+        >>> snapshot.word_lengths, snapshot.word_count
+        (frozenset({4}), 1)
+        """
+
+        return self.state
+
+    def import_dictionary(self, dictionary_path: str, max_size: Optional[int] = None) -> None:
+        """
+        Reads, validates and indexes a dictionary file, one word per line, with a DictionaryBuilder.
+
+        The file is read once. Nothing is added unless the whole dictionary is valid; the index of an empty
+        matcher is then built in batch and published in one step, otherwise the words are added like add_words.
+
+        :param dictionary_path: The file system path to the dictionary file.
+        :param max_size: The maximum number of words in the dictionary, defaults to LARGE_MAX_DICTIONARY_SIZE
+                         with the compact engine, which is meant for large dictionaries, and to MAX_DICTIONARY_SIZE
+                         with the other engines.
+        :raises OSError: If the file cannot be read.
+        :raises DictionaryValidationError: If the dictionary is invalid, listing the problems found.
+        """
+
+        if max_size is None:
+            max_size = LARGE_MAX_DICTIONARY_SIZE if self.engine == 'compact' else MAX_DICTIONARY_SIZE
+
+        builder = DictionaryBuilder(max_size=max_size)
+        with self.timed('validation'):
+            builder.read(dictionary_path)
+            builder.check()
+        with self.timed('dictionary_build'):
+            self.install(builder)
+
+    def install(self, builder: DictionaryBuilder,
+                signature_table: Optional[Dict[CharCountTable, CharCountTable]] = None) -> None:
+        """
+        Adds the words of a DictionaryBuilder, building the whole index in batch if the dictionary is empty.
+
+        :param builder: The builder holding the validated words.
+        :param signature_table: Signatures shared with other indexes when the index is built in batch,
+                                see DictionaryBuilder.build_index and MatcherRegistry.
+        :raises DictionaryValidationError: If the builder found problems in the dictionary.
+
+        Usage:
+        >>> builder = DictionaryBuilder()
+        >>> builder.add_lines([b'spam', b'eggs'])
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.install(builder)
+        >>> matcher.word_count, matcher.scan('sapmeggs')
+        (2, 2)
+        """
+
+        builder.check()
+
+        with self.lock:
+            state = self.state
+            if not state.next_word_id:  # No word was ever added: ids start at 0
+                if state.compact_index is not None:
+                    compact_index = builder.build_compact_index()
+                    self.publish(IndexSnapshot(index={}, word_lengths=builder.word_lengths(),
+                                               word_count=compact_index.word_count, compact_index=compact_index,
+                                               next_word_id=compact_index.word_count))
+                else:
+                    index, word_ids, words = builder.build_index(signature_table=signature_table)
+                    self.publish(IndexSnapshot(index=index, word_lengths=builder.word_lengths(),
+                                               word_count=len(builder.words), word_ids=word_ids, words=words,
+                                               next_word_id=len(builder.words)))
+                return
+
+        self.add_words([word.decode('ascii') for word in builder.words])
+
+    def add_words(self, words: Iterable[str]) -> None:
+        """
+        Adds many words in a single update of the dictionary, see add_word and update_dictionary.
+
+        :param words: The words to add, assumed to be validated.
+        """
+
+        self.update_dictionary(add=words)
 
     def add_word(self, word: str) -> None:
         """
@@ -128,6 +531,10 @@ class ScrambledWordMatcher:
         of the word's middle characters (excluding the first and last character).
         It also updates the set of word lengths and the total word count.
 
+        Every word gets an integer id, reported by scan_matches: words are numbered from 0
+        in the order they are added, so the id of a word imported from a dictionary file
+        is its zero-based line number. Ids of removed words are not reused.
+
         The word is expected to only contain lowercase English letters (a-z),
         and it must be at least 2 characters long.
 
@@ -148,71 +555,621 @@ class ScrambledWordMatcher:
         1
         >>> 'apple' in matcher.index[('a', 'e')]
         False
+        >>> matcher.word_ids[('a', 'y')][tuple(counting_sort_chars('apply'))]
+        (1,)
+        """
+
+        self.update_dictionary(add=(word,))
+
+    def remove_word(self, word: str) -> None:
         """
+        Removes a word from the matcher's dictionary.
+
+        :param word: The word to be removed.
+        :raises ValueError: If the word is not in the dictionary.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_words(['spam', 'eggs'])
+        >>> matcher.remove_word('spam')
+        >>> matcher.word_count, matcher.scan('sapm'), matcher.scan('eggs')
+        (1, 0, 1)
+        >>> matcher.remove_word('spam')
+        Traceback (most recent call last):
+        ...
+        ValueError: Word not in dictionary: spam
+        """
+
+        self.update_dictionary(remove=(word,))
+
+    def update_dictionary(self, add: Iterable[str] = (), remove: Iterable[str] = ()) -> None:
+        """
+        Removes and adds words in one batch, and publishes the resulting dictionary as a new snapshot.
+
+        The current snapshot is not modified: the new one copies the (first letter, last letter) groups
+        that change and shares the others. Scans that already started keep reading the previous snapshot,
+        scans that start after the update read the new one; no scan sees a partial update.
+        Removals are applied before additions. If a word to remove is not in the dictionary,
+        nothing is published.
 
-        key = (word[0], word[-1])
-        scramble = counting_sort_chars(word)
+        :param add: The words to add, see add_word. Consumed lazily, so a dictionary file can be streamed.
+        :param remove: The words to remove, see remove_word.
+        :raises ValueError: If a word to remove is not in the dictionary.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.update_dictionary(add=['spam', 'eggs'])
+        >>> before = matcher.snapshot()
+        >>> matcher.update_dictionary(add=['ham'], remove=['spam'])
+        >>> matcher.word_count, before.word_count
+        (2, 2)
+        >>> sorted(matcher.word_lengths), sorted(before.word_lengths)
+        ([3, 4], [4])
+        """
 
         with self.lock:
-            self.index[key][scramble] += 1
-            self.word_lengths.add(len(word))
-            self.word_count += 1
+            state = self.state
+            if state.compact_index is not None:
+                new_word_ids = count(state.next_word_id)
+                compact_index = state.compact_index.updated(remove=remove, add=zip(add, new_word_ids))
+                self.publish(IndexSnapshot(index={}, word_lengths=frozenset(compact_index.word_lengths),
+                                           word_count=compact_index.word_count, compact_index=compact_index,
+                                           next_word_id=next(new_word_ids)))
+                return
+
+            index = dict(state.index)
+            word_ids = dict(state.word_ids)
+            words = dict(state.words)
+            copied: Set[Tuple[str, str]] = set()
+
+            def copy_group(key: Tuple[str, str]) -> None:
+                if key not in copied:
+                    index[key] = dict(index.get(key, {}))
+                    word_ids[key] = dict(word_ids.get(key, {}))
+                    words[key] = dict(words.get(key, {}))
+                    copied.add(key)
+
+            word_count = state.word_count
+            removed_length = False
+            for word in remove:
+                key = (word[0], word[-1])
+                scramble = counting_sort_chars(word)
+                if word not in words.get(key, {}).get(scramble, ()):
+                    raise ValueError(f'Word not in dictionary: {word}')
+
+                copy_group(key)
+                position = words[key][scramble].index(word)
+                word_ids[key][scramble] = word_ids[key][scramble][:position] + word_ids[key][scramble][position + 1:]
+                words[key][scramble] = words[key][scramble][:position] + words[key][scramble][position + 1:]
+                index[key][scramble] -= 1
+                word_count -= 1
+
+                if not index[key][scramble]:
+                    del index[key][scramble], word_ids[key][scramble], words[key][scramble]
+                    removed_length = True
+                    if not index[key]:
+                        del index[key], word_ids[key], words[key]
+                        copied.discard(key)  # Added words start a new group
+
+            word_lengths = (frozenset(sum(scramble) for signatures in index.values() for scramble in signatures)
+                            if removed_length else state.word_lengths)
+
+            next_word_id = state.next_word_id
+            added_lengths = set()
+            for word in add:
+                key = (word[0], word[-1])
+                scramble = counting_sort_chars(word)
+
+                copy_group(key)
+                index[key][scramble] = index[key].get(scramble, 0) + 1
+                word_ids[key][scramble] = word_ids[key].get(scramble, ()) + (next_word_id,)
+                words[key][scramble] = words[key].get(scramble, ()) + (word,)
+                added_lengths.add(len(word))
+                next_word_id += 1
+                word_count += 1
+
+            self.publish(IndexSnapshot(index=index, word_lengths=word_lengths | added_lengths, word_count=word_count,
+                                       word_ids=word_ids, words=words, next_word_id=next_word_id))
+
+    def publish(self, state: IndexSnapshot) -> None:
+        """
+        Make a new snapshot of the dictionary current, and drop the cached line results. Called with the lock held.
+        """
 
-    def scan_file(self, input_path: str) -> List[int]:
+        self.state = state
+        self.dictionary_version += 1
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    def timed(self, phase: str) -> ContextManager:
+        """
+        Time the enclosed block as part of a phase of the run if stats are enabled, see ScanStats.phase.
+
+        :param phase: The phase, one of scan_stats.PHASES.
+        :return: A context manager.
+        """
+
+        return self.stats.phase(phase) if self.stats is not None else nullcontext()
+
+    def scan_file(self, input_path: str, executor: Optional[str] = None, workers: Optional[int] = None) -> List[int]:
         """
         Reads the input file line by line, scans each line for matches against the
         dictionary, and returns a list of match counts for each line.
 
-        Before scanning, the input file is validated to ensure it meets the required
-        criteria (e.g., line count, line length).
+        Each line is validated as it is read (e.g., line count, line length), see iter_scan_file.
 
         :param input_path: The file system path to the input file to be scanned.
+        :param executor: The kind of worker pool to scan lines with, see scan_lines.
+        :param workers: The number of workers, see scan_lines.
         :return: A list of integers where each integer is the number of matches
                  found in the corresponding line of the input file.
         """
 
-        validate_input_file(input_path)
+        return [matches for _, matches in self.iter_scan_file(input_path, executor=executor, workers=workers)]
+
+    def iter_scan_file(self, input_path: str, executor: Optional[str] = None, workers: Optional[int] = None,
+                       lookahead: int = DEFAULT_LOOKAHEAD) -> Iterator[Tuple[int, int]]:
+        """
+        Maps the input file into memory and yields the match count of every line as soon as it is known.
+
+        Lines are located as offsets into the mapping, see MappedInput: thread workers receive memoryview
+        slices of it and process workers receive the offsets and map the file themselves, so lines are never
+        copied into strings or decoded. Every line is validated as it is found and submitted to the worker pool
+        of the matcher, see get_pool. At most `lookahead` lines are in flight at any time, and results are
+        yielded in the order of the lines. A line that fails validation raises InputValidationError when it is read,
+        after the results of the lines before it have been yielded.
+
+        :param input_path: The file system path to the input file to be scanned.
+        :param executor: The kind of worker pool, one of EXECUTORS, defaults to the matcher's.
+        :param workers: The number of workers, defaults to the matcher's.
+        :param lookahead: The maximum number of lines in flight.
+        :return: An iterator of (case number, number of matches) tuples, starting with case number 1.
+        :raises OSError: If the file cannot be read.
+        :raises InputValidationError: If a line does not meet the input constraints.
+        """
+
+        executor = executor or self.executor
+        in_flight: Deque[Tuple[int, Future]] = deque()
+
+        with MappedInput(input_path) as mapped_input:
+            try:
+                for line_number, start, end in mapped_input.lines():
+                    with self.timed('validation'):  # Line lengths are measured in characters
+                        validate_input_line(line_number, mapped_input.line_length(start, end))
+                    with self.pools_lock:  # Process pools are replaced when the dictionary changes
+                        future = self.submit_scan(self.get_pool(executor, workers), executor,
+                                                  mapped_input.view[start:end], (mapped_input.key, start, end))
+                    in_flight.append((line_number, future))
+
+                    if len(in_flight) >= lookahead:
+                        case_number, future = in_flight.popleft()
+                        yield case_number, future.result()
+
+                while in_flight:
+                    case_number, future = in_flight.popleft()
+                    yield case_number, future.result()
+            finally:
+                for _, future in in_flight:
+                    future.cancel()
+                for _, future in in_flight:  # Scans still running hold slices of the mapping
+                    if not future.cancelled():
+                        future.exception()
+
+    def get_pool(self, executor: Optional[str] = None, workers: Optional[int] = None) -> Executor:
+        """
+        Return the long-lived worker pool of the matcher of the given kind and size, creating it on first use.
+
+        Pools are kept until close is called, so that scans do not pay for starting and stopping workers.
+        Thread workers share the matcher and always scan its current dictionary. Process workers are
+        initialized with a snapshot of the dictionary, so a process pool is replaced by a new one when the
+        dictionary changes; scans already submitted to the previous pool complete before its workers exit.
+        Hold pools_lock while submitting to the returned pool, so that it cannot be replaced meanwhile.
+
+        :param executor: The kind of worker pool, one of EXECUTORS, defaults to the matcher's.
+        :param workers: The number of workers, defaults to the matcher's, see default_workers.
+        :return: A ThreadPoolExecutor or a ProcessPoolExecutor.
+        :raises ValueError: If the executor is unknown.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.get_pool('thread', 2) is matcher.get_pool('thread', 2)
+        True
+        >>> matcher.close()
+        """
+
+        executor = executor or self.executor
+        if executor not in EXECUTORS:
+            raise ValueError(f'Unknown executor: {executor}')
+
+        key = (executor, workers or self.workers or default_workers(executor))
+        with self.pools_lock:
+            pool, version = self.pools.get(key, (None, -1))
+            if pool is not None and (executor == 'thread' or version == self.dictionary_version):
+                return pool
+
+            if pool is not None:
+                pool.shutdown(wait=False)
+            version = self.dictionary_version  # Read before the snapshot, so that a change meanwhile is not missed
+            pool = self.create_executor(executor, key[1])
+            self.pools[key] = (pool, version)
+            return pool
+
+    def create_executor(self, executor: str, workers: Optional[int] = None,
+                        state: Optional[IndexSnapshot] = None) -> Executor:
+        """
+        Create a new worker pool to scan lines with; scans use the pools of the matcher, see get_pool.
+
+        Process pools are initialized with a snapshot of the dictionary index, see scan_lines.
+
+        :param executor: The kind of worker pool, one of EXECUTORS.
+        :param workers: The number of workers, defaults to the executor's default.
+        :param state: The snapshot process workers are initialized with, defaults to the current one.
+        :return: A ThreadPoolExecutor or a ProcessPoolExecutor.
+        :raises ValueError: If the executor is unknown.
+        """
+
+        if executor == 'thread':
+            return ThreadPoolExecutor(max_workers=workers)
+
+        if executor == 'process':
+            return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                       initializer=_init_process_worker,
+                                       initargs=(state or self.snapshot(), self.engine))
+
+        raise ValueError(f'Unknown executor: {executor}')
+
+    def submit_scan(self, pool: Executor, executor: str, text: Text,
+                    location: Optional[Tuple[InputKey, int, int]] = None) -> Future:
+        """
+        Submit a scan of a single line to a worker pool, see get_pool and create_executor.
+
+        :param pool: The worker pool.
+        :param executor: The kind of the worker pool, one of EXECUTORS.
+        :param text: The line to scan.
+        :param location: The input file key and the offsets of the line in it, sent to process workers
+                         instead of the line itself, see MappedInput.
+        :return: A future of the number of matches.
+        """
+
+        if self.result_cache is None:
+            return self.submit_line(pool, executor, text, location)
+
+        key = (line_key(text), self.dictionary_version)
+        matches = self.result_cache.get(key)
+        if matches is not None:
+            future: Future = Future()
+            future.set_result(matches)
+            return future
+
+        future = self.submit_line(pool, executor, text, location)
+        future.add_done_callback(partial(self.cache_result, key))
+        return future
+
+    def submit_line(self, pool: Executor, executor: str, text: Text,
+                    location: Optional[Tuple[InputKey, int, int]] = None) -> Future:
+        """
+        Submit the scan of a line, bypassing the result cache, see submit_scan.
+        """
+
+        if executor != 'process':
+            return pool.submit(self.scan_with_engine, text)
+        if location is not None:
+            return pool.submit(_scan_span_in_process_worker, *location)
+        return pool.submit(_scan_in_process_worker, text)
+
+    def cache_result(self, key: CacheKey, future: Future) -> None:
+        """
+        Done callback of submit_scan: cache the count of a successfully scanned line.
+        """
+
+        if self.result_cache is not None and not future.cancelled() and future.exception() is None:
+            self.result_cache.put(key, future.result())
+
+    def scan(self, text: Text, workers: Optional[int] = None) -> int:
+        """
+        Scan the given text and count the number of dictionary word occurrences using the configured engine.
+
+        Each dictionary word is only counted once per text scan. All engines return the same counts.
+        Except for the naive engine, the text is validated in one bulk pass before scanning,
+        and scanning runs on integer letter codes without further validation.
+        If the result cache is enabled, the count of a line scanned before against the same dictionary
+        is returned without scanning it again.
+        The scan reads the dictionary snapshot that is current when it starts, see update_dictionary.
+        With more than one worker, a long text is split into chunks scanned in parallel, see scan_in_chunks.
+
+        :param text: The text to be scanned for dictionary word occurrences, as a string or as ASCII bytes
+                     (bytes, bytearray or memoryview).
+        :param workers: The number of worker processes to scan a long text with, None (default) scans it
+                        in the calling thread.
+        :return: The total count of dictionary word matches found in the text.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'), engine='length_major', cache_size=16)
+        >>> matcher.add_word('hello')
+        >>> matcher.add_word('world')
+        >>> matcher.scan('ehllodlrowhelloworld'), matcher.scan('ehllodlrowhelloworld')
+        (2, 2)
+        >>> matcher.result_cache.hits, matcher.result_cache.misses
+        (1, 1)
+        """
+
+        scan_text: Callable[[Text], int] = self.scan_with_engine
+        if workers is not None and workers > 1:
+            scan_text = partial(self.scan_in_chunks, workers=workers)
+
+        if self.result_cache is None:
+            return scan_text(text)
+
+        version = self.dictionary_version
+        key = (line_key(text), version)
+        matches = self.result_cache.get(key)
+        if matches is None:
+            matches = scan_text(text)
+            if self.dictionary_version == version:  # Otherwise the scan may have read a newer dictionary
+                self.result_cache.put(key, matches)
+
+        return matches
+
+    def scan_within(self, text: Text, timeout: float) -> ScanResult:
+        """
+        Scan the given text, giving up after timeout seconds with the count of the words matched so far.
+
+        Scans with a deadline visit positions from left to right, like scan_matches whatever the engine,
+        and check the deadline cooperatively (see scan_matches_until), so a pathological line returns a partial
+        count in bounded time instead of holding its caller. Complete counts are those of scan, and are
+        cached like them; partial counts are not cached.
+
+        :param text: The text to be scanned for dictionary word occurrences, as a string or as ASCII bytes.
+        :param timeout: The number of seconds the scan may take.
+        :return: The count of matches, and whether it is partial.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_words(['hello', 'world'])
+        >>> matcher.scan_within('hlelowrold', timeout=60), matcher.scan_within('hlelowrold', timeout=0)
+        (ScanResult(matches=2, partial=False), ScanResult(matches=0, partial=True))
+        """
+
+        deadline = monotonic() + timeout
+        version = self.dictionary_version
+        key = (line_key(text), version)
+        if self.result_cache is not None:
+            matches = self.result_cache.get(key)
+            if matches is not None:
+                return ScanResult(matches)
+
+        with self.timed('scan'):
+            matched, partial = self.scan_matches_until(text, deadline)
+
+        if self.result_cache is not None and not partial and self.dictionary_version == version:
+            self.result_cache.put(key, len(matched))
+        return ScanResult(len(matched), partial)
+
+    def scan_in_chunks(self, text: Text, workers: int) -> int:
+        """
+        Scan a long text in parallel, split into chunks scanned by the process pool of the matcher
+        (see get_pool), bypassing the result cache.
+
+        Each chunk overlaps the next by the length of the longest word minus one, so every window of the text
+        lies entirely within a chunk. Workers report the ids of the words matched in their chunk, see
+        scan_matches, and the ids are merged, so each dictionary word is still counted once. The whole text is
+        validated first, so that errors report positions in the text. Texts shorter than two chunks of
+        MIN_CHUNK_LENGTH characters are scanned in the calling thread.
+
+        :param text: The text to be scanned for dictionary word occurrences, as a string or as ASCII bytes.
+        :param workers: The number of worker processes.
+        :return: The total count of dictionary word matches found in the text.
+        """
+
+        data = ascii_bytes(text)
+        state = self.state
+        chunk_count = min(workers * PROCESS_CHUNKS_PER_WORKER, len(data) // MIN_CHUNK_LENGTH)
+        if chunk_count < 2 or not state.word_count:
+            return self.scan_with_engine(data)
+
+        chunk_length = -(-len(data) // chunk_count)
+        overlap = max(state.word_lengths) - 1
+
+        with self.timed('scan'):
+            matched: Set[int] = set()
+            with self.pools_lock:
+                pool = self.get_pool('process', workers)
+                futures = [pool.submit(_match_in_process_worker, data[start:start + chunk_length + overlap])
+                           for start in range(0, len(data), chunk_length)]
+            try:
+                for future in as_completed(futures):
+                    matched.update(future.result())
+                    if len(matched) == state.word_count:  # Early exit
+                        break
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        return len(matched)
+
+    def scan_with_engine(self, text: Text) -> int:
+        """
+        Scan the given text with the configured engine, bypassing the result cache. See scan.
+
+        If stats are enabled, the scan is timed as part of the 'scan' phase.
+        """
+
+        stats = self.stats
+        if stats is None:
+            return self.run_engine(text)
+
+        started = perf_counter()
+        try:
+            return self.run_engine(text)
+        finally:
+            stats.add_time('scan', perf_counter() - started)
+
+    def run_engine(self, text: Text) -> int:
+        """
+        Dispatch a scan to the method of the configured engine.
+        """
+
+        if self.engine == 'length_major':
+            return self.scan_length_major(text)
+
+        if self.engine == 'rolling_hash':
+            return self.scan_rolling_hash(text)
+
+        if self.engine == 'endpoint_pruning':
+            return self.scan_endpoint_pruning(text)
+
+        if self.engine == 'numpy':
+            return numpy_backend.scan(text, self.get_numpy_index(self.state), self.stats)
+
+        if self.engine == 'compact':
+            return self.scan_compact(text)
+
+        if self.engine == 'automaton':
+            return self.scan_automaton(text)
+
+        return self.scan_naive(text)
+
+    def scan_matches(self, text: Text, state: Optional[IndexSnapshot] = None) -> Dict[int, int]:
+        """
+        Scan the given text and report which dictionary words it contains, and where.
+
+        Words are identified by the ids assigned by add_word. Positions are visited from left to right
+        and pruned with the endpoint index like in scan_endpoint_pruning, so the offset reported for a word
+        is the position of the first character of its leftmost occurrence. Works with every engine;
+        with the compact engine, windows are looked up in the compact index.
+
+        :param text: The text to be scanned for dictionary word occurrences, as a string or as ASCII bytes.
+        :param state: The snapshot to scan with, defaults to the current one.
+        :return: A dictionary mapping the id of every matched word to the offset of its first occurrence,
+                 in ascending order of offsets. Its length is the count returned by scan.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> for word in ('hello', 'world', 'abracadabra', 'hlelo'):
+        ...     matcher.add_word(word)
+        >>> matcher.scan_matches('ehllodlrowhelloworld')
+        {0: 10, 3: 10, 1: 15}
+        """
+
+        return self.scan_matches_until(text, None, state)[0]
+
+    def scan_matches_until(self, text: Text, deadline: Optional[float],
+                           state: Optional[IndexSnapshot] = None) -> Tuple[Dict[int, int], bool]:
+        """
+        Scan the given text like scan_matches, stopping at a deadline.
+
+        The deadline is checked cooperatively: the clock is read before the first position and then every
+        DEADLINE_CHECK_INTERVAL units of work, a unit being a position or the probe of a window in the index,
+        so that a scan overruns its deadline by a bounded amount of work even on lines where every window is probed.
+        The text is encoded before the first check, in time linear in its length, which only matters for texts
+        far longer than MAX_INPUT_LENGTH.
+
+        :param text: The text to be scanned for dictionary word occurrences, as a string or as ASCII bytes.
+        :param deadline: The time.monotonic() value at which to stop scanning, None to scan the whole text.
+        :param state: The snapshot to scan with, defaults to the current one.
+        :return: The words matched, see scan_matches, and whether the scan stopped at the deadline
+                 before reaching the end of the text.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_words(['hello', 'world'])
+        >>> matcher.scan_matches_until('hlelowrold', monotonic() + 60), matcher.scan_matches_until('hlelowrold', 0)
+        (({0: 0, 1: 5}, False), ({}, True))
+        """
+
+        state = state or self.state
+        data = ascii_bytes(text)
+        codes = list(data.translate(LETTER_CODES))
+        text_length = len(codes)
+        endpoint_index = self.get_endpoint_index(state)
+
+        compact_index = state.compact_index
+        if compact_index is None:
+            hash_index = self.get_hash_index(state)
+            starts, ends = window_probe_tables(codes)
+
+        first_offsets: Dict[int, int] = {}
+        seen = bytearray(state.next_word_id)  # Word ids already reported in this scan
+        probes = 0
+        next_check = 0 if deadline is not None else sys.maxsize  # Work done at the next read of the clock
+
+        for left_index, first_code in enumerate(codes):
+            if left_index + probes >= next_check:
+                if deadline is not None and monotonic() >= deadline:
+                    return first_offsets, True
+                next_check = left_index + probes + DEADLINE_CHECK_INTERVAL
+
+            for word_length, last_mask in endpoint_index[first_code]:
+                right_index = left_index + word_length
+                if right_index > text_length:
+                    break  # Lengths are sorted
+
+                last_code = codes[right_index - 1]
+                if not last_mask >> last_code & 1:
+                    continue
 
-        input_lines = []
+                probes += 1
+                word_ids: Sequence[int]
+                if compact_index is not None:
+                    inner = bytes(sorted(data[left_index + 1:right_index - 1]))
+                    word_ids = compact_index.find(first_code, last_code, word_length, inner)
+                else:
+                    entries = hash_index[word_length].get((starts[left_index] + ends[right_index]) & HASH_MASK)
+                    word_ids = self.window_word_ids(codes, left_index, word_length, entries) if entries else ()
 
-        with closing(open(input_path, 'r', encoding='utf-8')) as input_file:
-            for input_line in input_file:
-                input_lines.append(input_line.strip())
+                if word_ids and not seen[word_ids[0]]:
+                    mark_seen(seen, word_ids)
+                    first_offsets.update(dict.fromkeys(word_ids, left_index))
 
-        return self.scan_lines(input_lines)
+                    if len(first_offsets) == state.word_count:  # Early exit
+                        return first_offsets, False
 
-    def scan(self, text: str) -> int:
+        return first_offsets, False
+
+    def scan_naive(self, text: Text) -> int:
         """
-        Scan the given text and count the number of dictionary word occurrences.
+        Scan the given text position by position, sliding a window for every word length.
 
         The method implements a sliding window to count occurrences of each character in the window,
         compares the count against the stored dictionary counts, and returns count of matches.
 
         It also ensures that each dictionary word is only counted once per text scan.
 
-        :param text: The string of text to be scanned for dictionary word occurrences.
+        This is the reference engine: string text is validated character by character as it is scanned.
+        Bytes are validated in bulk and decoded first.
+
+        :param text: The text to be scanned for dictionary word occurrences, as a string or as ASCII bytes.
         :return: The total count of dictionary word matches found in the text.
 
         Usage:
         >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
         >>> matcher.add_word('hello')
         >>> matcher.add_word('world')
-        >>> matcher.scan('ehllodlrowhelloworld')
+        >>> matcher.scan_naive('ehllodlrowhelloworld')
+        2
+        >>> matcher.scan_naive(b'ehllodlrowhelloworld')
         2
         """
 
+        if not isinstance(text, str):
+            text = ascii_bytes(text).decode('ascii')
+
+        state = self.state
+        index = state.index
+
         matches = 0
+        probes = 0
         seen: Set[Tuple[Tuple[str, str], CharCountTable]] = set()
 
-        sliding_window_counts = self.init_sliding_windows(text)
+        sliding_window_counts = self.init_sliding_windows(text, state.word_lengths)
 
         for left_index, left_char in enumerate(text):
             validate_char(left_char)
 
-            for word_length in self.word_lengths:
+            for word_length in state.word_lengths:
                 right_index = left_index + word_length - 1
                 if right_index >= len(text):
-                    continue  # Potential optimization: we could break if self.word_lengths is sorted.
+                    continue  # Potential optimization: we could break if word_lengths is sorted.
                 right_char = text[right_index]
                 validate_char(right_char)
 
@@ -228,56 +1185,997 @@ class ScrambledWordMatcher:
                         window_counts[ord(sliding_in_char) - ord('a')] += 1
 
                 key = (left_char, right_char)
-                if key not in self.index:
+                if key not in index:
                     continue
 
                 # Create a tuple from the window counts for efficient comparison
+                probes += 1
                 candidate = tuple(window_counts)
-                if candidate in self.index[key] and (key, candidate) not in seen:
-                    matches += self.index[key][candidate]
+                if candidate in index[key] and (key, candidate) not in seen:
+                    matches += index[key][candidate]
                     seen.add((key, candidate))
 
-                    if len(seen) == self.word_count:  # Early exit
+                    if len(seen) == state.word_count:  # Early exit
+                        if self.stats is not None:
+                            windows = self.count_windows(len(text), state.word_lengths, left_index + 1)
+                            self.stats.record(characters=len(text), positions=left_index + 1, window_updates=windows,
+                                              endpoint_misses=windows - probes, probes=probes, hits=len(seen),
+                                              early_exit=True)
                         return matches
 
+        if self.stats is not None:
+            windows = self.count_windows(len(text), state.word_lengths, len(text))
+            self.stats.record(characters=len(text), positions=len(text), window_updates=windows,
+                              endpoint_misses=windows - probes, probes=probes, hits=len(seen))
         return matches
 
+    def scan_length_major(self, text: Text) -> int:
+        """
+        Scan the given text one word length at a time, in ascending order of lengths.
 
-    def scan_line(self, line_number_and_text: Tuple[int, str]) -> Tuple[int, int]:
+        The text is validated and encoded once. Windows of a length can only match if every letter occurs
+        in them at most as often as in some word of that length, see get_letter_caps. Runs of text between
+        barrier letters, letters of no word of the length, are found with a regular expression, and runs
+        shorter than the length are skipped outright. Within a run, a single window buffer grows on the right
+        and shrinks on the left: when a letter exceeds its cap, the window jumps past its previous occurrence,
+        so windows containing it are never built. Lengths longer than the text are skipped, and a candidate
+        tuple is only built when the window endpoints match a dictionary word of the current length.
+
+        :param text: The string of text to be scanned for dictionary word occurrences.
+        :return: The total count of dictionary word matches found in the text.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('hello')
+        >>> matcher.add_word('world')
+        >>> matcher.add_word('abracadabra')
+        >>> matcher.scan_length_major('ehllodlrowhelloworld')
+        2
+        """
+
+        state = self.state
+        data = ascii_bytes(text)
+        codes = list(data.translate(LETTER_CODES))
+        text_length = len(codes)
+        length_index = self.get_length_index(state)
+        letter_caps = self.get_letter_caps(state)
+
+        matches = 0
+        windows = updates = probes = hits = 0
+        seen = bytearray(state.next_word_id)  # Word ids already counted in this scan
+
+        for word_length in sorted(length_index):
+            if word_length > text_length:
+                break
+
+            endpoints = length_index[word_length]
+            caps, runs = letter_caps[word_length]
+            last_offset = word_length - 1
+
+            for run in runs.finditer(data):
+                left_index, run_end = run.span()
+                updates += run_end - left_index
+                window = [0] * ALPHABET_SIZE
+
+                for right_index in range(left_index, run_end):
+                    code = codes[right_index]
+                    window[code] += 1
+                    if window[code] > caps[code]:  # Jump past the previous occurrence of the letter
+                        while True:
+                            dropped = codes[left_index]
+                            window[dropped] -= 1
+                            left_index += 1
+                            if dropped == code:
+                                break
+                        continue
+
+                    if right_index - left_index < last_offset:
+                        continue
+
+                    windows += 1
+                    signatures = endpoints.get(codes[left_index] * ALPHABET_SIZE + code)
+                    if signatures is not None:
+                        probes += 1
+                        word_ids = signatures.get(tuple(window))
+                        if word_ids and not seen[word_ids[0]]:
+                            matches += mark_seen(seen, word_ids)
+                            hits += 1
+
+                            if matches == state.word_count:  # Early exit
+                                if self.stats is not None:
+                                    self.stats.record(characters=text_length, positions=windows,
+                                                      window_updates=updates, endpoint_misses=windows - probes,
+                                                      probes=probes, hits=hits, early_exit=True)
+                                return matches
+
+                    window[codes[left_index]] -= 1
+                    left_index += 1
+
+        if self.stats is not None:
+            self.stats.record(characters=text_length, positions=windows, window_updates=updates,
+                              endpoint_misses=windows - probes, probes=probes, hits=hits)
+        return matches
+
+    def get_letter_caps(self, state: Optional[IndexSnapshot] = None) -> LetterCaps:
+        """
+        Return the letter caps of every word length, building them if needed.
+
+        The cap of a letter for a length is its maximum count in the words of that length: a window holding
+        more of a letter cannot match. Letters with a cap of 0 are barriers: the run pattern of a length
+        matches the runs of at least that many letters without barriers.
+
+        :param state: The snapshot to build the caps for, defaults to the current one.
+        :return: A mapping of word length to the caps by letter code and the compiled run pattern.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_words(['abba', 'abca', 'xyz'])
+        >>> caps, runs = matcher.get_letter_caps()[4]
+        >>> caps[:4], runs.pattern
+        ([2, 2, 1, 0], b'[abc]{4,}')
+        >>> [run.group() for run in runs.finditer(b'abcabdaabbccxaaa')]
+        [b'abcab', b'aabbcc']
+        """
+
+        state = state or self.state
+        derived = state.derived
+        if derived.letter_caps is None:
+            letter_caps: LetterCaps = {}
+            for word_length, endpoints in self.get_length_index(state).items():
+                caps = [0] * ALPHABET_SIZE
+                for signatures in endpoints.values():
+                    for signature in signatures:
+                        caps = list(map(max, caps, signature))
+                letters = bytes(ord('a') + code for code, cap in enumerate(caps) if cap)
+                runs = re.compile(b'[%s]{%d,}' % (letters, word_length))
+                letter_caps[word_length] = (caps, runs)
+            derived.letter_caps = letter_caps
+
+        return derived.letter_caps
+
+    def get_length_index(self, state: Optional[IndexSnapshot] = None) -> LengthIndex:
+        """
+        Return the index regrouped by word length and integer endpoint code, building it if needed.
+
+        :param state: The snapshot to build the index for, defaults to the current one.
+        :return: A mapping of word length to endpoint code (first * ALPHABET_SIZE + last) to signature word ids.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('ab')
+        >>> matcher.add_word('ba')
+        >>> length_index = matcher.get_length_index()
+        >>> sorted(length_index[2])
+        [1, 26]
+        >>> length_index[2][1][counting_sort_chars('ab')]
+        (0,)
+        """
+
+        state = state or self.state
+        derived = state.derived
+        if derived.length_index is None:  # Concurrent scans may both build it, either result is correct
+            a_ord = ord('a')
+            length_index: LengthIndex = defaultdict(dict)
+            for (first, last), signatures in state.word_ids.items():
+                key = (ord(first) - a_ord) * ALPHABET_SIZE + ord(last) - a_ord
+                for signature, word_ids in signatures.items():
+                    length_index[sum(signature)].setdefault(key, {})[signature] = word_ids
+            derived.length_index = dict(length_index)
+
+        return derived.length_index
+
+    def scan_rolling_hash(self, text: Text) -> int:
+        """
+        Scan the given text one word length at a time, identifying windows by a rolling multiset hash.
+
+        The multiset hash of every prefix of the text is computed once, so the hash of any window
+        is the difference of two prefix hashes: the O(1) equivalent of adding the character sliding in
+        and subtracting the one sliding out. The endpoint hashes are folded into the prefix arrays,
+        so a window's probe hash costs a single addition, and all probes of a length are matched
+        against the hash index with one set intersection.
+        The window counts are only computed and compared against the dictionary signature when a probe hits,
+        so hash collisions never produce false matches.
+
+        :param text: The string of text to be scanned for dictionary word occurrences.
+        :return: The total count of dictionary word matches found in the text.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('hello')
+        >>> matcher.add_word('world')
+        >>> matcher.add_word('abracadabra')
+        >>> matcher.scan_rolling_hash('ehllodlrowhelloworld')
+        2
+        """
+
+        state = self.state
+        codes = encode_chars(text)
+        text_length = len(codes)
+        hash_index = self.get_hash_index(state)
+
+        matches = 0
+        hits = 0
+        seen = bytearray(state.next_word_id)  # Word ids already counted in this scan
+
+        starts, ends = window_probe_tables(codes)
+        mask = HASH_MASK.__and__
+
+        for word_length in sorted(hash_index):
+            if word_length > text_length:
+                break
+
+            probes = hash_index[word_length]
+            window_probes = list(map(mask, map(add, starts, ends[word_length:])))
+
+            for probe in probes.keys() & window_probes:
+                entries = probes[probe]
+                left_index = window_probes.index(probe)
+
+                while True:
+                    found = self.match_window(codes, left_index, word_length, entries, seen)
+                    if found:
+                        matches += found
+                        hits += 1
+                    if matches == state.word_count:  # Early exit
+                        if self.stats is not None:  # Every window of the current length was probed
+                            windows = self.count_windows(text_length, hash_index, text_length, word_length)
+                            self.stats.record(characters=text_length, positions=windows, window_updates=windows,
+                                              endpoint_misses=0, probes=windows, hits=hits, early_exit=True)
+                        return matches
+
+                    if all(seen[word_ids[0]] for _, _, word_ids in entries):
+                        break
+
+                    try:  # Hash collision: look for the next window with the same probe
+                        left_index = window_probes.index(probe, left_index + 1)
+                    except ValueError:
+                        break
+
+        if self.stats is not None:
+            windows = self.count_windows(text_length, hash_index, text_length)
+            self.stats.record(characters=text_length, positions=windows, window_updates=windows,
+                              endpoint_misses=0, probes=windows, hits=hits)
+        return matches
+
+    def scan_endpoint_pruning(self, text: Text) -> int:
+        """
+        Scan the given text position by position, only visiting lengths that can match the window endpoints.
+
+        For the letter at each position, the endpoint index lists the word lengths of dictionary words
+        starting with that letter, together with a bitmask of their last letters. Lengths whose last letter
+        is not in the bitmask are skipped without computing anything for their window; the remaining windows
+        are probed with O(1) prefix hashes, as in scan_rolling_hash.
+
+        :param text: The string of text to be scanned for dictionary word occurrences.
+        :return: The total count of dictionary word matches found in the text.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('hello')
+        >>> matcher.add_word('world')
+        >>> matcher.add_word('abracadabra')
+        >>> matcher.scan_endpoint_pruning('ehllodlrowhelloworld')
+        2
+        """
+
+        state = self.state
+        codes = encode_chars(text)
+        text_length = len(codes)
+        hash_index = self.get_hash_index(state)
+        endpoint_index = self.get_endpoint_index(state)
+
+        matches = 0
+        probes = hits = 0
+        seen = bytearray(state.next_word_id)  # Word ids already counted in this scan
+
+        starts, ends = window_probe_tables(codes)
+
+        for left_index, first_code in enumerate(codes):
+            start = starts[left_index]
+
+            for word_length, last_mask in endpoint_index[first_code]:
+                right_index = left_index + word_length
+                if right_index > text_length:
+                    break  # Lengths are sorted
+
+                if not last_mask >> codes[right_index - 1] & 1:
+                    continue
+
+                probes += 1
+                entries = hash_index[word_length].get((start + ends[right_index]) & HASH_MASK)
+                if entries is None:
+                    continue
+
+                found = self.match_window(codes, left_index, word_length, entries, seen)
+                if found:
+                    matches += found
+                    hits += 1
+                    if matches == state.word_count:  # Early exit
+                        if self.stats is not None:
+                            self.record_endpoint_scan(codes, endpoint_index, left_index + 1, probes, hits, True)
+                        return matches
+
+        if self.stats is not None:
+            self.record_endpoint_scan(codes, endpoint_index, text_length, probes, hits)
+        return matches
+
+    def scan_compact(self, text: Text) -> int:
+        """
+        Scan the given text against the compact index, visiting only lengths that can match the window endpoints.
+
+        Positions and lengths are pruned with the endpoint index like in scan_endpoint_pruning.
+        The remaining windows are looked up by their sorted inner letters in the fixed-width
+        records of their (first, last, length) bucket.
+
+        :param text: The string of text to be scanned for dictionary word occurrences.
+        :return: The total count of dictionary word matches found in the text.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'), engine='compact')
+        >>> matcher.add_word('hello')
+        >>> matcher.add_word('world')
+        >>> matcher.add_word('abracadabra')
+        >>> matcher.scan_compact('ehllodlrowhelloworld')
+        2
+        """
+
+        state = self.state
+        compact_index = state.compact_index
+        assert compact_index is not None, 'The compact index is only available with the compact engine'
+
+        data = ascii_bytes(text)
+        codes = list(data.translate(LETTER_CODES))
+        text_length = len(codes)
+        endpoint_index = self.get_endpoint_index(state)
+
+        matches = 0
+        probes = hits = 0
+        seen = bytearray(state.next_word_id)  # Word ids already counted in this scan
+
+        for left_index, first_code in enumerate(codes):
+            for word_length, last_mask in endpoint_index[first_code]:
+                right_index = left_index + word_length
+                if right_index > text_length:
+                    break  # Lengths are sorted
+
+                last_code = codes[right_index - 1]
+                if not last_mask >> last_code & 1:
+                    continue
+
+                probes += 1
+                inner = bytes(sorted(data[left_index + 1:right_index - 1]))
+                word_ids = compact_index.find(first_code, last_code, word_length, inner)
+                if word_ids and not seen[word_ids[0]]:
+                    matches += mark_seen(seen, word_ids)
+                    hits += 1
+
+                    if matches == state.word_count:  # Early exit
+                        if self.stats is not None:
+                            self.record_endpoint_scan(codes, endpoint_index, left_index + 1, probes, hits, True)
+                        return matches
+
+        if self.stats is not None:
+            self.record_endpoint_scan(codes, endpoint_index, text_length, probes, hits)
+        return matches
+
+    def scan_automaton(self, text: Text) -> int:
+        """
+        Scan the given text by walking the permuted pattern automaton of the dictionary from every position.
+
+        A walk starts at the root of the letter at its position and reads the following letters, checking
+        at every node whether the next letter ends a word whose inner letters were just read. It stops as soon
+        as the letters read are not contained in the inner letters of any word with that first letter, so
+        every position costs a few steps on most texts, whatever the number of distinct word lengths.
+
+        :param text: The string of text to be scanned for dictionary word occurrences.
+        :return: The total count of dictionary word matches found in the text.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'), engine='automaton')
+        >>> matcher.add_word('hello')
+        >>> matcher.add_word('world')
+        >>> matcher.add_word('abracadabra')
+        >>> matcher.scan_automaton('ehllodlrowhelloworld')
+        2
+        """
+
+        state = self.state
+        codes = encode_chars(text)
+        text_length = len(codes)
+        automaton = self.get_automaton(state)
+        step = automaton.step
+        walk_length = automaton.max_word_length - 1  # Letters read after the first one
+
+        matches = 0
+        probes = hits = 0
+        seen = bytearray(state.next_word_id)  # Word ids already counted in this scan
+
+        for left_index, first_code in enumerate(codes):
+            node = automaton.roots[first_code]
+            if node is None:
+                continue  # No word starts with this letter
+
+            for code in codes[left_index + 1:left_index + 1 + walk_length]:
+                accepts = node.accepts
+                if accepts is not None:
+                    probes += 1
+                    word_ids = accepts.get(code)
+                    if word_ids and not seen[word_ids[0]]:
+                        matches += mark_seen(seen, word_ids)
+                        hits += 1
+
+                        if matches == state.word_count:  # Early exit
+                            if self.stats is not None:
+                                self.record_automaton_scan(codes, automaton, left_index + 1, probes, hits, True)
+                            return matches
+
+                child = node.children[code]
+                node = child if child is not UNBUILT else step(node, code)
+                if node is None:
+                    break
+
+        if self.stats is not None:
+            self.record_automaton_scan(codes, automaton, text_length, probes, hits)
+        return matches
+
+    @staticmethod
+    def count_windows(text_length: int, word_lengths: Iterable[int], positions: int,
+                      last_length: Optional[int] = None) -> int:
         """
-        Scan a single line of text and return the line number and count of matched words.
+        Count the windows slid over by a scan from its loop bounds, for scan statistics.
+
+        :param text_length: The length of the scanned text.
+        :param word_lengths: The word lengths the scan slides a window for.
+        :param positions: The number of start positions visited for every length, or for last_length only.
+        :param last_length: For scans sweeping lengths in ascending order, the length the scan stopped at:
+                            shorter lengths were swept over the whole text, longer ones not at all.
+        :return: The number of windows.
+
+        Usage:
+        >>> ScrambledWordMatcher.count_windows(10, [2, 3], 10), ScrambledWordMatcher.count_windows(10, [2, 3], 4)
+        (17, 8)
+        >>> ScrambledWordMatcher.count_windows(10, [2, 3, 12], 4, last_length=3)
+        13
+        """
+
+        windows = 0
+        for word_length in word_lengths:
+            window_count = max(0, text_length - word_length + 1)
+            if last_length is None or word_length == last_length:
+                windows += min(window_count, positions)
+            elif word_length < last_length:
+                windows += window_count
+        return windows
+
+    def record_automaton_scan(self, codes: List[int], automaton: PermutedPatternAutomaton, positions: int,
+                              probes: int, hits: int, early_exit: bool = False) -> None:
+        """
+        Record the statistics of a scan walking the automaton, see scan_automaton.
+
+        The steps of the walks are counted by walking the automaton again, so that the scan itself only counts
+        probes of accepting nodes. Start positions whose letter starts no word count as endpoint misses.
+
+        :param codes: The encoded text.
+        :param automaton: The automaton the scan walked.
+        :param positions: The number of start positions visited.
+        :param probes: The number of accepting nodes checked.
+        :param hits: The number of windows matching words for the first time.
+        :param early_exit: Whether the scan stopped as soon as every word was matched.
+        """
+
+        assert self.stats is not None, 'Scan statistics are not enabled'
+        walk_length = automaton.max_word_length - 1
+        steps = misses = 0
+        for left_index in range(positions):
+            node = automaton.roots[codes[left_index]]
+            if node is None:
+                misses += 1
+                continue
+
+            for code in codes[left_index + 1:left_index + 1 + walk_length]:
+                steps += 1
+                node = automaton.step(node, code)
+                if node is None:
+                    break
+
+        self.stats.record(characters=len(codes), positions=positions, window_updates=steps,
+                          endpoint_misses=misses, probes=probes, hits=hits, early_exit=early_exit)
+
+    def record_endpoint_scan(self, codes: List[int], endpoint_index: EndpointIndex, positions: int,
+                             probes: int, hits: int, early_exit: bool = False) -> None:
+        """
+        Record the statistics of a scan pruned with the endpoint index, see scan_endpoint_pruning.
+
+        The windows whose endpoints were checked are counted again from the endpoint index, so that
+        the scan itself only counts probes; only the probed windows are computed.
+
+        :param codes: The encoded text.
+        :param endpoint_index: The endpoint index the scan was pruned with.
+        :param positions: The number of start positions visited.
+        :param probes: The number of windows probed.
+        :param hits: The number of windows matching words for the first time.
+        :param early_exit: Whether the scan stopped as soon as every word was matched.
+        """
+
+        assert self.stats is not None, 'Scan statistics are not enabled'
+        text_length = len(codes)
+        checked = 0
+        for left_index in range(positions):
+            remaining = text_length - left_index
+            checked += sum(1 for word_length, _ in endpoint_index[codes[left_index]] if word_length <= remaining)
+
+        self.stats.record(characters=text_length, positions=positions, window_updates=probes,
+                          endpoint_misses=checked - probes, probes=probes, hits=hits, early_exit=early_exit)
+
+    def match_window(self, codes: List[int], left_index: int, word_length: int,
+                     entries: List[HashEntry], seen: bytearray) -> int:
+        """
+        Verify a window whose probe hash hit the hash index, and count the words it matches for the first time.
+
+        :param codes: The encoded text.
+        :param left_index: The position of the first character of the window.
+        :param word_length: The length of the window.
+        :param entries: The hash index entries sharing the window's probe hash.
+        :param seen: The bitset of word ids already counted in this scan; updated in place.
+        :return: The number of dictionary words matched by the window that were not seen before.
+        """
+
+        word_ids = self.window_word_ids(codes, left_index, word_length, entries)
+        if not word_ids or seen[word_ids[0]]:
+            return 0
+
+        return mark_seen(seen, word_ids)
+
+    @staticmethod
+    def window_word_ids(codes: List[int], left_index: int, word_length: int, entries: List[HashEntry]) -> WordIds:
+        """
+        Verify a window whose probe hash hit the hash index, and return the ids of the words it matches.
+
+        :param codes: The encoded text.
+        :param left_index: The position of the first character of the window.
+        :param word_length: The length of the window.
+        :param entries: The hash index entries sharing the window's probe hash.
+        :return: The ids of the dictionary words matched by the window, empty on a hash collision.
+        """
+
+        window = [0] * ALPHABET_SIZE
+        for code in codes[left_index:left_index + word_length]:
+            window[code] += 1
+        candidate = tuple(window)
+        key = codes[left_index] * ALPHABET_SIZE + codes[left_index + word_length - 1]
+
+        for endpoint, signature, word_ids in entries:
+            if endpoint == key and signature == candidate:
+                return word_ids
+
+        return ()
+
+    def get_endpoint_index(self, state: Optional[IndexSnapshot] = None) -> EndpointIndex:
+        """
+        Return the endpoint index keyed by first letter code, building it if needed.
+
+        For every first letter, the index lists (word length, last letter bitmask) pairs sorted by length,
+        one pair per length that has at least one word starting with that letter. Bit c of the bitmask is set
+        if a word of that length ends with the letter of code c, so each length holds a 26x26 bit matrix.
+
+        :param state: The snapshot to build the index for, defaults to the current one.
+        :return: A list of ALPHABET_SIZE lists of (word length, last letter bitmask) pairs.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('abc')
+        >>> matcher.add_word('ab')
+        >>> matcher.add_word('ad')
+        >>> endpoint_index = matcher.get_endpoint_index()
+        >>> [(word_length, bin(last_mask)) for word_length, last_mask in endpoint_index[0]]
+        [(2, '0b1010'), (3, '0b100')]
+        >>> endpoint_index[1]
+        []
+        """
+
+        state = state or self.state
+        derived = state.derived
+        if derived.endpoint_index is not None:
+            return derived.endpoint_index
+
+        if state.compact_index is not None:
+            derived.endpoint_index = state.compact_index.endpoint_masks()
+            return derived.endpoint_index
+
+        length_index = self.get_length_index(state)
+        endpoint_index: EndpointIndex = [[] for _ in range(ALPHABET_SIZE)]
+        for word_length in sorted(length_index):
+            last_masks = [0] * ALPHABET_SIZE
+            for key in length_index[word_length]:
+                first_code, last_code = divmod(key, ALPHABET_SIZE)
+                last_masks[first_code] |= 1 << last_code
+            for first_code, last_mask in enumerate(last_masks):
+                if last_mask:
+                    endpoint_index[first_code].append((word_length, last_mask))
+        derived.endpoint_index = endpoint_index
+
+        return endpoint_index
+
+    def get_automaton(self, state: Optional[IndexSnapshot] = None) -> PermutedPatternAutomaton:
+        """
+        Return the permuted pattern automaton of the dictionary, building its roots if needed.
+
+        :param state: The snapshot to build the automaton for, defaults to the current one.
+        :return: A PermutedPatternAutomaton built from the length index; its other nodes are built by scans.
+        """
+
+        state = state or self.state
+        derived = state.derived
+        if derived.automaton is None:
+            derived.automaton = PermutedPatternAutomaton(self.get_length_index(state))
+
+        return derived.automaton
+
+    def get_numpy_index(self, state: Optional[IndexSnapshot] = None) -> numpy_backend.NumpyIndex:
+        """
+        Return the hash index arranged into arrays for the NumPy engine, building it if needed.
+
+        :param state: The snapshot to build the index for, defaults to the current one.
+        :return: A NumpyIndex built from the hash index.
+        """
+
+        state = state or self.state
+        derived = state.derived
+        if derived.numpy_index is None:
+            hash_index = self.get_hash_index(state)
+            derived.numpy_index = numpy_backend.NumpyIndex(hash_index, state.word_count, state.next_word_id)
+
+        return derived.numpy_index
+
+    def get_hash_index(self, state: Optional[IndexSnapshot] = None) -> HashIndex:
+        """
+        Return the index regrouped by word length and probe hash, building it if needed.
+
+        The probe hash of a dictionary entry is its multiset hash plus the hashes of its first and last letters.
+        Entries sharing a probe hash (hash collisions) are kept in a list and told apart on verification.
+
+        :param state: The snapshot to build the index for, defaults to the current one.
+        :return: A mapping of word length to probe hash to (endpoint code, signature, word ids) entries.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('ab')
+        >>> matcher.add_word('ba')
+        >>> hash_index = matcher.get_hash_index()
+        >>> len(hash_index[2])
+        2
+        >>> sorted(endpoint for entries in hash_index[2].values() for endpoint, _, _ in entries)
+        [1, 26]
+        """
+
+        state = state or self.state
+        derived = state.derived
+        if derived.hash_index is None:
+            hash_index: HashIndex = {}
+            for word_length, endpoints in self.get_length_index(state).items():
+                probes: Dict[int, List[HashEntry]] = defaultdict(list)
+                for key, signatures in endpoints.items():
+                    first_code, last_code = divmod(key, ALPHABET_SIZE)
+                    endpoint_hash = FIRST_LETTER_HASHES[first_code] + LAST_LETTER_HASHES[last_code]
+                    for signature, word_ids in signatures.items():
+                        probe = (multiset_hash(signature) + endpoint_hash) & HASH_MASK
+                        probes[probe].append((key, signature, word_ids))
+                hash_index[word_length] = dict(probes)
+            derived.hash_index = hash_index
+
+        return derived.hash_index
+
+    def scan_line(self, line_number_and_text: Tuple[int, Text]) -> Tuple[int, int]:
+        """
+        Scan a single line of text, bypassing the result cache, and return the line number and count of matched words.
 
         :param line_number_and_text: A tuple containing the line number and the text to scan.
         :return: A tuple of the line number and the number of matches found.
         """
         line_number, text = line_number_and_text
-        return line_number, self.scan(text)
+        return line_number, self.scan_with_engine(text)
+
+    def scan_chunk(self, lines: Sequence[Text]) -> List[int]:
+        """
+        Scan a chunk of lines in the calling thread, bypassing the result cache, returning their counts in order.
+        """
 
+        return [self.scan_with_engine(line) for line in lines]
 
-    def scan_lines(self, lines: List[str]) -> List[int]:
+    def scan_chunk_within(self, lines: Sequence[Text], line_timeout: Optional[float],
+                          deadline: Optional[float]) -> List[ScanResult]:
         """
-        Scan a list of lines in parallel, returning a list of tuples with line numbers and match counts.
+        Scan a chunk of lines in the calling thread with deadlines, bypassing the result cache, see scan_lines_within.
 
-        :param lines: A list of text lines to scan.
-        :return: A list of tuples, each containing a line number and the count of matches for that line.
+        Every line stops at the earlier of its own deadline, line_timeout seconds after it starts,
+        and the deadline of the batch.
         """
-        # Tuple of line number and line text
-        numbered_lines = list(enumerate(lines, start=1))
 
+        state = self.state
         results = []
-        with ThreadPoolExecutor() as executor:
-            # Start the load operations and mark each future with its line number
-            future_to_line = {executor.submit(self.scan_line, line): line for line in numbered_lines}
-            for future in as_completed(future_to_line):
-                line = future_to_line[future]
-                line_number, count = future.result()
-                results.append((line_number, count))
+        for line in lines:
+            line_deadline = deadline
+            if line_timeout is not None:
+                line_deadline = monotonic() + line_timeout
+                if deadline is not None:
+                    line_deadline = min(line_deadline, deadline)
+
+            with self.timed('scan'):
+                matched, partial = self.scan_matches_until(line, line_deadline, state)
+            results.append(ScanResult(len(matched), partial))
+        return results
+
+    def words_by_id(self) -> List[Optional[str]]:
+        """
+        Return the words of the dictionary indexed by word id, None for the ids of removed words.
+
+        :raises ValueError: With the compact engine, which does not keep the words, only their ids;
+                            the id of a word imported from a dictionary file is its zero-based line number.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_words(['spam', 'eggs', 'ham'])
+        >>> matcher.remove_word('eggs')
+        >>> matcher.words_by_id()
+        ['spam', None, 'ham']
+        """
+
+        state = self.state
+        if state.compact_index is not None:
+            raise ValueError('The compact engine does not keep the words of the dictionary')
+
+        words: List[Optional[str]] = [None] * state.next_word_id
+        for key, signatures in state.word_ids.items():
+            for signature, word_ids in signatures.items():
+                for word_id, word in zip(word_ids, state.words[key][signature]):
+                    words[word_id] = word
+        return words
+
+    def count_chunk(self, lines: Sequence[Text]) -> List[int]:
+        """
+        Count the lines of a chunk every dictionary word appears in, see count_corpus.
+
+        :param lines: The lines to scan.
+        :return: A flat list of line counts, indexed by word id.
+        """
+
+        state = self.state
+        counts = [0] * state.next_word_id
+        for line in lines:
+            for word_id in self.scan_matches(line, state):
+                counts[word_id] += 1
+        return counts
+
+    def count_corpus(self, lines: Iterable[Text], executor: Optional[str] = None, workers: Optional[int] = None,
+                     chunk_size: int = CORPUS_CHUNK_SIZE) -> List[int]:
+        """
+        Count how many lines of a corpus every dictionary word appears in, in one parallel pass.
+
+        Lines are read lazily and sent to the worker pool of the matcher (see get_pool) in chunks, each counted
+        into a flat list indexed by word id by count_chunk, and the lists of the chunks are added up as they
+        complete. At most PROCESS_CHUNKS_PER_WORKER chunks per worker are in flight, so the corpus is never held
+        in memory at once. Each chunk is counted against the dictionary that is current when it starts, and
+        the result cache is not used, as it only holds the number of words matched by each line.
+        Use top_counts to rank the words.
+
+        :param lines: The lines of the corpus, as strings or as ASCII bytes, in any iterable.
+        :param executor: The kind of worker pool, one of EXECUTORS, defaults to the matcher's.
+        :param workers: The number of workers, defaults to the matcher's.
+        :param chunk_size: The number of lines per task.
+        :return: The number of lines every word appears in, indexed by word id; removed words appear in none.
+        :raises ValueError: If the executor is unknown.
+        :raises InputValidationError: If a line contains a symbol that is not a lowercase English letter.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_words(['spam', 'eggs', 'ham'])
+        >>> counts = matcher.count_corpus(['sapmeggs', 'hamspam', 'spamspam', 'egsg'], chunk_size=2)
+        >>> counts, top_counts(counts, k=2)
+        ([3, 1, 1], [(0, 3), (1, 1)])
+        """
+
+        executor = executor or self.executor
+        if executor not in EXECUTORS:
+            raise ValueError(f'Unknown executor: {executor}')
+
+        workers = workers or self.workers or default_workers(executor)
+        count_chunk = _count_chunk_in_process_worker if executor == 'process' else self.count_chunk
+        totals = [0] * self.state.next_word_id
+        in_flight: Set[Future] = set()
+        line_iterator = iter(lines)
+
+        try:
+            while chunk := list(islice(line_iterator, chunk_size)):
+                if executor == 'process':
+                    chunk = [line if isinstance(line, (str, bytes)) else bytes(line)  # Memoryviews cannot be pickled
+                             for line in chunk]
+                with self.pools_lock:  # Process pools are replaced when the dictionary changes
+                    in_flight.add(self.get_pool(executor, workers).submit(count_chunk, chunk))
+
+                if len(in_flight) >= workers * PROCESS_CHUNKS_PER_WORKER:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        totals = merge_counts(totals, future.result())
+
+            for future in as_completed(in_flight):
+                totals = merge_counts(totals, future.result())
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+        return totals
+
+    def scan_lines(self, lines: Sequence[Text], executor: Optional[str] = None, workers: Optional[int] = None,
+                   chunk_size: Optional[int] = None) -> List[int]:
+        """
+        Scan a list of lines in parallel, returning the count of matches for every line in order.
+
+        Identical lines are only scanned once per batch, and lines found in the result cache are not scanned at all.
+        The other lines are split into chunks of consecutive lines, and each chunk is scanned as a single task
+        by the long-lived worker pool of the matcher (see get_pool), so that tasks are few and results come back
+        in order without being sorted.
+        With the 'thread' executor, lines are scanned by a thread pool sharing this matcher.
+        With the 'process' executor, an index snapshot is sent once to every worker process,
+        which builds its own matcher from it, so that scanning is not bound by the GIL
+        and the dictionary is not pickled again for every chunk.
+
+        :param lines: A list of text lines to scan.
+        :param executor: The kind of worker pool, one of EXECUTORS, defaults to the matcher's.
+        :param workers: The number of workers, defaults to the matcher's.
+        :param chunk_size: The number of lines per task, defaults to splitting the lines into
+                           PROCESS_CHUNKS_PER_WORKER chunks per worker.
+        :return: A list with the count of matches for every line.
+        :raises ValueError: If the executor is unknown.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('spam')
+        >>> matcher.scan_lines(['sapm', 'maps', 'spam'], executor='process', workers=2)
+        [1, 0, 1]
+        >>> matcher.close()
+        """
+
+        results = self.scan_lines_within(lines, executor=executor, workers=workers, chunk_size=chunk_size)
+        return [result.matches for result in results]
+
+    def scan_lines_within(self, lines: Sequence[Text], timeout: Optional[float] = None,
+                          line_timeout: Optional[float] = None, executor: Optional[str] = None,
+                          workers: Optional[int] = None, chunk_size: Optional[int] = None) -> List[ScanResult]:
+        """
+        Scan a list of lines in parallel like scan_lines, within a deadline for the batch and for every line.
+
+        Without timeouts, lines are scanned with the configured engine, see scan_lines. With timeouts, they are
+        scanned like scan_within, and every line stops at the earlier of its own deadline, line_timeout seconds
+        after its scan starts, and the deadline of the batch, timeout seconds after the call. When the batch
+        deadline passes, the chunks that have not started are cancelled and their lines get partial counts of 0,
+        and the chunks being scanned stop by themselves at their next check of the deadline, so a few
+        pathological lines cannot hold the batch. Partial counts are not cached.
+
+        :param lines: A list of text lines to scan.
+        :param timeout: The number of seconds the batch may take, None for no batch deadline.
+        :param line_timeout: The number of seconds the scan of each line may take, None for no line deadline.
+        :param executor: The kind of worker pool, one of EXECUTORS, defaults to the matcher's.
+        :param workers: The number of workers, defaults to the matcher's.
+        :param chunk_size: The number of lines per task, see scan_lines.
+        :return: A list with the count of matches for every line, and whether it is partial.
+        :raises ValueError: If the executor is unknown.
+
+        Usage:
+        >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+        >>> matcher.add_word('spam')
+        >>> [result.matches for result in matcher.scan_lines_within(['sapm', 'maps', 'spam'], timeout=60)]
+        [1, 0, 1]
+        >>> any(result.partial for result in matcher.scan_lines_within(['sapm', 'maps'], line_timeout=0))
+        True
+        >>> matcher.close()
+        """
+
+        executor = executor or self.executor
+        if executor not in EXECUTORS:
+            raise ValueError(f'Unknown executor: {executor}')
+
+        deadline = monotonic() + timeout if timeout is not None else None
+        version = self.dictionary_version
+        keys = [line_key(line) for line in lines]
+        unique_lines = dict(zip(keys, lines))
+
+        results: Dict[Hashable, ScanResult] = {}
+        if self.result_cache is not None:
+            for key in unique_lines:
+                matches = self.result_cache.get((key, version))
+                if matches is not None:
+                    results[key] = ScanResult(matches)
+
+        pending_keys = [key for key in unique_lines if key not in results]
+        pending_lines = [unique_lines[key] for key in pending_keys]
+
+        if not pending_lines:  # Do not start a worker pool when every line is cached
+            pending_results: List[ScanResult] = []
+        elif deadline is not None or line_timeout is not None:
+            pending_results = self.scan_chunks_within(executor, pending_lines, workers, chunk_size,
+                                                      line_timeout, deadline)
+        elif executor == 'process':
+            pending_results = list(map(ScanResult, self.scan_lines_in_processes(pending_lines, workers, chunk_size)))
+        else:
+            pending_results = list(map(ScanResult, self.scan_lines_in_threads(pending_lines, workers, chunk_size)))
+
+        for key, result in zip(pending_keys, pending_results):
+            results[key] = result
+            if self.result_cache is not None and not result.partial:
+                self.result_cache.put((key, version), result.matches)
+
+        return [results[key] for key in keys]
+
+    def scan_lines_in_threads(self, lines: Sequence[Text], workers: Optional[int] = None,
+                              chunk_size: Optional[int] = None) -> List[int]:
+        """
+        Scan a list of lines with the thread pool of the matcher, returning the count of matches for every line in order.
+
+        :param lines: A list of text lines to scan.
+        :param workers: The number of worker threads, defaults to the matcher's.
+        :param chunk_size: The number of lines per task, see scan_lines.
+        :return: A list with the count of matches for every line.
+        """
+
+        return self.scan_chunks_in_pool('thread', self.scan_chunk, lines, workers, chunk_size)
+
+    def scan_lines_in_processes(self, lines: Sequence[Text], workers: Optional[int] = None,
+                                chunk_size: Optional[int] = None) -> List[int]:
+        """
+        Scan a list of lines with the process pool of the matcher, returning the count of matches for every line in order.
 
-        # Sort the results by line number to maintain original order
-        return [matches for line_number, matches in sorted(results, key=itemgetter(0))]
+        :param lines: A list of text lines to scan.
+        :param workers: The number of worker processes, defaults to the matcher's.
+        :param chunk_size: The number of lines per task, see scan_lines.
+        :return: A list with the count of matches for every line.
+        """
 
+        return self.scan_chunks_in_pool('process', _scan_chunk_in_process_worker, lines, workers, chunk_size)
 
-    def init_sliding_windows(self, text: str) -> Dict[int, List[int]]:
+    def scan_chunks_in_pool(self, executor: str, scan_chunk: Callable[[Sequence[Text]], List[int]],
+                            lines: Sequence[Text], workers: Optional[int], chunk_size: Optional[int]) -> List[int]:
+        """
+        Split lines into chunks and scan them with a pool of the matcher, see scan_lines.
+        """
+
+        workers = workers or self.workers or default_workers(executor)
+        chunk_size = chunk_size or max(1, len(lines) // (workers * PROCESS_CHUNKS_PER_WORKER))
+        chunks = [lines[start:start + chunk_size] for start in range(0, len(lines), chunk_size)]
+
+        with self.pools_lock:  # Pool.map submits every chunk before returning
+            chunk_results = self.get_pool(executor, workers).map(scan_chunk, chunks)
+        return [matches for results in chunk_results for matches in results]
+
+    def scan_chunks_within(self, executor: str, lines: Sequence[Text], workers: Optional[int],
+                           chunk_size: Optional[int], line_timeout: Optional[float],
+                           deadline: Optional[float]) -> List[ScanResult]:
+        """
+        Split lines into chunks and scan them with deadlines with a pool of the matcher, see scan_lines_within.
+        """
+
+        workers = workers or self.workers or default_workers(executor)
+        chunk_size = chunk_size or max(1, len(lines) // (workers * PROCESS_CHUNKS_PER_WORKER))
+        chunks = [lines[start:start + chunk_size] for start in range(0, len(lines), chunk_size)]
+        scan_chunk = _scan_chunk_within_in_process_worker if executor == 'process' else self.scan_chunk_within
+
+        with self.pools_lock:
+            pool = self.get_pool(executor, workers)
+            futures = [pool.submit(scan_chunk, chunk, line_timeout, deadline) for chunk in chunks]
+
+        if deadline is not None:
+            _, not_done = wait(futures, timeout=max(0.0, deadline - monotonic()))
+            for future in not_done:
+                future.cancel()  # Chunks already running stop at the deadline by themselves
+
+        results: List[ScanResult] = []
+        for chunk, future in zip(chunks, futures):
+            if future.cancelled():
+                results.extend([ScanResult(0, partial=True)] * len(chunk))
+            else:
+                results.extend(future.result())
+        return results
+
+    def init_sliding_windows(self, text: str, word_lengths: Optional[Iterable[int]] = None) -> Dict[int, List[int]]:
         """
         Initializes sliding windows for distinct character counts in the given text.
 
@@ -286,11 +2184,12 @@ class ScrambledWordMatcher:
         window at the beginning of the text.
 
         :param text: The text for which the sliding windows are to be initialized.
+        :param word_lengths: The word lengths to initialize windows for, defaults to the dictionary's.
         :return: A dictionary mapping word lengths to character count lists.
 
         Usage:
         >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
-        >>> matcher.word_lengths = {3, 4, 5}  # Assume these lengths are in the dictionary
+        >>> matcher.add_words(['abc', 'abcd', 'abcde'])
         >>> sliding_windows = matcher.init_sliding_windows('hello')
         >>> sliding_windows[3]
         [0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
@@ -300,9 +2199,12 @@ class ScrambledWordMatcher:
         [0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 2, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
         """
 
-        sliding_window_counts: Dict[int, List[int]] = {word_length: [0] * ALPHABET_SIZE for word_length in self.word_lengths}
+        if word_lengths is None:
+            word_lengths = self.word_lengths
+
+        sliding_window_counts: Dict[int, List[int]] = {word_length: [0] * ALPHABET_SIZE for word_length in word_lengths}
 
-        for word_length in self.word_lengths:
+        for word_length in sliding_window_counts:
             window_counts = sliding_window_counts[word_length]
 
             i = 0
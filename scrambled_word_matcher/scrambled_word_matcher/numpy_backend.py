@@ -0,0 +1,217 @@
+"""
+Vectorised scan backend built on NumPy.
+
+NumPy is an optional dependency: when it is not installed, is_available() returns False
+and ScrambledWordMatcher falls back to the naive engine.
+"""
+
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+from scrambled_word_matcher.constraints import ALPHABET_SIZE
+from scrambled_word_matcher.signatures import HashEntry, HashIndex, mark_seen
+from scrambled_word_matcher.signatures import LETTER_HASHES, FIRST_LETTER_HASHES, LAST_LETTER_HASHES
+from scrambled_word_matcher.constraints import Text
+from scrambled_word_matcher.constraints import validate_text
+from scrambled_word_matcher.scan_stats import ScanStats
+
+
+def is_available() -> bool:
+    """
+    Check whether NumPy can be imported.
+
+    >>> is_available() in (True, False)
+    True
+    """
+
+    return np is not None
+
+
+class NumpyIndex:
+    """
+    The hash index rearranged into arrays for batch lookups.
+
+    Properties:
+    - lengths: The sorted word lengths of the dictionary.
+    - endpoint_tables: For every word length, a boolean array of ALPHABET_SIZE * ALPHABET_SIZE items
+                       telling whether a word of that length has the endpoint code first * ALPHABET_SIZE + last.
+    - probes: For every word length, the sorted uint64 array of dictionary probe hashes.
+    - entries: For every word length, the hash index entries aligned with probes.
+    - word_count: The number of words in the dictionary, used for early exit.
+    - word_id_count: The number of word ids assigned, the size of the seen bitset of a scan.
+    """
+
+    def __init__(self, hash_index: HashIndex, word_count: int, word_id_count: int) -> None:
+        self.lengths: List[int] = sorted(hash_index)
+        self.endpoint_tables: Dict[int, 'np.ndarray'] = {}
+        self.probes: Dict[int, 'np.ndarray'] = {}
+        self.entries: Dict[int, List[List[HashEntry]]] = {}
+        self.word_count = word_count
+        self.word_id_count = word_id_count
+
+        for word_length, probes in hash_index.items():
+            sorted_probes = sorted(probes)
+            endpoint_table = np.zeros(ALPHABET_SIZE * ALPHABET_SIZE, dtype=bool)
+            for entries in probes.values():
+                for endpoint, _, _ in entries:
+                    endpoint_table[endpoint] = True
+
+            self.endpoint_tables[word_length] = endpoint_table
+            self.probes[word_length] = np.array(sorted_probes, dtype=np.uint64)
+            self.entries[word_length] = [probes[probe] for probe in sorted_probes]
+
+
+def encode_array(text: Text) -> 'np.ndarray':
+    """
+    Encode and validate the text into an array of alphabet codes.
+
+    Invalid text is handed over to validate_text, so that the same InputValidationError is raised.
+
+    >>> encode_array('abz').tolist()
+    [0, 1, 25]
+
+    >>> encode_array(memoryview(b'abz')).tolist()
+    [0, 1, 25]
+
+    >>> encode_array('abC!')
+    Traceback (most recent call last):
+    ...
+    scrambled_word_matcher.constraints.InputValidationError: Unexpected symbol: C
+    """
+
+    if isinstance(text, str):
+        if not text.isascii():
+            validate_text(text)
+        text = text.encode('ascii')
+
+    codes = np.frombuffer(text, dtype=np.uint8) - np.uint8(ord('a'))  # Symbols before 'a' wrap around
+    if codes.size and codes.max() >= ALPHABET_SIZE:
+        validate_text(text)
+
+    return codes.astype(np.intp)
+
+
+def scan(text: Text, index: NumpyIndex, stats: Optional[ScanStats] = None) -> int:
+    """
+    Scan the given text and count the dictionary words it contains, processing each word length in batch.
+
+    The prefix-count matrix of the text, with (n + 1) rows of ALPHABET_SIZE counts, and the prefix multiset hashes
+    are computed once. For every word length, the windows are filtered by their endpoints with a table lookup,
+    the probe hashes of the remaining windows are computed as a vectorised difference of prefix hashes and
+    looked up in the sorted dictionary probes with searchsorted. Only windows whose probe hits the dictionary
+    get their counts taken from the prefix-count matrix and compared with the dictionary signatures.
+
+    :param text: The text to be scanned for dictionary word occurrences, as a string or as ASCII bytes.
+    :param index: The dictionary arranged for batch lookups.
+    :param stats: The ScanStats to record the work done in, None to count nothing.
+    :return: The total count of dictionary word matches found in the text, each word counted once.
+
+    >>> import logging
+    >>> from scrambled_word_matcher.matcher import ScrambledWordMatcher
+    >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+    >>> matcher.add_word('hello')
+    >>> matcher.add_word('world')
+    >>> matcher.add_word('abracadabra')
+    >>> scan('ehllodlrowhelloworld', NumpyIndex(matcher.get_hash_index(), matcher.word_count, matcher.next_word_id))
+    2
+    """
+
+    codes = encode_array(text)
+    text_length = codes.size
+
+    prefix_counts = np.zeros((text_length + 1, ALPHABET_SIZE), dtype=np.int32)
+    np.cumsum(np.eye(ALPHABET_SIZE, dtype=np.int32)[codes], axis=0, out=prefix_counts[1:])
+
+    letter_hashes = np.array(LETTER_HASHES, dtype=np.uint64)
+    first_letter_hashes = np.array(FIRST_LETTER_HASHES, dtype=np.uint64)
+    last_letter_hashes = np.array(LAST_LETTER_HASHES, dtype=np.uint64)
+
+    prefix_hashes = np.zeros(text_length + 1, dtype=np.uint64)
+    np.cumsum(letter_hashes[codes], out=prefix_hashes[1:])  # Wraps around modulo 2**64
+
+    matches = 0
+    windows = probes = hits_count = 0
+    seen = bytearray(index.word_id_count)  # Word ids already counted in this scan
+
+    for word_length in index.lengths:
+        if word_length > text_length:
+            break
+
+        window_count = text_length - word_length + 1
+        windows += window_count
+        first_codes = codes[:window_count]
+        last_codes = codes[word_length - 1:]
+
+        positions = np.flatnonzero(index.endpoint_tables[word_length][first_codes * ALPHABET_SIZE + last_codes])
+        probes += positions.size
+        if not positions.size:
+            continue
+
+        window_probes = (prefix_hashes[positions + word_length] - prefix_hashes[positions]
+                         + first_letter_hashes[first_codes[positions]]
+                         + last_letter_hashes[last_codes[positions]])
+
+        dictionary_probes = index.probes[word_length]
+        ranks = np.searchsorted(dictionary_probes, window_probes)
+        ranks[ranks == dictionary_probes.size] = 0
+        hits = dictionary_probes[ranks] == window_probes
+        if not hits.any():
+            continue
+
+        hit_positions = positions[hits]
+        hit_ranks = ranks[hits]
+        unique_ranks, first_hits = np.unique(hit_ranks, return_index=True)
+
+        for rank, first_hit in zip(unique_ranks.tolist(), first_hits.tolist()):
+            entries = index.entries[word_length][rank]
+            found = match_window(codes, prefix_counts, int(hit_positions[first_hit]), word_length, entries, seen)
+            matches += found
+            hits_count += found > 0
+
+            if not all(seen[word_ids[0]] for _, _, word_ids in entries):
+                # Hash collision: verify the other windows with the same probe
+                for position in hit_positions[hit_ranks == rank][1:].tolist():
+                    found = match_window(codes, prefix_counts, position, word_length, entries, seen)
+                    matches += found
+                    hits_count += found > 0
+                    if all(seen[word_ids[0]] for _, _, word_ids in entries):
+                        break
+
+            if matches == index.word_count:  # Early exit
+                if stats is not None:  # Every window of the current length was filtered in batch
+                    stats.record(characters=text_length, positions=windows, window_updates=windows,
+                                 endpoint_misses=windows - probes, probes=probes, hits=hits_count, early_exit=True)
+                return matches
+
+    if stats is not None:
+        stats.record(characters=text_length, positions=windows, window_updates=windows,
+                     endpoint_misses=windows - probes, probes=probes, hits=hits_count)
+    return matches
+
+
+def match_window(codes: 'np.ndarray', prefix_counts: 'np.ndarray', position: int, word_length: int,
+                 entries: List[HashEntry], seen: bytearray) -> int:
+    """
+    Verify a window whose probe hash hit the dictionary, and count the words it matches for the first time.
+
+    :param codes: The encoded text.
+    :param prefix_counts: The prefix-count matrix of the text.
+    :param position: The position of the first character of the window.
+    :param word_length: The length of the window.
+    :param entries: The hash index entries sharing the window's probe hash.
+    :param seen: The bitset of word ids already counted in this scan; updated in place.
+    :return: The number of dictionary words matched by the window that were not seen before.
+    """
+
+    key = int(codes[position]) * ALPHABET_SIZE + int(codes[position + word_length - 1])
+    candidate = tuple((prefix_counts[position + word_length] - prefix_counts[position]).tolist())
+
+    for endpoint, signature, word_ids in entries:
+        if endpoint == key and signature == candidate:
+            return 0 if seen[word_ids[0]] else mark_seen(seen, word_ids)
+
+    return 0
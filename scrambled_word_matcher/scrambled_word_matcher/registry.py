@@ -0,0 +1,305 @@
+"""
+Many dictionaries in one process.
+
+A MatcherRegistry loads dictionaries on demand, by file path or by the checksum of a file loaded before,
+and keeps one matcher per distinct dictionary. Words appearing in several dictionaries share their character
+count signatures: every index built by the registry holds the same tuple instances, kept once in its
+signature table. When the estimated size of the loaded indexes exceeds the memory budget, the least recently
+used ones are evicted, and loaded again from their file on their next use.
+
+scan_many scans a text against several dictionaries in one pass per word length: the letter counts and the
+signature of every window are computed once, and probed in every dictionary with words of that length.
+"""
+
+import sys
+import logging
+import threading
+
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple, Union
+
+from scrambled_word_matcher.constraints import ALPHABET_SIZE, MAX_DICTIONARY_SIZE, Text
+from scrambled_word_matcher.dictionary_builder import DictionaryBuilder
+from scrambled_word_matcher.index_file import dictionary_checksum
+from scrambled_word_matcher.mapped_input import InputKey, file_key
+from scrambled_word_matcher.matcher import ENGINES, IndexSnapshot, ScrambledWordMatcher
+from scrambled_word_matcher.signatures import CharCountTable, WordIds, LETTER_CODES, ascii_bytes, mark_seen
+
+DEFAULT_MEMORY_BUDGET = 256 << 20  # Bytes of loaded indexes kept before the least recently used ones are evicted
+SIGNATURE_BYTES = sys.getsizeof(tuple(range(ALPHABET_SIZE)))  # Size of a signature tuple, held once by the registry
+
+Dictionary = Union[str, bytes]  # A dictionary file path, or the SHA-256 checksum of a dictionary loaded before
+Endpoints = Dict[int, Dict[CharCountTable, WordIds]]  # endpoint code -> signature -> word ids, for one word length
+
+
+def index_memory_bytes(snapshot: IndexSnapshot) -> int:
+    """
+    Estimate the bytes held by the index of a snapshot: its dictionaries, word ids and words.
+
+    Signatures are not counted, as the registry shares them between indexes, nor are the derived indexes
+    that engines build lazily.
+
+    :param snapshot: The snapshot of a matcher without a compact index.
+    :return: The estimated number of bytes.
+    """
+
+    size = 0
+    for groups in (snapshot.index, snapshot.word_ids, snapshot.words):
+        size += sys.getsizeof(groups) + sum(sys.getsizeof(group) for group in groups.values())
+    for id_groups in snapshot.word_ids.values():
+        size += sum(sys.getsizeof(word_ids) for word_ids in id_groups.values())
+    for word_groups in snapshot.words.values():
+        for words in word_groups.values():
+            size += sys.getsizeof(words) + sum(sys.getsizeof(word) for word in words)
+    return size
+
+
+class MatcherRegistry:
+    """
+    A thread-safe registry of the matchers of many dictionaries, loaded on demand and evicted in least
+    recently used order under a memory budget.
+
+    Properties:
+    - engine: The scan engine of the matchers, any of ENGINES but 'compact', whose index has no signatures.
+    - memory_budget: The estimated bytes of loaded indexes beyond which the least recently used ones are evicted.
+                     The most recently used dictionary is never evicted, even if it exceeds the budget alone.
+    - matchers: The loaded matchers and the estimated bytes of their indexes, by dictionary checksum,
+                least recently used first.
+    - paths: The file path of every dictionary loaded so far, by checksum, to load evicted ones again
+             if their file did not change.
+    - checksums: The checksum of every path with the file_key it was computed for, so that unchanged files
+                 are not read again to be identified.
+    - signature_table: The signatures held by the loaded indexes, by value.
+    - signature_refs: The number of loaded index entries holding each signature of the table.
+    - loads, hits, evictions: The number of dictionaries loaded, found already loaded, and evicted.
+
+    >>> import os, tempfile
+    >>> paths = []
+    >>> for words in ('spam\\neggs\\n', 'spam\\nham\\n'):
+    ...     with tempfile.NamedTemporaryFile(mode='w', delete=False) as dictionary_file:
+    ...         _ = dictionary_file.write(words)
+    ...     paths.append(dictionary_file.name)
+    >>> registry = MatcherRegistry(logging.getLogger('test'))
+    >>> registry.scan_many('sapmham', paths)
+    [1, 2]
+    >>> len(registry.signature_table)  # 'spam' is shared
+    3
+    >>> registry.get(dictionary_checksum(paths[0])) is registry.get(paths[0])
+    True
+    >>> registry.loads, registry.hits
+    (2, 2)
+    >>> for path in paths:
+    ...     os.remove(path)
+    """
+
+    def __init__(self, logger: logging.Logger, engine: str = 'length_major',
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET, max_dictionary_size: int = MAX_DICTIONARY_SIZE) -> None:
+        """
+        :param logger: A logging.Logger instance for logging messages, shared by the matchers.
+        :param engine: The scan engine of the matchers.
+        :param memory_budget: The estimated bytes of loaded indexes to keep.
+        :param max_dictionary_size: The maximum number of words per dictionary.
+        :raises ValueError: If the engine is unknown or is the compact engine.
+        """
+
+        if engine not in ENGINES or engine == 'compact':
+            raise ValueError(f'Unsupported scan engine for a registry: {engine}')
+
+        self.logger = logger
+        self.engine = engine
+        self.memory_budget = memory_budget
+        self.max_dictionary_size = max_dictionary_size
+        self.matchers: 'OrderedDict[bytes, Tuple[ScrambledWordMatcher, int]]' = OrderedDict()
+        self.paths: Dict[bytes, str] = {}
+        self.checksums: Dict[str, Tuple[InputKey, bytes]] = {}
+        self.signature_table: Dict[CharCountTable, CharCountTable] = {}
+        self.signature_refs: Dict[CharCountTable, int] = {}
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> 'MatcherRegistry':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the loaded matchers, shutting down their worker pools, see ScrambledWordMatcher.close.
+        """
+
+        with self.lock:
+            matchers = [matcher for matcher, _ in self.matchers.values()]
+        for matcher in matchers:
+            matcher.close()
+
+    @property
+    def memory_bytes(self) -> int:
+        """
+        The estimated bytes of the loaded indexes, and of the signatures they share.
+        """
+
+        return sum(size for _, size in self.matchers.values()) + len(self.signature_refs) * SIGNATURE_BYTES
+
+    def checksum(self, dictionary: Dictionary) -> bytes:
+        """
+        Return the checksum of a dictionary, reading its file only if it changed since it was last identified.
+
+        :param dictionary: A dictionary file path, or the checksum of a dictionary loaded before.
+        :return: The SHA-256 checksum of the dictionary file.
+        :raises OSError: If the file cannot be read.
+        :raises ValueError: If a checksum is given for a dictionary that was never loaded.
+        """
+
+        if isinstance(dictionary, bytes):
+            if dictionary not in self.paths:
+                raise ValueError(f'Unknown dictionary checksum: {dictionary.hex()}')
+            return dictionary
+
+        key = file_key(dictionary)
+        known = self.checksums.get(dictionary)
+        if known is not None and known[0] == key:
+            return known[1]
+
+        checksum = dictionary_checksum(dictionary)
+        self.checksums[dictionary] = (key, checksum)
+        return checksum
+
+    def get(self, dictionary: Dictionary) -> ScrambledWordMatcher:
+        """
+        Return the matcher of a dictionary, loading it if it is not loaded, and mark it as most recently used.
+
+        Dictionaries are identified by their checksum: files with the same contents share a matcher,
+        and a file that changed is loaded again.
+
+        :param dictionary: A dictionary file path, or the checksum of a dictionary loaded before.
+        :return: The matcher of the dictionary. Evicted matchers keep working for the callers holding them.
+        :raises OSError: If the file cannot be read.
+        :raises ValueError: If a checksum is given for a dictionary that was never loaded, or that was evicted
+                            and whose file changed since; the checksum is then forgotten.
+        :raises DictionaryValidationError: If the dictionary is invalid.
+        """
+
+        with self.lock:
+            checksum = self.checksum(dictionary)
+            loaded = self.matchers.get(checksum)
+            if loaded is not None:
+                self.hits += 1
+                self.matchers.move_to_end(checksum)
+                return loaded[0]
+
+            path = dictionary if isinstance(dictionary, str) else self.paths[checksum]
+            if self.checksum(path) != checksum:  # An evicted dictionary is reloaded from a file that changed
+                del self.paths[checksum]
+                raise ValueError(f'Dictionary {checksum.hex()} changed on disk since it was loaded: {path}')
+
+            matcher = self.load(path)
+            self.paths[checksum] = path
+            self.matchers[checksum] = (matcher, index_memory_bytes(matcher.snapshot()))
+            self.evict()
+            return matcher
+
+    def load(self, path: str) -> ScrambledWordMatcher:
+        """
+        Load a dictionary file into a new matcher, sharing its signatures with the loaded indexes.
+        """
+
+        builder = DictionaryBuilder(max_size=self.max_dictionary_size)
+        builder.read(path)
+        builder.check()
+
+        matcher = ScrambledWordMatcher(self.logger, engine=self.engine)
+        matcher.install(builder, signature_table=self.signature_table)
+        for signatures in matcher.index.values():
+            for signature in signatures:
+                self.signature_refs[signature] = self.signature_refs.get(signature, 0) + 1
+
+        self.loads += 1
+        self.logger.debug(f'Loaded dictionary {path} ({matcher.word_count} words)')
+        return matcher
+
+    def evict(self) -> None:
+        """
+        Evict the least recently used matchers until the loaded indexes fit in the memory budget.
+        """
+
+        while len(self.matchers) > 1 and self.memory_bytes > self.memory_budget:
+            checksum, (matcher, _) = self.matchers.popitem(last=False)
+            for signatures in matcher.index.values():
+                for signature in signatures:
+                    refs = self.signature_refs[signature] - 1
+                    if refs:
+                        self.signature_refs[signature] = refs
+                    else:
+                        del self.signature_refs[signature]
+                        del self.signature_table[signature]
+
+            matcher.close()
+            self.evictions += 1
+            self.logger.debug(f'Evicted dictionary {self.paths[checksum]}')
+
+    def scan_many(self, text: Text, dictionaries: Sequence[Dictionary]) -> List[int]:
+        """
+        Scan a text against several dictionaries, returning the count of matches of every dictionary in order.
+
+        The text is validated and encoded once, and a single window slides over it per word length of any
+        of the dictionaries: the signature of a window is only built if its endpoints match a word of that
+        length in some dictionary, and then probed in each of them. Each word of each dictionary is counted
+        once, so the counts are those of scanning the text with the matcher of every dictionary.
+
+        :param text: The text to be scanned, as a string or as ASCII bytes.
+        :param dictionaries: Dictionary file paths or checksums, see get.
+        :return: A list with the count of matches of every dictionary.
+        :raises InputValidationError: If the text contains a symbol that is not a lowercase English letter.
+        """
+
+        data = ascii_bytes(text)
+        codes = list(data.translate(LETTER_CODES))
+        text_length = len(codes)
+
+        matchers = [self.get(dictionary) for dictionary in dictionaries]
+        states = [matcher.snapshot() for matcher in matchers]
+        counts = [0] * len(states)
+        seen = [bytearray(state.next_word_id) for state in states]  # Word ids already counted, per dictionary
+        remaining = sum(1 for state in states if state.word_count)
+
+        by_length: Dict[int, List[Tuple[int, Endpoints]]] = {}
+        for position, (matcher, state) in enumerate(zip(matchers, states)):
+            for word_length, endpoints in matcher.get_length_index(state).items():
+                by_length.setdefault(word_length, []).append((position, endpoints))
+
+        for word_length in sorted(by_length):
+            if word_length > text_length:
+                break
+
+            targets = by_length[word_length]
+            window = [0] * ALPHABET_SIZE
+            for code in codes[:word_length - 1]:
+                window[code] += 1
+
+            for left_index in range(text_length - word_length + 1):
+                last_code = codes[left_index + word_length - 1]
+                window[last_code] += 1
+                key = codes[left_index] * ALPHABET_SIZE + last_code
+
+                signature = None
+                for position, endpoints in targets:
+                    signatures = endpoints.get(key)
+                    if signatures is None:
+                        continue
+
+                    if signature is None:
+                        signature = tuple(window)
+                    word_ids = signatures.get(signature)
+                    if word_ids and not seen[position][word_ids[0]]:
+                        counts[position] += mark_seen(seen[position], word_ids)
+                        if counts[position] == states[position].word_count:
+                            remaining -= 1
+                            if not remaining:  # Early exit: every word of every dictionary was matched
+                                return counts
+
+                window[codes[left_index]] -= 1
+
+        return counts
@@ -0,0 +1,105 @@
+"""
+Bounded cache of line scan results.
+
+Input files often repeat lines. The cache maps a line and the dictionary version it was scanned against
+to its match count, and evicts the least recently used entry when it is full. Keying by dictionary version
+means a result computed while a word was being added is never returned after the addition.
+"""
+
+import threading
+
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from scrambled_word_matcher.constraints import Text
+
+CacheKey = Tuple[Hashable, int]  # line content, dictionary version
+
+
+def line_key(text: Text) -> Hashable:
+    """
+    Return the cache key of a line's content: strings are used as they are, bytes-like lines as bytes.
+
+    >>> line_key('spam'), line_key(memoryview(b'spam'))
+    ('spam', b'spam')
+    """
+
+    return text if isinstance(text, (str, bytes)) else bytes(text)
+
+
+class ResultCache:
+    """
+    A thread-safe LRU cache of line match counts with hit, miss and eviction counters.
+
+    >>> cache = ResultCache(max_size=2)
+    >>> cache.put(('spam', 0), 1)
+    >>> cache.put(('eggs', 0), 0)
+    >>> cache.get(('spam', 0))
+    1
+    >>> cache.put(('ham', 0), 2)  # Evicts ('eggs', 0), the least recently used entry
+    >>> cache.get(('eggs', 0)) is None
+    True
+    >>> cache.hits, cache.misses, cache.evictions
+    (1, 1, 1)
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        :param max_size: The maximum number of cached lines, at least 1.
+        :raises ValueError: If max_size is less than 1.
+        """
+
+        if max_size < 1:
+            raise ValueError(f'Cache size must be at least 1, got {max_size}')
+
+        self.max_size = max_size
+        self.entries: 'OrderedDict[CacheKey, int]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[int]:
+        """
+        Return the cached match count of a line, or None on a miss.
+
+        :param key: The line content and dictionary version, see line_key.
+        :return: The match count, or None if the line is not cached.
+        """
+
+        with self.lock:
+            matches = self.entries.get(key)
+            if matches is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return matches
+
+    def put(self, key: CacheKey, matches: int) -> None:
+        """
+        Cache the match count of a line, evicting the least recently used line if the cache is full.
+
+        :param key: The line content and dictionary version, see line_key.
+        :param matches: The match count of the line.
+        """
+
+        with self.lock:
+            self.entries[key] = matches
+            self.entries.move_to_end(key)
+
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drop all cached lines, keeping the counters.
+        """
+
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
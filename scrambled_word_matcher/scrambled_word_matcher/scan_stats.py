@@ -0,0 +1,137 @@
+"""
+Optional instrumentation of scans.
+
+A matcher created with stats=True keeps a ScanStats: its engines count the work they do, and the time spent
+in each phase of a run is accumulated. Engines keep their counters in local variables, only incremented
+on the rare paths (probes and hits), and derive the others from loop bounds, so the hot loops are unchanged;
+with stats off, the only cost left is one attribute check per scan.
+Counters of scans run in worker processes are not collected.
+"""
+
+import threading
+
+from time import perf_counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+PHASES = ('validation', 'dictionary_build', 'scan', 'output')
+COUNTERS = ('scans', 'characters', 'positions', 'window_updates', 'endpoint_misses', 'probes', 'hits', 'early_exits')
+
+
+class ScanStats:
+    """
+    Thread-safe counters of the work done by scans, and the time spent in each phase of a run.
+
+    Properties:
+    - scans: The number of texts scanned by an engine; lines answered by the result cache are not scanned.
+    - characters: The total length of the scanned texts.
+    - positions: The window start positions visited. Engines sweeping word lengths visit every position
+                 once per length.
+    - window_updates: The windows whose letter counts or probe hash were computed.
+    - endpoint_misses: The windows skipped because no dictionary word of their length has their first and last letters.
+    - probes: The windows looked up in the dictionary by signature or probe hash.
+    - hits: The windows that matched dictionary words not matched before in the same scan.
+    - early_exits: The scans that stopped as soon as every dictionary word was matched.
+    - phases: The seconds spent in each of PHASES. Scans running in parallel threads add up their times.
+
+    >>> stats = ScanStats()
+    >>> stats.record(characters=20, positions=20, window_updates=20, endpoint_misses=18, probes=2, hits=1)
+    >>> stats.record(characters=10, positions=10, window_updates=10, endpoint_misses=10, probes=0, hits=0)
+    >>> stats.scans, stats.probes, stats.early_exits, round(stats.probe_ratio, 3)
+    (2, 2, 0, 0.067)
+    >>> with stats.phase('output'):
+    ...     pass
+    >>> stats.phases['output'] > 0
+    True
+    """
+
+    def __init__(self) -> None:
+        self.scans = 0
+        self.characters = 0
+        self.positions = 0
+        self.window_updates = 0
+        self.endpoint_misses = 0
+        self.probes = 0
+        self.hits = 0
+        self.early_exits = 0
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.lock = threading.Lock()
+
+    def record(self, characters: int, positions: int, window_updates: int, endpoint_misses: int,
+               probes: int, hits: int, early_exit: bool = False) -> None:
+        """
+        Add the counters of a single scan.
+        """
+
+        with self.lock:
+            self.scans += 1
+            self.characters += characters
+            self.positions += positions
+            self.window_updates += window_updates
+            self.endpoint_misses += endpoint_misses
+            self.probes += probes
+            self.hits += hits
+            self.early_exits += early_exit
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """
+        Add time spent in a phase, one of PHASES.
+        """
+
+        with self.lock:
+            self.phases[phase] += seconds
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """
+        Time the enclosed block as part of a phase, one of PHASES.
+        """
+
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, perf_counter() - started)
+
+    @property
+    def probe_ratio(self) -> float:
+        """
+        The number of probes per window update: a workload is probe-bound when it is high, as probes cost
+        several times more than updates, and window-bound when it is low.
+        """
+
+        return self.probes / self.window_updates if self.window_updates else 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        """
+        Return the counters and phase times as a dictionary, e.g. for JSON output.
+
+        >>> ScanStats().as_dict()['phases']
+        {'validation': 0.0, 'dictionary_build': 0.0, 'scan': 0.0, 'output': 0.0}
+        """
+
+        with self.lock:
+            counters: Dict[str, object] = {name: getattr(self, name) for name in COUNTERS}
+            counters['phases'] = dict(self.phases)
+        return counters
+
+    def report(self) -> List[str]:
+        """
+        Return a human-readable summary, one line per group of counters.
+
+        >>> stats = ScanStats()
+        >>> stats.record(characters=20, positions=20, window_updates=20, endpoint_misses=18, probes=2, hits=1)
+        >>> print('\\n'.join(stats.report()[:3]))
+        Scans: 1 (20 characters, 0 early exits)
+        Windows: 20 positions, 20 updates, 18 endpoint misses, 2 probes, 1 hits
+        Probes per window update: 0.100
+        """
+
+        phases = ', '.join(f'{phase} {seconds:.3f} s' for phase, seconds in self.phases.items())
+        return [
+            f'Scans: {self.scans} ({self.characters} characters, {self.early_exits} early exits)',
+            f'Windows: {self.positions} positions, {self.window_updates} updates, '
+            f'{self.endpoint_misses} endpoint misses, {self.probes} probes, {self.hits} hits',
+            f'Probes per window update: {self.probe_ratio:.3f}',
+            f'Phases: {phases}',
+        ]
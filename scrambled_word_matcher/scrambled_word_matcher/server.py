@@ -0,0 +1,293 @@
+"""
+Long-lived matcher daemon and its client.
+
+The server loads the dictionary once and listens on a Unix socket or a TCP port with asyncio,
+so that scanning a line does not pay for interpreter startup, dictionary validation and indexing.
+
+Protocol: every request is a line terminated by a newline, and gets exactly one response line,
+in the order of the requests. Clients may pipeline requests, i.e. send many before reading the responses.
+- A line of text gets the number of dictionary words it contains, e.g. '4'.
+- 'RELOAD' loads the dictionary again and gets 'OK <word count>'. Scans requested before it finish
+  with the previous dictionary, scans requested after it wait for the new one.
+- A request that fails gets 'ERROR <message>'; the connection stays open.
+
+Lines are scanned by a worker pool (threads or processes) created by ScrambledWordMatcher.create_executor.
+"""
+
+import asyncio
+import logging
+import signal
+
+from concurrent.futures import Executor
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, Set, Tuple
+
+from scrambled_word_matcher.constraints import InputValidationError
+from scrambled_word_matcher.constraints import validate_input_length
+from scrambled_word_matcher.matcher import ScrambledWordMatcher, DEFAULT_LOOKAHEAD
+
+RELOAD_COMMAND = b'RELOAD'
+DEFAULT_HOST = '127.0.0.1'
+ERROR_PREFIX = 'ERROR '
+
+
+class MatcherServer:
+    """
+    Serves line-scan requests from a matcher that can be replaced while the server runs.
+
+    Properties:
+    - load_matcher: A callable building a new matcher from the dictionary, called on start and on reload.
+    - matcher: The current matcher.
+    - pool: The worker pool of the current matcher.
+    - executor: The kind of worker pool, see ScrambledWordMatcher.create_executor.
+    - workers: The number of workers of the pool.
+    - lookahead: The maximum number of pipelined requests in flight per connection.
+    """
+
+    def __init__(self, load_matcher: Callable[[], ScrambledWordMatcher], logger: logging.Logger,
+                 executor: str = 'thread', workers: Optional[int] = None, lookahead: int = DEFAULT_LOOKAHEAD) -> None:
+        """
+        Load the matcher and create its worker pool.
+
+        :raises DictionaryValidationError: Or any error raised by load_matcher.
+        :raises ValueError: If the executor is unknown.
+        """
+
+        self.load_matcher = load_matcher
+        self.logger = logger
+        self.executor = executor
+        self.workers = workers
+        self.lookahead = lookahead
+        self.matcher = load_matcher()
+        self.pool: Executor = self.matcher.create_executor(executor, workers)
+        self.reloading: Optional[asyncio.Task] = None
+        self.connections: Set[asyncio.Task] = set()
+
+    async def start(self, socket_path: Optional[str] = None, host: str = DEFAULT_HOST,
+                    port: int = 0) -> asyncio.Server:
+        """
+        Start listening on a Unix socket if socket_path is given, on a TCP port otherwise.
+
+        SIGHUP triggers a reload where the platform supports it.
+
+        :param socket_path: The file system path of the Unix socket.
+        :param host: The host to listen on with TCP.
+        :param port: The TCP port, 0 picks a free port.
+        :return: The asyncio server, see asyncio.Server.sockets for the address.
+        """
+
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path=socket_path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+
+        if hasattr(signal, 'SIGHUP'):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload)
+
+        self.logger.info(f'Serving {self.matcher.word_count} words on '
+                         f'{socket_path or ":".join(map(str, server.sockets[0].getsockname()[:2]))}')
+        return server
+
+    async def serve(self, socket_path: Optional[str] = None, host: str = DEFAULT_HOST, port: int = 0) -> None:
+        """
+        Serve requests until cancelled, then shut the worker pool down.
+        """
+
+        server = await self.start(socket_path, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    async def stop(self, server: asyncio.Server) -> None:
+        """
+        Stop accepting connections and wait until the open ones are closed by their clients.
+        """
+
+        server.close()
+        await server.wait_closed()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+
+    def close(self) -> None:
+        """
+        Shut the worker pool down.
+        """
+
+        self.pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Read pipelined requests from a connection and write their responses in order.
+
+        Requests are dispatched to the worker pool as soon as they are read; at most `lookahead` of them
+        wait for their response at any time, so a fast client cannot grow the server's memory unboundedly.
+        """
+
+        connection = asyncio.current_task()
+        assert connection is not None
+        self.connections.add(connection)
+
+        responses: asyncio.Queue[Optional[Awaitable[str]]] = asyncio.Queue(maxsize=self.lookahead)
+        writer_task = asyncio.create_task(self.write_responses(responses, writer))
+
+        try:
+            request_number = 0
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+
+                request_number += 1
+                await responses.put(self.handle_request(request_number, request.strip()))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as exc:
+            self.logger.warning(f'Connection closed: {exc}')
+        finally:
+            await responses.put(None)
+            await writer_task
+            writer.close()
+            self.connections.discard(connection)
+
+    async def write_responses(self, responses: 'asyncio.Queue[Optional[Awaitable[str]]]',
+                              writer: asyncio.StreamWriter) -> None:
+        """
+        Write the responses of a connection in the order of its requests, until None is received.
+
+        If the client goes away, the remaining responses are still awaited, but discarded.
+        """
+
+        connected = True
+        while True:
+            response = await responses.get()
+            if response is None:
+                return
+
+            line = await response
+            if not connected:
+                continue
+
+            try:
+                writer.write(line.encode('utf-8') + b'\n')
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+    def handle_request(self, request_number: int, request: bytes) -> Awaitable[str]:
+        """
+        Dispatch a request and return an awaitable of its response line.
+
+        Scans are submitted to the worker pool of the current matcher immediately, unless a reload is in progress:
+        then they are submitted to the new matcher once it is loaded.
+
+        :param request_number: The number of the request on its connection, starting with 1.
+        :param request: The request line, stripped.
+        :return: An awaitable of the response line, without the newline.
+        """
+
+        if request == RELOAD_COMMAND:
+            return self.reload()
+
+        try:
+            validate_input_length(request_number, request if request.isascii() else request.decode('utf-8'))
+        except (InputValidationError, UnicodeDecodeError) as exc:
+            return self.respond(f'{ERROR_PREFIX}{exc}')
+
+        if self.reloading is not None and not self.reloading.done():
+            return asyncio.create_task(self.scan_after_reload(self.reloading, request))
+
+        future = self.matcher.submit_scan(self.pool, self.executor, request)
+        return self.scan_response(asyncio.wrap_future(future))
+
+    async def scan_after_reload(self, reloading: 'asyncio.Task[str]', request: bytes) -> str:
+        """
+        Wait for a reload to complete, successfully or not, then scan a request with the current matcher.
+        """
+
+        await reloading
+        future = self.matcher.submit_scan(self.pool, self.executor, request)
+        return await self.scan_response(asyncio.wrap_future(future))
+
+    async def scan_response(self, scan: Awaitable[int]) -> str:
+        """
+        Turn the result of a scan into a response line.
+        """
+
+        try:
+            return str(await scan)
+        except Exception as exc:  # Report the failure of a single request, keep serving the others
+            return f'{ERROR_PREFIX}{exc}'
+
+    async def respond(self, response: str) -> str:
+        """
+        Wrap a response line known upfront, so that it can be queued with the pending ones.
+        """
+
+        return response
+
+    def reload(self) -> 'asyncio.Task[str]':
+        """
+        Load the dictionary again in the background and switch to the new matcher and worker pool once it is ready.
+
+        Concurrent reload requests share the reload in progress. If loading fails, the current matcher is kept.
+
+        :return: A task of the response line, 'OK <word count>' or 'ERROR <message>'.
+        """
+
+        if self.reloading is None or self.reloading.done():
+            self.reloading = asyncio.get_running_loop().create_task(self.load())
+        return self.reloading
+
+    async def load(self) -> str:
+        loop = asyncio.get_running_loop()
+        try:
+            matcher = await loop.run_in_executor(None, self.load_matcher)
+            pool = matcher.create_executor(self.executor, self.workers)
+        except (OSError, ValueError) as exc:  # Including DictionaryValidationError and IndexFileError
+            self.logger.error(f'Dictionary reload failed: {exc}')
+            return f'{ERROR_PREFIX}Dictionary reload failed: {exc}'
+
+        previous_pool = self.pool
+        self.matcher, self.pool = matcher, pool
+        previous_pool.shutdown(wait=False)  # Scans already submitted still complete
+
+        self.logger.info(f'Reloaded {matcher.word_count} words')
+        return f'OK {matcher.word_count}'
+
+
+async def request_lines(lines: Iterable[bytes], socket_path: Optional[str] = None, host: str = DEFAULT_HOST,
+                        port: int = 0) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Send pipelined requests to a MatcherServer and yield their responses as they arrive.
+
+    :param lines: The request lines, without newlines.
+    :param socket_path: The file system path of the server's Unix socket.
+    :param host: The server host, when connecting with TCP.
+    :param port: The server port, when connecting with TCP.
+    :return: An async iterator of (request number, response line) tuples, starting with request number 1.
+    """
+
+    requests = list(lines)  # Counted upfront, so that the number of responses to wait for is known
+    if not requests:
+        return
+
+    if socket_path is not None:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    async def send() -> None:
+        for request in requests:
+            writer.write(request + b'\n')
+            await writer.drain()
+        writer.write_eof()  # The server closes the connection once it has answered every request
+
+    sender = asyncio.create_task(send())
+    try:
+        for request_number in range(1, len(requests) + 1):
+            response = await reader.readline()
+            if not response:
+                raise ConnectionError('Server closed the connection')
+
+            yield request_number, response.decode('utf-8').rstrip('\n')
+    finally:
+        sender.cancel()
+        writer.close()
@@ -0,0 +1,207 @@
+"""
+Character count signatures and multiset hashes of words and text windows.
+"""
+
+import random
+import string
+
+from functools import cache
+from typing import Tuple, Dict, Iterable, List, Sequence
+
+from scrambled_word_matcher.constraints import Text
+from scrambled_word_matcher.constraints import validate_text
+from scrambled_word_matcher.constraints import ALPHABET_SIZE
+
+CharCountTable = Tuple[int, ...]  # Tuple of ALPHABET_SIZE items
+WordIds = Tuple[int, ...]  # Ids of the dictionary words sharing endpoints and a signature
+HashEntry = Tuple[int, CharCountTable, WordIds]  # endpoint code, signature, word ids
+HashIndex = Dict[int, Dict[int, List[HashEntry]]]  # length -> probe hash -> entries
+
+# Random 64-bit values per letter: a multiset hash is the sum of the values of its letters modulo 2**64,
+# so it can be updated in O(1) when a letter slides in or out of a window.
+# Endpoint letters get their own values, so that a probe hash also identifies the (first, last) pair.
+# The seed is fixed to keep hashes stable across processes and runs.
+HASH_MASK = (1 << 64) - 1
+_hash_random = random.Random(0x5C4A3B1E)
+LETTER_HASHES = tuple(_hash_random.getrandbits(64) for _ in range(ALPHABET_SIZE))
+FIRST_LETTER_HASHES = tuple(_hash_random.getrandbits(64) for _ in range(ALPHABET_SIZE))
+LAST_LETTER_HASHES = tuple(_hash_random.getrandbits(64) for _ in range(ALPHABET_SIZE))
+
+# Translation table from ASCII lowercase letters to alphabet codes
+LETTER_CODES = bytes.maketrans(string.ascii_lowercase.encode('ascii'), bytes(range(ALPHABET_SIZE)))
+
+
+@cache
+def counting_sort_chars(chars: str) -> CharCountTable:
+    """
+    Counts the occurrences of each character in a string and returns a tuple with these counts.
+
+    Assumes that input string only contains lowercase English letters (a-z): see the constraints.py for the details.
+
+    :param chars: The string of characters to count.
+    :return: A tuple of length ALPHABET_SIZE with the count of each character.
+
+    >>> counting_sort_chars('a')
+    (1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    >>> counting_sort_chars('abc')
+    (1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    >>> counting_sort_chars('zab')
+    (1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1)
+
+    >>> counting_sort_chars('mississippi')
+    (0, 0, 0, 0, 0, 0, 0, 0, 4, 0, 0, 0, 1, 0, 0, 2, 0, 0, 4, 0, 0, 0, 0, 0, 0, 0)
+
+    >>> counting_sort_chars('')  # Empty string should return a tuple of zero counts
+    (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    >>> counting_sort_chars('!')  # Non-alphabet character should raise a ValueError
+    Traceback (most recent call last):
+    ...
+    scrambled_word_matcher.constraints.InputValidationError: Unexpected symbol: !
+    """
+
+    count = [0] * ALPHABET_SIZE  # Array of zeros for each letter in the alphabet
+
+    for code in encode_chars(chars):
+        count[code] += 1
+
+    return tuple(count)
+
+
+def word_signatures(words: Iterable[bytes]) -> List[CharCountTable]:
+    """
+    Counts the letters of many words in batch, without validating them.
+
+    Equivalent to counting_sort_chars for every word, but the words are expected to be validated already,
+    so they are only translated to alphabet codes and counted, without caching.
+
+    :param words: The words, as ASCII bytes of lowercase English letters.
+    :return: The character count tables of the words, in the same order.
+
+    >>> word_signatures([b'abc', b'zab']) == [counting_sort_chars('abc'), counting_sort_chars('zab')]
+    True
+    """
+
+    signatures = []
+    zeros = [0] * ALPHABET_SIZE
+    for word in words:
+        count = zeros[:]
+        for code in word.translate(LETTER_CODES):
+            count[code] += 1
+        signatures.append(tuple(count))
+
+    return signatures
+
+
+def ascii_bytes(chars: Text) -> bytes:
+    """
+    Validates the text in one bulk pass and returns it as ASCII bytes.
+
+    :param chars: The text, as a string or as bytes.
+    :return: The text as bytes, one byte per letter.
+    :raises InputValidationError: If chars contains a symbol that is not a lowercase English letter.
+
+    >>> ascii_bytes('abz'), ascii_bytes(memoryview(b'abz'))
+    (b'abz', b'abz')
+    """
+
+    validate_text(chars)
+    return chars.encode('ascii') if isinstance(chars, str) else bytes(chars)
+
+
+def encode_chars(chars: Text) -> List[int]:
+    """
+    Converts a text into a list of alphabet codes (0 for 'a', 25 for 'z'), validating it in one bulk pass.
+
+    :param chars: The text to encode, as a string or as bytes.
+    :return: A list of integer codes, one per character.
+    :raises InputValidationError: If chars contains a symbol that is not a lowercase English letter.
+
+    >>> encode_chars('abz')
+    [0, 1, 25]
+
+    >>> encode_chars(b'abz')
+    [0, 1, 25]
+
+    >>> encode_chars('')
+    []
+
+    >>> encode_chars('abC!')
+    Traceback (most recent call last):
+    ...
+    scrambled_word_matcher.constraints.InputValidationError: Unexpected symbol: C
+    """
+
+    return list(ascii_bytes(chars).translate(LETTER_CODES))
+
+
+def multiset_hash(signature: CharCountTable) -> int:
+    """
+    Computes the multiset hash of a character count table: the sum of LETTER_HASHES weighted by counts, modulo 2**64.
+
+    :param signature: A tuple of ALPHABET_SIZE character counts, see counting_sort_chars.
+    :return: A 64-bit integer hash that does not depend on the order of characters.
+
+    >>> multiset_hash(counting_sort_chars('spam')) == multiset_hash(counting_sort_chars('maps'))
+    True
+
+    >>> multiset_hash(counting_sort_chars('spam')) == multiset_hash(counting_sort_chars('spa'))
+    False
+
+    >>> multiset_hash(counting_sort_chars(''))
+    0
+    """
+
+    return sum(count * letter_hash for count, letter_hash in zip(signature, LETTER_HASHES)) & HASH_MASK
+
+
+def window_probe_tables(codes: List[int]) -> Tuple[List[int], List[int]]:
+    """
+    Computes the prefix tables that give the probe hash of any window of the encoded text in O(1).
+
+    The probe hash of the window starting at left with the given length is
+    (starts[left] + ends[left + length]) & HASH_MASK, which equals the multiset hash of the window
+    plus the hashes of its first and last letters: see ScrambledWordMatcher.get_hash_index.
+
+    :param codes: The encoded text, see encode_chars.
+    :return: A tuple of the starts table (one item per position) and the ends table (one item per position plus one).
+
+    >>> codes = encode_chars('xspamx')
+    >>> starts, ends = window_probe_tables(codes)
+    >>> probe = (starts[1] + ends[5]) & HASH_MASK
+    >>> probe == (multiset_hash(counting_sort_chars('spam')) + FIRST_LETTER_HASHES[18] + LAST_LETTER_HASHES[12]) & HASH_MASK
+    True
+    """
+
+    # starts[left] + ends[right] = prefix[right] - prefix[left] + first hash + last hash
+    starts = []
+    ends = [0]
+    prefix_hash = 0
+    for code in codes:
+        starts.append((FIRST_LETTER_HASHES[code] - prefix_hash) & HASH_MASK)
+        prefix_hash = (prefix_hash + LETTER_HASHES[code]) & HASH_MASK
+        ends.append((prefix_hash + LAST_LETTER_HASHES[code]) & HASH_MASK)
+
+    return starts, ends
+
+
+def mark_seen(seen: bytearray, word_ids: Sequence[int]) -> int:
+    """
+    Mark the ids of words matched by a window in the seen bitset of a scan.
+
+    :param seen: A bytearray with one item per word id, non-zero for the words already matched.
+    :param word_ids: The ids of the words matched by the window.
+    :return: The number of marked words.
+
+    >>> seen = bytearray(4)
+    >>> mark_seen(seen, (1, 3))
+    2
+    >>> seen
+    bytearray(b'\\x00\\x01\\x00\\x01')
+    """
+
+    for word_id in word_ids:
+        seen[word_id] = 1
+    return len(word_ids)
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from scrambled_word_matcher import ScrambledWordMatcher
+from scrambled_word_matcher.logger import init_logger
+from scrambled_word_matcher.matcher import ENGINES
+from scrambled_word_matcher.constraints import DictionaryValidationError
+from scrambled_word_matcher.dictionary_builder import DictionaryBuilder, MAX_REPORTED_ERRORS
+
+TEST_LOGGER = init_logger('test.dictionary_builder')
+WORDS = ['axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd']
+TEXT = 'aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt'
+
+
+class TestDictionaryBuilder(unittest.TestCase):
+    def write_dictionary(self, content: bytes) -> str:
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.txt', delete=False) as dictionary_file:
+            dictionary_file.write(content)
+        self.addCleanup(os.remove, dictionary_file.name)
+        return dictionary_file.name
+
+    def test_import_matches_add_words(self) -> None:
+        "A dictionary built in batch is the same as one built word by word."
+
+        dictionary_path = self.write_dictionary('\r\n'.join(WORDS).encode('ascii') + b'\r\n')
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                imported = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                imported.import_dictionary(dictionary_path)
+                added = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                added.add_words(WORDS)
+
+                self.assertEqual(imported.word_count, 5)
+                self.assertEqual(imported.next_word_id, 5)
+                self.assertEqual(imported.word_lengths, added.word_lengths)
+                self.assertEqual(imported.scan(TEXT), 4)
+                self.assertEqual(imported.scan_matches(TEXT), added.scan_matches(TEXT))
+                if engine != 'compact':
+                    self.assertEqual(imported.snapshot(), added.snapshot())
+
+    def test_import_into_non_empty_dictionary(self) -> None:
+        "Words imported after others get the following ids."
+
+        dictionary_path = self.write_dictionary(b'dnrbt\npjxdn\n')
+        matcher = ScrambledWordMatcher(TEST_LOGGER)
+        matcher.add_words(['axpaj', 'apxaj'])
+        matcher.import_dictionary(dictionary_path)
+
+        self.assertEqual(matcher.scan_matches(TEXT), {0: 0, 1: 0, 3: 2, 2: 5})
+
+    def test_all_errors_reported(self) -> None:
+        "Every invalid line is reported, and nothing is added."
+
+        dictionary_path = self.write_dictionary(b'spam\nSpam\nx\n\nspam\neggs\n')
+        matcher = ScrambledWordMatcher(TEST_LOGGER)
+
+        with self.assertRaises(DictionaryValidationError) as raised:
+            matcher.import_dictionary(dictionary_path)
+
+        self.assertEqual(str(raised.exception), "Line 2: Unexpected symbol: S in word 'Spam' (and 3 more errors)")
+        self.assertEqual(raised.exception.errors[1:], [
+            "Line 3: Word 'x' does not meet length requirements (2-20)",
+            "Line 4: Word '' does not meet length requirements (2-20)",
+            'Line 5: Duplicate word found in dictionary: spam',
+        ])
+        self.assertEqual(matcher.word_count, 0)
+
+    def test_size_limit(self) -> None:
+        "Reading stops at the first line beyond the size limit."
+
+        builder = DictionaryBuilder(max_size=3)
+        builder.read(self.write_dictionary(b'aa\nbb\ncc\n'))
+        builder.check()
+
+        builder = DictionaryBuilder(max_size=3)
+        builder.read(self.write_dictionary(b'aa\nbb\ncc\ndd\nx\n'))
+        self.assertEqual(builder.line_count, 4)
+        self.assertEqual(builder.errors, ['Dictionary exceeds 3 words limit'])
+
+    def test_error_count(self) -> None:
+        "Errors beyond MAX_REPORTED_ERRORS are counted, but not kept."
+
+        builder = DictionaryBuilder()
+        builder.add_lines([b'x'] * (MAX_REPORTED_ERRORS + 5))
+
+        self.assertEqual(builder.error_count, MAX_REPORTED_ERRORS + 5)
+        self.assertEqual(len(builder.errors), MAX_REPORTED_ERRORS)
+        with self.assertRaisesRegex(DictionaryValidationError, f'and {MAX_REPORTED_ERRORS + 4} more errors'):
+            builder.check()
+
+
+if __name__ == '__main__':
+    unittest.main()
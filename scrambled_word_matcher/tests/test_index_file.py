@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from scrambled_word_matcher import ScrambledWordMatcher
+from scrambled_word_matcher.logger import init_logger
+from scrambled_word_matcher.index_file import IndexFileError
+from scrambled_word_matcher.index_file import dictionary_checksum, read_index, write_index
+
+TEST_LOGGER = init_logger('test.index_file')
+
+
+class TestIndexFile(unittest.TestCase):
+    def setUp(self) -> None:
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as dictionary_file:
+            dictionary_file.write('axpaj\napxaj\ndnrbt\npjxdn\nabd\n')
+        self.dictionary_path = dictionary_file.name
+        self.addCleanup(os.remove, self.dictionary_path)
+
+        self.index_path = self.dictionary_path + '.idx'
+        self.addCleanup(self.remove_index)
+
+    def remove_index(self) -> None:
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+
+    def test_round_trip(self) -> None:
+        matcher = ScrambledWordMatcher(TEST_LOGGER)
+        matcher.import_dictionary(self.dictionary_path)
+        checksum = dictionary_checksum(self.dictionary_path)
+
+        write_index(self.index_path, matcher.snapshot(), checksum)
+        snapshot, loaded_checksum = read_index(self.index_path)
+
+        self.assertEqual(loaded_checksum, checksum)
+        self.assertEqual(snapshot, matcher.snapshot())
+
+        loaded = ScrambledWordMatcher.from_snapshot(snapshot, TEST_LOGGER)
+        self.assertEqual(loaded.scan('aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt'), 4)
+
+        loaded.update_dictionary(add=['adb'], remove=['apxaj'])
+        self.assertEqual(loaded.scan('aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt'), 3)
+        self.assertEqual(loaded.scan_matches('adb'), {5: 0})
+
+    def test_not_an_index(self) -> None:
+        self.assertRaises(IndexFileError, read_index, self.dictionary_path)
+
+    def test_truncated_index(self) -> None:
+        matcher = ScrambledWordMatcher(TEST_LOGGER)
+        matcher.import_dictionary(self.dictionary_path)
+        write_index(self.index_path, matcher.snapshot(), dictionary_checksum(self.dictionary_path))
+
+        with open(self.index_path, 'r+b') as index_file:
+            index_file.truncate(os.path.getsize(self.index_path) - 1)
+
+        self.assertRaises(IndexFileError, read_index, self.index_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
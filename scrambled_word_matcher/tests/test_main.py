@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from scrambled_word_matcher.__main__ import compile_index, main
+from scrambled_word_matcher.matcher import ENGINES
+
+
+class TestMain(unittest.TestCase):
+    def write_file(self, contents: str, suffix: str = '.txt') -> str:
+        with tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False) as output_file:
+            output_file.write(contents)
+        self.addCleanup(os.remove, output_file.name)
+        return output_file.name
+
+    def run_main(self, *args, **kwargs) -> str:
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main(*args, **kwargs)
+        return output.getvalue()
+
+    def assert_load_error(self, message: str, *args, **kwargs) -> None:
+        with self.assertLogs('main', 'ERROR') as logs, self.assertRaises(SystemExit):
+            main(*args, **kwargs)
+        self.assertIn(message, logs.output[0])
+
+    def test_loading_errors(self):
+        "Loading errors name the input that failed."
+
+        input_path = self.write_file('aapxj\n')
+        missing_path = os.path.join(tempfile.gettempdir(), 'scrambled-word-matcher-missing')
+
+        self.assert_load_error('Dictionary loading failed', missing_path, input_path)
+        self.assert_load_error('Compiled index loading failed', None, input_path, index_path=missing_path)
+        self.assert_load_error('Compiled index loading failed', None, input_path,
+                               index_path=self.write_file('not an index', suffix='.idx'))
+
+    def test_compile_errors(self):
+        "Compilation errors name the path that failed."
+
+        dictionary_path = self.write_file('axpaj\napxaj\n')
+        missing_path = os.path.join(tempfile.gettempdir(), 'scrambled-word-matcher-missing')
+        unwritable_path = os.path.join(missing_path, 'dictionary.idx')
+
+        for args, message in (((missing_path, self.write_file('', suffix='.idx')), 'Dictionary loading failed'),
+                              ((dictionary_path, unwritable_path), 'Compiled index writing failed')):
+            with self.subTest(message=message):
+                with self.assertLogs('compile', 'ERROR') as logs, self.assertRaises(SystemExit):
+                    compile_index(*args)
+                self.assertIn(message, logs.output[0])
+
+    def test_cases(self):
+        dictionary_path = self.write_file('axpaj\napxaj\ndnrbt\npjxdn\nabd\n')
+        input_path = self.write_file('aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt\naapxj\n')
+
+        self.assertEqual(self.run_main(dictionary_path, input_path), 'Case #1: 4\nCase #2: 2\n')
+
+    def test_index_engines(self):
+        "A compiled index is scanned with every engine, in both modes, with or without the dictionary."
+
+        dictionary_path = self.write_file('axpaj\napxaj\ndnrbt\npjxdn\nabd\n')
+        input_path = self.write_file('aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt\naapxj\n')
+        index_path = self.write_file('', suffix='.idx')
+        compile_index(dictionary_path, index_path)
+
+        for engine in ENGINES:
+            for path in (None, dictionary_path):
+                with self.subTest(engine=engine, dictionary_path=path):
+                    self.assertEqual(self.run_main(path, input_path, engine=engine, index_path=index_path),
+                                     'Case #1: 4\nCase #2: 2\n')
+                    self.assertEqual(self.run_main(path, input_path, engine=engine, index_path=index_path,
+                                                   mode='frequency', top=3),
+                                     'axpaj: 2\napxaj: 2\ndnrbt: 1\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
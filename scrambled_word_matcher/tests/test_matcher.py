@@ -1,7 +1,15 @@
+import os
+import tempfile
+import threading
 import unittest
+from itertools import count
+from unittest.mock import patch
 
-from scrambled_word_matcher import ScrambledWordMatcher
+from scrambled_word_matcher import ScrambledWordMatcher, ScanResult
+from scrambled_word_matcher.matcher import ENGINES, HASH_MASK, FIRST_LETTER_HASHES, LAST_LETTER_HASHES
+from scrambled_word_matcher.matcher import counting_sort_chars, multiset_hash, top_counts
 from scrambled_word_matcher.logger import init_logger
+from scrambled_word_matcher.constraints import DictionaryValidationError, InputValidationError, MAX_DICTIONARY_SIZE
 
 TEST_LOGGER = init_logger('test.matcher')
 
@@ -81,5 +89,542 @@ class TestScrambledWordMatcher(unittest.TestCase):
         self.assertEqual(matcher.scan('adb'), 0)
         self.assertEqual(matcher.scan('adbtpdxjn'), 1)
 
+
+class TestExecutors(unittest.TestCase):
+    def test_process_executor(self):
+        "Process workers return the same counts as thread workers, in order."
+
+        matcher = ScrambledWordMatcher(TEST_LOGGER)
+        self.addCleanup(matcher.close)
+        for word in ('axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd'):
+            matcher.add_word(word)
+
+        lines = ['aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt', 'aapxj', 'adb', 'adbtpdxjn'] * 10
+
+        self.assertEqual(matcher.scan_lines(lines, executor='process', workers=2), [4, 2, 0, 1] * 10)
+        self.assertEqual(matcher.scan_lines(lines, executor='thread', workers=2), [4, 2, 0, 1] * 10)
+
+    def test_process_executor_compact(self):
+        "Process workers receive the compact index of large dictionaries."
+
+        matcher = ScrambledWordMatcher(TEST_LOGGER, engine='compact')
+        self.addCleanup(matcher.close)
+        for word in ('axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd'):
+            matcher.add_word(word)
+
+        lines = ['aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt', 'aapxj', 'adb', 'adbtpdxjn']
+
+        self.assertEqual(matcher.scan_lines(lines, executor='process', workers=2), [4, 2, 0, 1])
+
+    def test_persistent_pool(self):
+        "Scans reuse the pools of the matcher; process pools are replaced when the dictionary changes."
+
+        lines = ['aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt', 'aapxj', 'adb', 'adbtpdxjn'] * 3
+
+        for executor in ('thread', 'process'):
+            with self.subTest(executor=executor), ScrambledWordMatcher(TEST_LOGGER, executor=executor, workers=2) as matcher:
+                matcher.add_words(['axpaj', 'apxaj', 'dnrbt', 'pjxdn'])
+                self.assertEqual(matcher.scan_lines(lines, chunk_size=5), [4, 2, 0, 1] * 3)
+                pool = matcher.get_pool()
+                self.assertEqual(matcher.scan_lines(lines[:4], chunk_size=1), [4, 2, 0, 1])
+                self.assertIs(matcher.get_pool(), pool)
+
+                matcher.add_word('vldptfzbbd')
+                self.assertEqual(matcher.scan_lines(lines), [5, 2, 0, 1] * 3)
+                self.assertEqual(matcher.get_pool() is pool, executor == 'thread')
+
+            self.assertEqual(matcher.pools, {})
+
+    def test_count_corpus(self):
+        "Corpus counts add up the lines every word is matched in, across chunks and workers."
+
+        words = ['axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd', 'zzz']
+        lines = ['aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt', 'aapxj', 'adb', 'adbtpdxjn'] * 5
+        expected = [0] * len(words)
+        for line in lines:
+            for word_id, word in enumerate(words):
+                if any(sorted(line[start:start + len(word)]) == sorted(word)
+                       and (line[start], line[start + len(word) - 1]) == (word[0], word[-1])
+                       for start in range(len(line) - len(word) + 1)):
+                    expected[word_id] += 1
+
+        for engine in ('naive', 'compact'):
+            for executor in ('thread', 'process'):
+                with self.subTest(engine=engine, executor=executor), \
+                        ScrambledWordMatcher(TEST_LOGGER, engine=engine, executor=executor, workers=2) as matcher:
+                    matcher.add_words(words)
+                    self.assertEqual(matcher.count_corpus(iter(lines), chunk_size=3), expected)
+                    self.assertEqual(matcher.count_corpus([line.encode() for line in lines]), expected)
+
+        self.assertEqual(expected, [10, 10, 5, 10, 0, 0])
+        self.assertEqual(top_counts(expected, k=3), [(0, 10), (1, 10), (3, 10)])
+
+    @patch('scrambled_word_matcher.matcher.MIN_CHUNK_LENGTH', 8)
+    def test_scan_in_chunks(self):
+        "A text scanned in overlapping chunks by several processes counts every word once, across chunk boundaries."
+
+        text = 'aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt'  # 6 chunks of 9 characters, plus 4 of overlap
+
+        for engine in ('naive', 'compact'):
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_words(['axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd', 'vldptfzbbd', 'zzz'])
+                self.assertEqual(matcher.scan(text, workers=2), matcher.scan(text))
+                self.assertEqual(matcher.scan(text, workers=2), 5)
+
+                matcher.remove_word('zzz')
+                self.assertEqual(matcher.scan(text, workers=2), 5)
+
+    def test_unknown_executor(self):
+        matcher = ScrambledWordMatcher(TEST_LOGGER)
+        with self.assertRaises(ValueError):
+            matcher.scan_lines(['abc'], executor='unknown')
+
+
+class TestScanFile(unittest.TestCase):
+    def setUp(self):
+        self.matcher = ScrambledWordMatcher(TEST_LOGGER)
+        self.addCleanup(self.matcher.close)
+        for word in ('axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd'):
+            self.matcher.add_word(word)
+
+    def write_input(self, content: str) -> str:
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as input_file:
+            input_file.write(content)
+        self.addCleanup(os.remove, input_file.name)
+        return input_file.name
+
+    def test_iter_scan_file(self):
+        "Results are yielded in order with a bounded look-ahead."
+
+        input_path = self.write_input('aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt\naapxj\nadb\nadbtpdxjn\n' * 5)
+
+        for executor in ('thread', 'process'):
+            with self.subTest(executor=executor):
+                results = list(self.matcher.iter_scan_file(input_path, executor=executor, workers=2, lookahead=3))
+                self.assertEqual(results, list(enumerate([4, 2, 0, 1] * 5, start=1)))
+
+        self.assertEqual(self.matcher.scan_file(input_path), [4, 2, 0, 1] * 5)
+
+    def test_rewritten_file(self):
+        "Long-lived worker processes map the current contents of a rewritten input file."
+
+        input_path = self.write_input('aapxj\nadb\n')
+        self.assertEqual(self.matcher.scan_file(input_path, executor='process', workers=1), [2, 0])
+
+        with open(input_path, 'w') as input_file:
+            input_file.write('adbtpdxjn\naapxj\nadb\n')
+        os.utime(input_path, ns=(0, 1))  # The rewrite may fall within the clock resolution
+        self.assertEqual(self.matcher.scan_file(input_path, executor='process', workers=1), [1, 2, 0])
+
+    def test_iter_scan_file_invalid_line(self):
+        "Lines before an invalid line are yielded before the validation error."
+
+        input_path = self.write_input('aapxj\nadb\na\nadbtpdxjn\n')
+        results = []
+
+        with self.assertRaisesRegex(InputValidationError, 'Line 3'):
+            for result in self.matcher.iter_scan_file(input_path, lookahead=1):
+                results.append(result)
+
+        self.assertEqual(results, [(1, 2), (2, 0)])
+
+    def test_mapped_lines(self):
+        "Lines are found in the mapped file with their whitespace stripped, with or without a final newline."
+
+        input_path = self.write_input('aapxj\r\n  adb \nadbtpdxjn')
+
+        for executor in ('thread', 'process'):
+            with self.subTest(executor=executor):
+                self.assertEqual(self.matcher.scan_file(input_path, executor=executor, workers=2), [2, 0, 1])
+
+        self.assertEqual(self.matcher.scan_file(self.write_input('')), [])
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.matcher = ScrambledWordMatcher(TEST_LOGGER, cache_size=2)
+        for word in ('axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd'):
+            self.matcher.add_word(word)
+
+    def test_repeated_lines(self):
+        "Repeated lines are served from the cache, the least recently used line is evicted."
+
+        for text in ('aapxj', 'adb', 'aapxj', 'adbtpdxjn', 'adb'):
+            self.matcher.scan(text)
+
+        cache = self.matcher.result_cache
+        assert cache is not None
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 4, 2))
+
+    def test_add_word_invalidates(self):
+        "Adding a word invalidates the cached results."
+
+        self.assertEqual(self.matcher.scan('adb'), 0)
+        self.matcher.add_word('adb')
+        self.assertEqual(self.matcher.scan('adb'), 1)
+
+    def test_scan_lines_dedupe(self):
+        "Identical lines are scanned once per batch, and cached lines are not scanned again."
+
+        cache = self.matcher.result_cache
+        assert cache is not None
+
+        for executor in ('thread', 'process'):
+            with self.subTest(executor=executor):
+                cache.clear()
+                self.assertEqual(self.matcher.scan_lines(['aapxj', 'adb', 'aapxj', b'aapxj'], executor=executor), [2, 0, 2, 2])
+                self.assertEqual(len(cache), 2)
+                hits = cache.hits
+                self.assertEqual(self.matcher.scan_lines(['adb', 'adb'], executor=executor), [0, 0])
+                self.assertEqual(cache.hits, hits + 1)
+
+    def test_iter_scan_file(self):
+        "Streamed lines go through the cache."
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as input_file:
+            input_file.write('aapxj\nadb\naapxj\naapxj\n')
+        self.addCleanup(os.remove, input_file.name)
+
+        cache = self.matcher.result_cache
+        assert cache is not None
+
+        for executor in ('thread', 'process'):
+            with self.subTest(executor=executor):
+                self.assertEqual(self.matcher.scan_file(input_file.name, executor=executor), [2, 0, 2, 2])
+        self.assertGreater(cache.hits, 0)
+
+
+class TestEngines(unittest.TestCase):
+    def test_definition(self):
+        "Test case from the task definition."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                for word in ('axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd'):
+                    matcher.add_word(word)
+
+                self.assertEqual(matcher.scan('aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt'), 4)
+                self.assertEqual(matcher.scan('aapxj'), 2)
+                self.assertEqual(matcher.scan('adb'), 0)
+                self.assertEqual(matcher.scan('adbtpdxjn'), 1)
+
+    def test_words_longer_than_text(self):
+        "Lengths longer than the text are skipped."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_word('abcdefgh')
+                matcher.add_word('ab')
+
+                self.assertEqual(matcher.scan('ab'), 1)
+
+    def test_add_word_after_scan(self):
+        "Words added after a scan are visible to the next scan."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_word('star')
+                self.assertEqual(matcher.scan('wtsartsatrloop'), 1)
+
+                matcher.add_word('loop')
+                self.assertEqual(matcher.scan('wtsartsatrloop'), 2)
+
+    def test_bytes_input(self):
+        "Bytes, bytearray and memoryview input return the same counts as strings."
+
+        text = 'aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt'
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                for word in ('axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd'):
+                    matcher.add_word(word)
+
+                for data in (text.encode('ascii'), bytearray(text, 'ascii'), memoryview(text.encode('ascii'))):
+                    self.assertEqual(matcher.scan(data), 4)
+
+    def test_invalid_symbol(self):
+        "All engines raise the same validation error, for strings and bytes."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_word('abc')
+
+                for text in ('xyzéxyz', 'xyzéxyz'.encode('utf-8')):
+                    with self.assertRaisesRegex(InputValidationError, '^Unexpected symbol: é$'):
+                        matcher.scan(text)
+
+    def test_scan_matches(self):
+        "Word ids are assigned in order of addition and reported with the offset of their first occurrence."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_words(['axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd', 'apxaj'])
+
+                text = 'aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt'
+                self.assertEqual(matcher.scan_matches(text), {0: 0, 1: 0, 5: 0, 3: 2, 2: 5})
+                self.assertEqual(len(matcher.scan_matches(text)), matcher.scan(text))
+                self.assertEqual(matcher.scan_matches('adb'), {})
+
+    def test_remove_word(self):
+        "Removing one of several words with the same signature keeps the others and their ids."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_words(['axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd', 'apxaj'])
+                text = 'aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt'
+                self.assertEqual(matcher.scan(text), 5)
+
+                matcher.remove_word('apxaj')
+                self.assertEqual(matcher.word_count, 5)
+                self.assertEqual(matcher.scan(text), 4)
+                self.assertEqual(len(matcher.scan_matches(text)), 4)
+
+                matcher.update_dictionary(add=['xaapj'], remove=['axpaj', 'apxaj', 'dnrbt', 'pjxdn'])
+                self.assertEqual(matcher.word_count, 2)
+                self.assertEqual(matcher.scan(text), 0)
+                self.assertEqual(matcher.scan('xpaaj'), 1)
+                self.assertEqual(matcher.scan_matches('xpaaj'), {6: 0})
+                self.assertEqual(sorted(matcher.word_lengths), [3, 5])
+
+    def test_replace_word(self):
+        "A word can be replaced by another with the same endpoints in a single update."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_words(['spam'])
+
+                matcher.update_dictionary(add=['slim'], remove=['spam'])
+
+                self.assertEqual(matcher.word_count, 1)
+                self.assertEqual(matcher.scan('spamslim'), 1)
+                self.assertEqual(matcher.scan_matches('spamslim'), {1: 4})
+
+    def test_remove_missing_word(self):
+        "Nothing is published when a word to remove is not in the dictionary."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_words(['spam', 'eggs'])
+                self.assertEqual(matcher.scan('spameggs'), 2)
+
+                with self.assertRaisesRegex(ValueError, '^Word not in dictionary: smap$'):
+                    matcher.update_dictionary(add=['ham'], remove=['spam', 'smap'])
+
+                self.assertEqual(matcher.word_count, 2)
+                self.assertEqual(matcher.scan('spameggsham'), 2)
+
+    def test_remove_missing_anagram(self):
+        "An anagram with the same endpoints as a dictionary word is not in the dictionary."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_words(['axpaj'])
+
+                with self.assertRaisesRegex(ValueError, '^Word not in dictionary: apxaj$'):
+                    matcher.remove_word('apxaj')
+
+                self.assertEqual(matcher.word_count, 1)
+                self.assertEqual(matcher.scan('aapxj'), 1)
+
+    def test_snapshot_isolation(self):
+        "Snapshots taken before an update keep scanning the dictionary they were taken from."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine)
+                matcher.add_words(['spam', 'eggs'])
+                before = ScrambledWordMatcher.from_snapshot(matcher.snapshot(), TEST_LOGGER, engine=engine)
+                self.assertEqual(before.scan('spameggsham'), 2)
+
+                matcher.update_dictionary(add=['ham'], remove=['eggs'])
+
+                self.assertEqual(matcher.scan('spameggsham'), 2)
+                self.assertEqual(before.scan('spameggsham'), 2)
+                self.assertEqual(before.scan('ham'), 0)
+                self.assertEqual(before.word_count, 2)
+
+    def test_hash_collision(self):
+        "A probe hash hit is verified against full counts."
+
+        matcher = ScrambledWordMatcher(TEST_LOGGER, engine='rolling_hash')
+        matcher.add_word('abc')
+
+        # Move the 'abc' entry under the probe hash of 'aac' to simulate a collision
+        probes = matcher.get_hash_index()[3]
+        (entries,) = probes.values()
+        probes.clear()
+        probes[(multiset_hash(counting_sort_chars('aac')) + FIRST_LETTER_HASHES[0] + LAST_LETTER_HASHES[2]) & HASH_MASK] = entries
+
+        self.assertEqual(matcher.scan('aacaac'), 0)
+
+    def test_automaton_reset(self):
+        "The automaton drops its nodes when it grows beyond its budget, without changing the counts."
+
+        words = ['axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd', 'aabbccddeeffgghhiijj']
+        text = 'aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbtajiihhggffeeddccbbaj'
+        matcher = ScrambledWordMatcher(TEST_LOGGER, engine='automaton')
+        matcher.add_words(words)
+        automaton = matcher.get_automaton()
+        automaton.max_nodes = 10
+
+        reference = ScrambledWordMatcher(TEST_LOGGER)
+        reference.add_words(words)
+
+        for _ in range(2):
+            self.assertEqual(matcher.scan(text), reference.scan(text))
+        self.assertGreater(automaton.resets, 0)
+        self.assertLessEqual(automaton.node_count, automaton.max_nodes)
+
+    def test_numpy_fallback(self):
+        "The numpy engine falls back to the naive engine when NumPy is not installed."
+
+        with patch('scrambled_word_matcher.numpy_backend.np', None):
+            with self.assertLogs(TEST_LOGGER, level='WARNING'):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine='numpy')
+
+        self.assertEqual(matcher.engine, 'naive')
+
+    def test_compact_dictionary_size(self):
+        "The compact engine imports dictionaries beyond the default limit, up to LARGE_MAX_DICTIONARY_SIZE words."
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as dictionary_file:
+            dictionary_file.write(''.join(f'a{second}{third}\n' for second in 'abcdefghij' for third in 'abcdefghijk'))
+        self.addCleanup(os.remove, dictionary_file.name)
+
+        with self.assertRaises(DictionaryValidationError):
+            ScrambledWordMatcher(TEST_LOGGER).import_dictionary(dictionary_file.name)
+
+        matcher = ScrambledWordMatcher(TEST_LOGGER, engine='compact')
+        matcher.import_dictionary(dictionary_file.name)
+        self.assertEqual(matcher.word_count, MAX_DICTIONARY_SIZE + 10)
+
+        with patch('scrambled_word_matcher.matcher.LARGE_MAX_DICTIONARY_SIZE', MAX_DICTIONARY_SIZE):
+            with self.assertRaises(DictionaryValidationError):
+                ScrambledWordMatcher(TEST_LOGGER, engine='compact').import_dictionary(dictionary_file.name)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            ScrambledWordMatcher(TEST_LOGGER, engine='unknown')
+
+
+class TestScanStats(unittest.TestCase):
+    def test_disabled(self):
+        self.assertIsNone(ScrambledWordMatcher(TEST_LOGGER).stats)
+
+    def test_counters(self):
+        "Every engine counts its scans, windows, probes, hits and early exits."
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                matcher = ScrambledWordMatcher(TEST_LOGGER, engine=engine, stats=True)
+                matcher.add_words(['hello', 'world'])
+                stats = matcher.stats
+                assert stats is not None
+
+                self.assertEqual(matcher.scan('ehllodlrowhelloworld'), 2)
+                self.assertEqual(matcher.scan('hellohello'), 1)
+                self.assertEqual((stats.scans, stats.characters, stats.hits, stats.early_exits), (2, 30, 3, 1))
+                self.assertGreaterEqual(stats.probes, stats.hits)
+                self.assertGreaterEqual(stats.window_updates, stats.probes)
+                self.assertGreaterEqual(stats.endpoint_misses, 0)
+                self.assertGreater(stats.phases['scan'], 0)
+
+    def test_length_major_counters(self):
+        "Windows with barrier letters or letters over their caps are skipped."
+
+        matcher = ScrambledWordMatcher(TEST_LOGGER, engine='length_major', stats=True)
+        matcher.add_words(['ab', 'abc', 'zz'])
+        stats = matcher.stats
+        assert stats is not None
+
+        # Length 2: runs 'ab' and 'ba' between barriers 'x' and 'c'. Length 3: run 'abcba', where the second 'b'
+        # exceeds its cap, so 'bcb' is skipped. Windows: 'ab', 'ba', 'abc', 'cba'; probes: 'ab', 'abc'
+        matcher.scan('xabcbax')
+        self.assertEqual((stats.positions, stats.window_updates, stats.endpoint_misses, stats.probes, stats.hits),
+                         (4, 9, 2, 2, 2))
+
+    def test_phases(self):
+        "Dictionary validation and build, and input validation are timed."
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as dictionary_file:
+            dictionary_file.write('axpaj\napxaj\ndnrbt\n')
+        self.addCleanup(os.remove, dictionary_file.name)
+
+        matcher = ScrambledWordMatcher(TEST_LOGGER, engine='endpoint_pruning', stats=True)
+        matcher.import_dictionary(dictionary_file.name)
+        self.assertEqual(matcher.scan_file(dictionary_file.name), [2, 2, 1])
+
+        stats = matcher.stats
+        assert stats is not None
+        self.assertEqual(stats.scans, 3)
+        for phase in ('validation', 'dictionary_build', 'scan'):
+            self.assertGreater(stats.phases[phase], 0)
+
+
+class TestDeadlines(unittest.TestCase):
+    @patch('scrambled_word_matcher.matcher.DEADLINE_CHECK_INTERVAL', 8)
+    def test_partial_scan(self):
+        "A scan past its deadline returns the words matched so far, checking the clock every few positions."
+
+        matcher = ScrambledWordMatcher(TEST_LOGGER, cache_size=16)
+        matcher.add_words(['axpaj', 'dnrbt', 'abd'])
+        text = 'aapxjdnrbtzzzzzabd'
+
+        # Clock reads: 0 when the scan starts, 1 at position 0, and 2 at position 8, past the deadline
+        with patch('scrambled_word_matcher.matcher.monotonic', side_effect=count()):
+            self.assertEqual(matcher.scan_within(text, timeout=1.5), ScanResult(2, partial=True))
+        self.assertEqual(len(matcher.result_cache), 0)
+
+        self.assertEqual(matcher.scan_within(text, timeout=60), ScanResult(3))
+        self.assertEqual(matcher.scan(text), 3)
+        self.assertEqual(matcher.result_cache.hits, 1)
+
+    def test_scan_lines_within(self):
+        "Lines scanned with deadlines count like scan_lines, or get partial counts that are not cached."
+
+        lines = ['aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt', 'aapxj', 'adb', 'adbtpdxjn'] * 3
+
+        for executor in ('thread', 'process'):
+            with self.subTest(executor=executor), \
+                    ScrambledWordMatcher(TEST_LOGGER, executor=executor, workers=2, cache_size=16) as matcher:
+                matcher.add_words(['axpaj', 'apxaj', 'dnrbt', 'pjxdn', 'abd'])
+
+                self.assertTrue(all(result.partial for result in matcher.scan_lines_within(lines, timeout=0)))
+                self.assertTrue(all(result.partial for result in matcher.scan_lines_within(lines, line_timeout=0)))
+                self.assertEqual(len(matcher.result_cache), 0)
+
+                results = matcher.scan_lines_within(lines, timeout=60, line_timeout=60, chunk_size=1)
+                self.assertEqual(results, [ScanResult(matches) for matches in [4, 2, 0, 1] * 3])
+                self.assertEqual(matcher.scan_lines(lines), [4, 2, 0, 1] * 3)
+                self.assertEqual(matcher.result_cache.hits, 4)
+
+    def test_cancellation(self):
+        "Chunks that have not started when the batch deadline passes are cancelled."
+
+        with ScrambledWordMatcher(TEST_LOGGER, workers=1) as matcher:
+            matcher.add_words(['axpaj', 'apxaj'])
+            busy = threading.Event()
+            blocker = matcher.get_pool('thread', 1).submit(busy.wait)  # Holds the only worker
+
+            results = matcher.scan_lines_within(['aapxj', 'apxaj', 'xapaj'], timeout=0.05, chunk_size=1)
+            self.assertEqual(results, [ScanResult(0, partial=True)] * 3)
+
+            busy.set()
+            blocker.result()
+            self.assertEqual(matcher.scan_lines_within(['aapxj', 'apxaj', 'xapaj'], timeout=60),
+                             [ScanResult(2), ScanResult(2), ScanResult(0)])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,6 +5,7 @@ from typing import Tuple, List
 from hypothesis import given, strategies as st
 
 from scrambled_word_matcher import ScrambledWordMatcher
+from scrambled_word_matcher.matcher import ENGINES
 from scrambled_word_matcher.logger import init_logger
 
 TEST_LOGGER = init_logger('test.property')
@@ -66,5 +67,22 @@ class TestScrambledWordMatcher(unittest.TestCase):
         matches = matcher.scan(text)
         self.assertLessEqual(matches, len(words))
 
+    @given(st.lists(random_words(alphabet='abcd', max_size=6), unique=True, max_size=30),
+           st.lists(random_words(alphabet='abcd', min_size=21, max_size=30), unique=True, max_size=2),
+           st.text(min_size=2, max_size=200, alphabet='abcd'))
+    def test_engines_agree(self, dictionary: List[str], long_words: List[str], text: str) -> None:
+        "Engines agree, including on words longer than MAX_DICTIONARY_LENGTH, which add_word accepts."
+
+        dictionary = dictionary + [word for word in long_words if word not in dictionary]
+        text += ''.join(long_words)
+        matchers = [ScrambledWordMatcher(TEST_LOGGER, engine=engine) for engine in ENGINES]
+        for matcher in matchers:
+            for word in dictionary:
+                matcher.add_word(word)
+        expected = matchers[0].scan(text)
+        for matcher in matchers[1:]:
+            self.assertEqual(matcher.scan(text), expected, matcher.engine)
+            self.assertEqual(len(matcher.scan_matches(text)), expected, matcher.engine)
+
 if __name__ == '__main__':
     unittest.main()
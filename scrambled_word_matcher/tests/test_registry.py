@@ -0,0 +1,107 @@
+import os
+import random
+import tempfile
+import unittest
+
+from scrambled_word_matcher import MatcherRegistry, ScrambledWordMatcher
+from scrambled_word_matcher.logger import init_logger
+from scrambled_word_matcher.index_file import dictionary_checksum
+
+TEST_LOGGER = init_logger('test.registry')
+
+
+class TestMatcherRegistry(unittest.TestCase):
+    def write_dictionary(self, words) -> str:
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as dictionary_file:
+            dictionary_file.write(''.join(word + '\n' for word in words))
+        self.addCleanup(os.remove, dictionary_file.name)
+        return dictionary_file.name
+
+    def test_scan_many(self):
+        "Scanning against many dictionaries at once counts like scanning with each dictionary's matcher."
+
+        rng = random.Random(22)
+        vocabulary = sorted({''.join(rng.choice('abcde') for _ in range(rng.randint(2, 6))) for _ in range(200)})
+        paths = [self.write_dictionary(rng.sample(vocabulary, 30)) for _ in range(6)]
+        texts = [''.join(rng.choice('abcde') for _ in range(rng.randint(1, 80))) for _ in range(20)]
+
+        with MatcherRegistry(TEST_LOGGER) as registry:
+            for text in texts:
+                with self.subTest(text=text):
+                    expected = []
+                    for path in paths:
+                        matcher = ScrambledWordMatcher(TEST_LOGGER)
+                        matcher.import_dictionary(path)
+                        expected.append(matcher.scan(text))
+                    self.assertEqual(registry.scan_many(text, paths), expected)
+
+            self.assertEqual(registry.loads, len(paths))
+
+    def test_shared_signatures(self):
+        "Words of several dictionaries share their signature instances."
+
+        registry = MatcherRegistry(TEST_LOGGER)
+        first = registry.get(self.write_dictionary(['spam', 'eggs']))
+        second = registry.get(self.write_dictionary(['spam', 'ham', 'pams']))
+
+        first_signature, = first.index['s', 'm']
+        second_signatures = list(second.index['s', 'm']) + list(second.index['p', 's'])
+        self.assertTrue(all(signature is first_signature for signature in second_signatures))
+        self.assertEqual(len(registry.signature_table), 3)
+        self.assertEqual(registry.signature_refs[first_signature], 3)
+
+    def test_eviction(self):
+        "The least recently used dictionaries are evicted under the memory budget, and loaded again on demand."
+
+        registry = MatcherRegistry(TEST_LOGGER, memory_budget=0)
+        spam_path = self.write_dictionary(['spam', 'eggs'])
+        ham_path = self.write_dictionary(['spam', 'ham'])
+
+        self.assertEqual(registry.scan_many('sapmham', [spam_path, ham_path]), [1, 2])
+        self.assertEqual(list(registry.matchers), [dictionary_checksum(ham_path)])
+        self.assertEqual(registry.evictions, 1)
+        self.assertEqual(len(registry.signature_table), 2)  # The signature of 'eggs' was released
+
+        self.assertEqual(registry.get(dictionary_checksum(spam_path)).scan('sapmeggs'), 2)
+        self.assertEqual((registry.loads, registry.evictions), (3, 2))
+
+    def test_changed_dictionary(self):
+        "A dictionary file that changed is loaded again."
+
+        registry = MatcherRegistry(TEST_LOGGER)
+        path = self.write_dictionary(['spam'])
+        self.assertEqual(registry.get(path).word_count, 1)
+
+        with open(path, 'w') as dictionary_file:
+            dictionary_file.write('spam\neggs\n')
+        os.utime(path, ns=(0, 1))  # The rewrite may fall within the clock resolution
+        self.assertEqual(registry.get(path).word_count, 2)
+
+    def test_evicted_dictionary_changed(self):
+        "An evicted dictionary whose file changed is not reloaded under its previous checksum."
+
+        registry = MatcherRegistry(TEST_LOGGER, memory_budget=0)
+        spam_path = self.write_dictionary(['spam', 'eggs'])
+        spam_checksum = dictionary_checksum(spam_path)
+        registry.get(spam_path)
+        registry.get(self.write_dictionary(['spam', 'ham']))  # Evicts the first dictionary
+
+        with open(spam_path, 'w') as dictionary_file:
+            dictionary_file.write('spam\n')
+        os.utime(spam_path, ns=(0, 1))  # The rewrite may fall within the clock resolution
+
+        with self.assertRaisesRegex(ValueError, 'changed on disk'):
+            registry.get(spam_checksum)
+        with self.assertRaisesRegex(ValueError, 'Unknown dictionary checksum'):
+            registry.get(spam_checksum)
+        self.assertEqual(registry.get(spam_path).word_count, 1)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            MatcherRegistry(TEST_LOGGER, engine='compact')
+        with self.assertRaisesRegex(ValueError, 'Unknown dictionary checksum'):
+            MatcherRegistry(TEST_LOGGER).get(bytes(32))
+
+
+if __name__ == '__main__':
+    unittest.main()
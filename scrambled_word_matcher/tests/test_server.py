@@ -0,0 +1,89 @@
+import os
+import asyncio
+import tempfile
+import unittest
+
+from functools import partial
+
+from scrambled_word_matcher import ScrambledWordMatcher
+from scrambled_word_matcher.logger import init_logger
+from scrambled_word_matcher.server import MatcherServer, request_lines
+
+TEST_LOGGER = init_logger('test.server')
+
+
+def load_matcher(dictionary_path: str) -> ScrambledWordMatcher:
+    matcher = ScrambledWordMatcher(TEST_LOGGER, engine='endpoint_pruning')
+    matcher.import_dictionary(dictionary_path)
+    return matcher
+
+
+class TestMatcherServer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as dictionary_file:
+            dictionary_file.write('axpaj\napxaj\ndnrbt\npjxdn\nabd\n')
+        self.dictionary_path = dictionary_file.name
+        self.addCleanup(os.remove, self.dictionary_path)
+
+        self.server = MatcherServer(partial(load_matcher, self.dictionary_path), TEST_LOGGER)
+        self.addCleanup(self.server.close)
+
+    async def request(self, lines, **address):
+        return [response async for _, response in request_lines(lines, **address)]
+
+    async def test_pipelined_requests(self) -> None:
+        "Responses come back in the order of the requests, failed requests do not close the connection."
+
+        server = await self.server.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        lines = [b'aapxjdnrbtvldptfzbbdbbzxtndrvjblnzjfpvhdhhpxjdnrbt', b'aapxj', b'aBd', b'a', b'adbtpdxjn'] * 20
+        responses = await self.request(lines, port=port)
+        await self.server.stop(server)
+
+        self.assertEqual(responses[:5], ['4', '2', 'ERROR Unexpected symbol: B',
+                                         'ERROR Line 4 does not meet length requirements (2-500)', '1'])
+        self.assertEqual(len(responses), 100)
+        self.assertEqual(responses[95::5], ['4'])
+
+    async def test_no_requests(self) -> None:
+        "Sending no requests yields no responses."
+
+        server = await self.server.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        responses = await asyncio.wait_for(self.request([], port=port), timeout=5)
+        await self.server.stop(server)
+
+        self.assertEqual(responses, [])
+
+    async def test_reload(self) -> None:
+        "RELOAD switches to the current dictionary file for the following requests."
+
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, 'matcher.sock')
+
+            server = await self.server.start(socket_path=socket_path)
+            self.assertEqual(await self.request([b'adb'], socket_path=socket_path), ['0'])
+
+            with open(self.dictionary_path, 'a') as dictionary_file:
+                dictionary_file.write('adb\n')
+
+            self.assertEqual(await self.request([b'RELOAD', b'adb'], socket_path=socket_path), ['OK 6', '1'])
+            await self.server.stop(server)
+
+    async def test_reload_failure(self) -> None:
+        "A failed reload keeps the current dictionary."
+
+        server = await self.server.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        with open(self.dictionary_path, 'a') as dictionary_file:
+            dictionary_file.write('abd\n')  # Duplicate word
+
+        responses = await self.request([b'RELOAD', b'aapxj'], port=port)
+        await self.server.stop(server)
+
+        self.assertTrue(responses[0].startswith('ERROR Dictionary reload failed'), responses[0])
+        self.assertEqual(responses[1], '2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,12 @@ class TestScrambledWordMatcher(unittest.TestCase):
         with patch('builtins.open', mock_open(read_data=mock_dictionary_content)):
             self.assertRaises(ValueError, validate_dictionary, 'fake_dictionary_path')
 
+    def test_dictionary_size_limit(self) -> None:
+        mock_dictionary_content = "word\nanother\nyetanotherword\n"
+        with patch('builtins.open', mock_open(read_data=mock_dictionary_content)):
+            self.assertRaises(ValueError, validate_dictionary, 'fake_dictionary_path', max_size=2)
+            validate_dictionary('fake_dictionary_path', max_size=3)
+
     def test_valid_input_file(self) -> None:
         mock_input_content = "this is a test\nthis is another test\n"
         with patch('builtins.open', mock_open(read_data=mock_input_content)):
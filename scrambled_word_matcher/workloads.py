@@ -0,0 +1,184 @@
+"""
+Adversarial workloads for the complexity benchmarks.
+
+Uniformly random text almost never matches, so it leaves out the paths that dominate worst cases: windows
+passing the endpoint filter, probes that miss, and scans that cannot stop early. Every generator here builds
+a dictionary and a line of text aimed at one pathology, for a given dictionary size and text length, so that
+run_benchmarks.py --complexity can measure how scan time grows with each of them. Words are drawn before the
+text, so a generator called with the same seed and dictionary size returns the same words for every text length.
+"""
+
+import random
+import string
+
+from typing import Callable, Dict, List, Tuple
+
+from scrambled_word_matcher.constraints import MIN_DICTIONARY_LENGTH, MAX_DICTIONARY_LENGTH
+
+Workload = Tuple[List[str], str]  # Dictionary words, text
+WORD_LENGTHS = range(MIN_DICTIONARY_LENGTH, MAX_DICTIONARY_LENGTH + 1)
+MAX_ATTEMPTS_PER_WORD = 100  # Draws of a duplicate word tolerated per word before giving up
+
+
+def distinct_words(count: int, draw: Callable[[int], str]) -> List[str]:
+    """
+    Draw words until count of them are distinct.
+
+    :param count: The number of words.
+    :param draw: Returns a word, given the number of words drawn so far.
+    :return: The words, in the order they were first drawn.
+    :raises ValueError: If the generator cannot produce that many distinct words.
+
+    >>> distinct_words(3, lambda index: 'ab' * (index % 2 + 1) + str(index // 2))
+    ['ab0', 'abab0', 'ab1']
+    """
+
+    words: Dict[str, None] = {}
+    for index in range(count * MAX_ATTEMPTS_PER_WORD):
+        if len(words) == count:
+            break
+        words.setdefault(draw(index))
+    else:
+        raise ValueError(f'Cannot draw {count} distinct words')
+
+    return list(words)
+
+
+def random_word(length: int, rng: random.Random, letters: str = string.ascii_lowercase) -> str:
+    return ''.join(rng.choices(letters, k=length))
+
+
+def scramble(word: str, rng: random.Random) -> str:
+    """
+    Shuffle the inner letters of a word, keeping its first and last letters.
+
+    >>> scramble('ab', random.Random(0)), scramble('a', random.Random(0))
+    ('ab', 'a')
+    """
+
+    inner = list(word[1:-1])
+    rng.shuffle(inner)
+    return word[0] + ''.join(inner) + word[-1] if len(word) > 1 else word
+
+
+def fill(text_length: int, draw: Callable[[], str]) -> str:
+    """
+    Concatenate drawn pieces of text up to text_length characters.
+    """
+
+    pieces: List[str] = []
+    length = 0
+    while length < text_length:
+        piece = draw()
+        pieces.append(piece)
+        length += len(piece)
+
+    return ''.join(pieces)[:text_length]
+
+
+def many_lengths(dictionary_size: int, text_length: int, rng: random.Random) -> Workload:
+    """
+    Words of every length allowed, in equal numbers, in a text half made of scrambled words:
+    every position is visited once per distinct length.
+
+    >>> words, text = many_lengths(38, 100, random.Random(0))
+    >>> sorted({len(word) for word in words}) == list(WORD_LENGTHS), len(text)
+    (True, 100)
+    """
+
+    words = distinct_words(dictionary_size, lambda index: random_word(WORD_LENGTHS[index % len(WORD_LENGTHS)], rng))
+    text = fill(text_length, lambda: scramble(rng.choice(words), rng) if rng.random() < 0.5
+                else random_word(rng.choice(WORD_LENGTHS), rng))
+    return words, text
+
+
+def all_endpoints(dictionary_size: int, text_length: int, rng: random.Random) -> Workload:
+    """
+    Words covering every (first, last) letter pair in turn, in random text: with enough words, every window
+    passes the endpoint filter of every length and is probed, and almost every probe misses.
+
+    >>> words, _ = all_endpoints(26 * 26, 10, random.Random(0))
+    >>> len({(word[0], word[-1]) for word in words})
+    676
+    """
+
+    letters = string.ascii_lowercase
+
+    def draw(index: int) -> str:
+        first, last = divmod(index % len(letters) ** 2, len(letters))
+        return letters[first] + random_word(rng.choice(WORD_LENGTHS) - 2, rng) + letters[last]
+
+    words = distinct_words(dictionary_size, draw)
+    return words, random_word(text_length, rng)
+
+
+def near_misses(dictionary_size: int, text_length: int, rng: random.Random) -> Workload:
+    """
+    A text made of scrambled words with one inner letter replaced: windows have the endpoints and nearly
+    the signature of a word, so they pass every filter but the final lookup, and hardly any window matches.
+
+    >>> words, text = near_misses(10, 200, random.Random(0))
+    >>> from scrambled_word_matcher import ScrambledWordMatcher
+    >>> import logging
+    >>> matcher = ScrambledWordMatcher(logging.getLogger('test'))
+    >>> matcher.add_words(words)
+    >>> matcher.scan(text)
+    0
+    """
+
+    # Words use the first half of the alphabet and replaced letters the second, so windows around them cannot match
+    letters, replacements = string.ascii_lowercase[:13], string.ascii_lowercase[13:]
+    words = distinct_words(dictionary_size, lambda _: random_word(rng.randint(3, MAX_DICTIONARY_LENGTH), rng, letters))
+
+    def near_miss() -> str:
+        word = list(scramble(rng.choice(words), rng))
+        word[rng.randrange(1, len(word) - 1)] = rng.choice(replacements)
+        return ''.join(word)
+
+    return words, fill(text_length, near_miss)
+
+
+def no_early_exit(dictionary_size: int, text_length: int, rng: random.Random) -> Workload:
+    """
+    A text made only of scrambled words, but one word that never occurs: every word but one is matched early,
+    and the scan still has to read the whole text.
+
+    >>> words, text = no_early_exit(5, 100, random.Random(0))
+    >>> words[0], 'z' in text
+    ('zz', False)
+    """
+
+    letters = string.ascii_lowercase[:-1]
+    words = ['zz'] + distinct_words(dictionary_size - 1, lambda _: random_word(rng.choice(WORD_LENGTHS), rng, letters))
+    return words, fill(text_length, lambda: scramble(rng.choice(words[1:]), rng))
+
+
+def repeated_letter(dictionary_size: int, text_length: int, rng: random.Random) -> Workload:
+    """
+    A text repeating a single letter, and words made of that letter, all but one of their inner letters:
+    every window of every length has the endpoints of many words and is probed, and the words with
+    another letter never match.
+
+    >>> words, text = repeated_letter(30, 10, random.Random(0))
+    >>> words[:2], text
+    (['aa', 'aaa'], 'aaaaaaaaaa')
+    """
+
+    runs = ['a' * length for length in WORD_LENGTHS]
+
+    def draw(_: int) -> str:
+        word = list(rng.choice(runs[1:]))
+        word[rng.randrange(1, len(word) - 1)] = rng.choice(string.ascii_lowercase[1:])
+        return ''.join(word)
+
+    words = runs[:dictionary_size] + distinct_words(max(0, dictionary_size - len(runs)), draw)
+    return words, 'a' * text_length
+
+
+WORKLOADS: Dict[str, Callable[[int, int, random.Random], Workload]] = {
+    'many_lengths': many_lengths,
+    'all_endpoints': all_endpoints,
+    'near_misses': near_misses,
+    'no_early_exit': no_early_exit,
+    'repeated_letter': repeated_letter,
+}